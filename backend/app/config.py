@@ -2,7 +2,7 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Literal, Optional
 import os
 
 
@@ -56,6 +56,36 @@ class Settings(BaseSettings):
         description="Redis connection URL for Celery"
     )
 
+    TASK_DISPATCH_TIMEOUT_SECONDS: float = Field(
+        default=2.0,
+        description="Max time an API request waits to enqueue a task or read its state"
+    )
+    TASK_DISPATCH_POOL_SIZE: int = Field(
+        default=4,
+        description="Threads (and pooled broker connections) per API process for enqueuing tasks"
+    )
+    TASK_CIRCUIT_FAILURE_THRESHOLD: int = Field(
+        default=5,
+        description="Consecutive broker failures that open the dispatch circuit breaker"
+    )
+    TASK_CIRCUIT_RESET_SECONDS: float = Field(
+        default=30.0,
+        description="Seconds the circuit stays open before one trial request is let through"
+    )
+
+    WORKER_MONGO_MAX_POOL_SIZE: int = Field(
+        default=10,
+        description="Max MongoDB connections per Celery worker process"
+    )
+    WORKER_MONGO_MIN_POOL_SIZE: int = Field(
+        default=1,
+        description="Idle MongoDB connections each Celery worker process keeps open"
+    )
+    WORKER_MONGO_MAX_IDLE_SECONDS: int = Field(
+        default=300,
+        description="Close worker MongoDB connections idle for longer than this"
+    )
+
     # ======================================
     # Admin Seeder Credentials
     # ======================================
@@ -87,7 +117,115 @@ class Settings(BaseSettings):
         default=10,
         description="Maximum file upload size in megabytes"
     )
-    
+    FARMER_ID_BLOCK_SIZE: int = Field(
+        default=100,
+        description="Farmer ID sequence numbers each process reserves per counter update"
+    )
+    DEDUPE_BLOOM_CAPACITY: int = Field(
+        default=5_000_000,
+        description="Expected farmers in the NRC/phone duplicate prefilter (sizes the Bloom filters)"
+    )
+    DEDUPE_BLOOM_ERROR_RATE: float = Field(
+        default=0.001,
+        description="Target false-positive rate of the duplicate prefilter at capacity"
+    )
+    DEDUPE_BLOOM_REBUILD_LOCK_SECONDS: int = Field(
+        default=600,
+        description="Lock TTL so only one API worker rebuilds the prefilter at startup"
+    )
+    DUPLICATE_MIN_SCORE: float = Field(
+        default=0.6,
+        description="Minimum similarity score for a pair to be stored as a duplicate candidate"
+    )
+    DUPLICATE_BATCH_SIZE: int = Field(
+        default=500,
+        description="Farmers processed per batch by the duplicate detection task"
+    )
+    DUPLICATE_MAX_BLOCK_SIZE: int = Field(
+        default=200,
+        description="Blocking keys shared by more farmers than this are skipped as too generic"
+    )
+    DUPLICATE_WATERMARK_OVERLAP_SECONDS: int = Field(
+        default=300,
+        description="Incremental duplicate runs re-read this much history to tolerate clock skew"
+    )
+    DUPLICATE_SCAN_INTERVAL_MINUTES: int = Field(
+        default=60,
+        description="Interval of the scheduled incremental duplicate scan (celery beat)"
+    )
+    MAP_TILE_MIN_ZOOM: int = Field(
+        default=4,
+        description="Coarsest zoom level kept in the farmer_tile_counts map rollup"
+    )
+    MAP_TILE_MAX_ZOOM: int = Field(
+        default=16,
+        description="Finest zoom level kept in the farmer_tile_counts map rollup"
+    )
+    BOUNDARIES_DIR: str = Field(
+        default="/app/data/boundaries",
+        description="Directory with provinces/districts/chiefdoms .geojson boundary files"
+    )
+    ADDRESS_BOUNDARY_CHECK: Literal["off", "warn", "enforce"] = Field(
+        default="warn",
+        description="Check address codes against the GPS point: off, warn (log + auto-fill) or enforce (reject)"
+    )
+    BOUNDARY_TOLERANCE_METERS: float = Field(
+        default=250.0,
+        description="GPS points this close to the claimed area still match it"
+    )
+    ID_LEASE_MAX_SIZE: int = Field(
+        default=500,
+        description="Maximum farmer IDs a device may lease at once"
+    )
+    ID_LEASE_TTL_DAYS: int = Field(
+        default=30,
+        description="Days a leased farmer ID block stays valid for offline registration"
+    )
+    ID_LEASE_GRACE_HOURS: int = Field(
+        default=24,
+        description="Hours after expiry before unused leased IDs are reclaimed"
+    )
+    SYNC_PAYLOAD_CHUNK_SIZE: int = Field(
+        default=500,
+        description="Sync records per compressed payload chunk in sync_job_payloads"
+    )
+    SYNC_JOB_RETENTION_DAYS: int = Field(
+        default=7,
+        description="Days sync jobs, their payloads and per-record results are kept"
+    )
+    UPLOAD_CHUNK_MAX_MB: int = Field(
+        default=4,
+        description="Largest chunk accepted by a resumable upload PATCH"
+    )
+    UPLOAD_SESSION_TTL_HOURS: int = Field(
+        default=24,
+        description="Hours a resumable upload session and its chunks are kept"
+    )
+    UPLOAD_BATCH_MAX_FILES: int = Field(
+        default=200,
+        description="Most files accepted by one POST /uploads/batch request"
+    )
+    IDEMPOTENCY_TTL_HOURS: int = Field(
+        default=24,
+        description="Hours a stored Idempotency-Key response is replayed"
+    )
+    IDEMPOTENCY_WAIT_SECONDS: float = Field(
+        default=10,
+        description="How long a duplicate request waits for the in-flight original before 409"
+    )
+    IDEMPOTENCY_LOCK_SECONDS: int = Field(
+        default=60,
+        description="After this, a key held by a request that never finished can be taken over"
+    )
+
+    # ======================================
+    # Caching
+    # ======================================
+    CACHE_L1_MAX_ENTRIES: int = Field(
+        default=2048,
+        description="Entries kept in each API process's in-memory (L1) cache"
+    )
+
     # ======================================
     # CORS Configuration
     # ======================================
@@ -110,9 +248,14 @@ class Settings(BaseSettings):
         description="Allowed HTTP methods for CORS"
     )
     CORS_ALLOW_HEADERS: List[str] = Field(
-        default=["Content-Type", "Authorization", "X-Requested-With"],
+        default=["Content-Type", "Content-Encoding", "Authorization", "X-Requested-With", "X-Request-ID",
+                 "If-Match", "If-None-Match", "Upload-Offset", "Idempotency-Key"],
         description="Allowed headers for CORS"
     )
+    CORS_EXPOSE_HEADERS: List[str] = Field(
+        default=["X-Request-ID", "X-Response-Time", "ETag", "X-DB-Queries", "Server-Timing", "Upload-Offset", "Location", "Idempotent-Replayed"],
+        description="Response headers readable by browser clients"
+    )
 
     # ======================================
     # File Upload Settings
@@ -126,6 +269,61 @@ class Settings(BaseSettings):
         description="Allowed document file extensions"
     )
 
+    # ======================================
+    # Response Compression & HTTP Caching
+    # ======================================
+    COMPRESSION_MIN_SIZE: int = Field(
+        default=1024,
+        description="Only compress responses at least this many bytes"
+    )
+    COMPRESSION_GZIP_LEVEL: int = Field(
+        default=6,
+        description="gzip compression level (1-9)"
+    )
+    COMPRESSION_BROTLI_QUALITY: int = Field(
+        default=4,
+        description="Brotli quality (0-11); low values are faster for dynamic JSON"
+    )
+    REQUEST_MAX_DECOMPRESSED_MB: int = Field(
+        default=50,
+        description="Largest gzip/zstd request body accepted, before and after decoding"
+    )
+    CACHE_CONTROL_POLICIES: Dict[str, str] = Field(
+        default={
+            "/api/geo/": "public, max-age=3600, stale-while-revalidate=86400",
+            "/api/reports/": "private, max-age=60, must-revalidate",
+        },
+        description="Cache-Control header by request path prefix (longest prefix wins)"
+    )
+
+    # ======================================
+    # Observability
+    # ======================================
+    METRICS_TOKEN: Optional[str] = Field(
+        default=None,
+        description="If set, /api/metrics requires 'Authorization: Bearer <token>'"
+    )
+    CELERY_QUEUES: List[str] = Field(
+        default=["celery", "id_cards"],
+        description="Celery queues whose backlog is reported in metrics"
+    )
+    SLOW_QUERY_MS: float = Field(
+        default=100,
+        description="Log individual MongoDB commands slower than this (0 disables)"
+    )
+    SLOW_REQUEST_QUERY_COUNT: int = Field(
+        default=25,
+        description="Log requests that issue more MongoDB commands than this"
+    )
+    SLOW_REQUEST_DB_MS: float = Field(
+        default=250,
+        description="Log requests that spend more total MongoDB time than this"
+    )
+    DB_PROFILER_HEADERS: Optional[bool] = Field(
+        default=None,
+        description="Add X-DB-Queries/Server-Timing headers (default: on outside production)"
+    )
+
     # ======================================
     # Pydantic v2 Configuration
     # ======================================
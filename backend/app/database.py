@@ -1,6 +1,9 @@
 # backend/app/database.py
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from app.config import settings
+from app.utils.metrics import MongoCommandMetrics, MongoPoolMetrics
+from app.utils.db_profiler import QueryProfiler
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE
 from typing import Optional
 import logging
 
@@ -8,6 +11,55 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# (collection, keys, options) created at startup by ensure_indexes()
+INDEXES = [
+    # Backstop for block-allocated farmer IDs (services/id_allocator.py)
+    ("farmers", [("farmer_id", ASCENDING)], {"unique": True, "name": "farmer_id_unique"}),
+    # Nearby / within-polygon farmer queries (utils/geo_utils.py)
+    ("farmers", [("location", GEOSPHERE)], {"name": "farmer_location_2dsphere"}),
+    # Map clustering rollup (services/map_rollup.py)
+    ("farmer_tile_counts", [("z", ASCENDING), ("x", ASCENDING), ("y", ASCENDING)], {"name": "tile_zxy"}),
+    # Offline ID leases (services/id_lease_service.py)
+    ("farmer_id_leases", [("farmer_ids", ASCENDING)], {"name": "lease_farmer_ids"}),
+    ("farmer_id_leases", [("status", ASCENDING), ("expires_at", ASCENDING)], {"name": "lease_status_expiry"}),
+    ("farmer_id_leases", [("operator", ASCENDING), ("status", ASCENDING)], {"name": "lease_operator_status"}),
+    # Fuzzy duplicate detection (services/duplicate_detection.py)
+    ("farmers", [("dedupe_keys", ASCENDING)], {"name": "farmer_dedupe_keys"}),
+    ("farmers", [("updated_at", ASCENDING)], {"name": "farmer_updated_at"}),
+    ("farmers", [("created_at", ASCENDING)], {"name": "farmer_created_at"}),
+    ("duplicate_candidates", [("status", ASCENDING), ("score", DESCENDING)], {"name": "candidate_status_score"}),
+    ("duplicate_candidates", [("farmer_ids", ASCENDING)], {"name": "candidate_farmer_ids"}),
+    # Sync merge review queue (services/sync_merge.py)
+    ("sync_conflicts", [("status", ASCENDING), ("created_at", DESCENDING)], {"name": "sync_conflict_status_created"}),
+    ("sync_conflicts", [("farmer_id", ASCENDING)], {"name": "sync_conflict_farmer_id"}),
+    # Sync job claim-check storage (services/sync_jobs.py)
+    ("sync_job_payloads", [("job_id", ASCENDING), ("seq", ASCENDING)], {"name": "sync_payload_job_seq"}),
+    ("sync_job_results", [("job_id", ASCENDING), ("index", ASCENDING)], {"name": "sync_result_job_index"}),
+    ("sync_job_results", [("job_id", ASCENDING), ("status", ASCENDING), ("index", ASCENDING)], {"name": "sync_result_job_status"}),
+    *[
+        (collection, [("created_at", ASCENDING)], {
+            "name": f"{collection}_expiry",
+            "expireAfterSeconds": settings.SYNC_JOB_RETENTION_DAYS * 86400,
+        })
+        for collection in ("sync_jobs", "sync_job_payloads", "sync_job_results")
+    ],
+    # Resumable uploads (services/upload_sessions.py)
+    ("upload_chunks", [("upload_id", ASCENDING), ("offset", ASCENDING)], {"unique": True, "name": "upload_chunk_offset"}),
+    *[
+        (collection, [("created_at", ASCENDING)], {
+            "name": f"{collection}_expiry",
+            "expireAfterSeconds": settings.UPLOAD_SESSION_TTL_HOURS * 3600,
+        })
+        for collection in ("upload_sessions", "upload_chunks")
+    ],
+    # Idempotency-Key responses (services/idempotency.py)
+    ("idempotency_keys", [("created_at", ASCENDING)], {
+        "name": "idempotency_expiry",
+        "expireAfterSeconds": settings.IDEMPOTENCY_TTL_HOURS * 3600,
+    }),
+]
+
+
 # Global MongoDB client instance
 _client: Optional[AsyncIOMotorClient] = None
 _database: Optional[AsyncIOMotorDatabase] = None
@@ -32,6 +84,11 @@ async def connect_to_database() -> None:
             serverSelectionTimeoutMS=5000,  # Timeout for server selection
             connectTimeoutMS=10000,  # Timeout for initial connection
             socketTimeoutMS=45000,  # Timeout for socket operations
+            event_listeners=[
+                MongoCommandMetrics(),  # Per-command latency metrics
+                MongoPoolMetrics("api"),  # Pool size and checkout wait
+                QueryProfiler(slow_query_ms=settings.SLOW_QUERY_MS),  # Per-request attribution
+            ],
         )
         
         # Get database handle
@@ -64,6 +121,24 @@ async def close_database_connection() -> None:
             logger.error(f"❌ Error closing MongoDB connection: {e}")
 
 
+async def ensure_indexes() -> None:
+    """
+    Create indexes the application relies on for correctness.
+    Should be called in FastAPI lifespan context after connecting.
+    
+    The unique farmer_id index is the backstop for ID allocation
+    (see services/id_allocator.py); creates do not pre-check IDs.
+    """
+    db = get_database()
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except Exception as e:
+            # e.g. legacy duplicate IDs - log loudly but keep the API up
+            logger.error(f"❌ Failed to create index {collection}.{options['name']}: {e}")
+    logger.info("✅ MongoDB indexes ensured")
+
+
 def get_database() -> AsyncIOMotorDatabase:
     """
     Get the MongoDB database instance.
@@ -1,14 +1,24 @@
 from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from starlette.middleware.base import BaseHTTPMiddleware
+import asyncio
 import logging
 import os
 
 # Import configuration and database
 from app.config import settings
-from app.database import connect_to_database, close_database_connection
+from app.database import connect_to_database, close_database_connection, ensure_indexes, get_database
+from app.services.duplicate_prefilter import get_duplicate_prefilter
+from app.services.boundary_resolver import get_boundary_resolver
+from app.services.cache import get_cache
+from app.utils.serialization import MongoJSONResponse
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.conditional import ConditionalGetMiddleware
+from app.middleware.cors import CORSMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+from app.middleware.request_decoding import RequestDecompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.db_profiler import DBProfilerMiddleware
 
 # Import routers
 from app.routes import (
@@ -22,6 +32,9 @@ from app.routes import (
     geo,
     operators,
     dashboard,
+    reports,
+    metrics,
+    duplicates,
 )
 
 # Configure logging
@@ -38,9 +51,17 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     logger.info("🚀 Starting Zambian Farmer System API...")
     await connect_to_database()
+    await ensure_indexes()
+    # Built in the background; duplicate checks hit the DB until it is ready
+    prefilter_rebuild = asyncio.create_task(get_duplicate_prefilter().rebuild(get_database()))
+    # Load admin boundary polygons before the first create needs them
+    await asyncio.to_thread(get_boundary_resolver)
+    get_cache().start()
     logger.info("✅ Application startup complete")
     yield
     logger.info("🧹 Shutting down application...")
+    prefilter_rebuild.cancel()
+    await get_cache().stop()
     await close_database_connection()
     logger.info("✅ Application shutdown complete")
 
@@ -56,6 +77,48 @@ app = FastAPI(
     openapi_url="/openapi.json",
     lifespan=lifespan,
     redirect_slashes=False,  # Prevent automatic trailing slash redirects
+    default_response_class=MongoJSONResponse,  # orjson rendering with ObjectId/datetime support
+)
+
+# ============================================
+# Database Profiling (innermost)
+# ============================================
+# Counts MongoDB commands per request and logs N+1 style fan-outs.
+db_profiler_headers = settings.DB_PROFILER_HEADERS
+if db_profiler_headers is None:
+    db_profiler_headers = settings.ENVIRONMENT != "production"
+
+app.add_middleware(
+    DBProfilerMiddleware,
+    max_queries=settings.SLOW_REQUEST_QUERY_COUNT,
+    max_db_ms=settings.SLOW_REQUEST_DB_MS,
+    emit_headers=db_profiler_headers,
+)
+
+# ============================================
+# Response Compression & Conditional GET
+# ============================================
+# Registered before CORS so they sit inside it: ETags are computed on the
+# uncompressed body, then compression runs on the way out.
+app.add_middleware(
+    ConditionalGetMiddleware,
+    cache_policies=settings.CACHE_CONTROL_POLICIES,
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# ============================================
+# Request Body Decompression
+# ============================================
+# gzip/zstd uploads from field devices; inside CORS so rejections carry
+# CORS headers.
+app.add_middleware(
+    RequestDecompressionMiddleware,
+    max_size=settings.REQUEST_MAX_DECOMPRESSED_MB * 1024 * 1024,
 )
 
 # ============================================
@@ -77,8 +140,12 @@ if frontend_origin_env:
     # Add the explicit frontend origin provided via environment
     allowed_origins.append(frontend_origin_env)
 
-# Allow GitHub Codespaces subdomains matching either port 5173/8000/3000
-allow_origin_regex = r"^https:\/\/[\-a-z0-9]+-(5173|8000|3000)\.app\.github\.dev$"
+# Development hosts: GitHub Codespaces forwarded ports and any local port.
+# Compiled once into a single anchored regex by the CORS middleware.
+allow_origin_patterns = [
+    r"https://[\-a-z0-9]+\.app\.github\.dev",
+    r"https?://(localhost|127\.0\.0\.1)(:\d+)?",
+]
 
 # Build final allowed origins for CORS. Prefer an explicitly provided FRONTEND_ORIGIN
 # rather than a wildcard. This keeps development secure while allowing Codespaces
@@ -90,32 +157,20 @@ else:
 
 cors_kwargs = dict(
     allow_origins=cors_allowed_origins,
-    allow_origin_regex=allow_origin_regex,
+    allow_origin_patterns=allow_origin_patterns,
     allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
     allow_methods=settings.CORS_ALLOW_METHODS,
     allow_headers=settings.CORS_ALLOW_HEADERS,
-    expose_headers=["*"],
+    expose_headers=settings.CORS_EXPOSE_HEADERS,
 )
 
 app.add_middleware(CORSMiddleware, **cors_kwargs)
 
-# Extra CORS handling for Codespaces
-class EnsureCORSHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        origin = request.headers.get("origin", "")
-        if origin and (
-            origin.endswith(".app.github.dev")
-            or "localhost" in origin
-            or "127.0.0.1" in origin
-        ):
-            response.headers["Access-Control-Allow-Origin"] = origin
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-            response.headers["Access-Control-Allow-Methods"] = "GET,POST,PUT,DELETE,PATCH,OPTIONS"
-            response.headers["Access-Control-Allow-Headers"] = "*"
-        return response
-
-app.add_middleware(EnsureCORSHeadersMiddleware)
+# ============================================
+# Metrics, Request ID & Timing (outermost)
+# ============================================
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 # ============================================
 # Register API Routers
@@ -131,10 +186,13 @@ app.include_router(farmers.router, prefix="/api", tags=["Farmers"])
 app.include_router(geo.router, prefix="/api")
 app.include_router(operators.router, prefix="/api", tags=["Operators"])
 app.include_router(dashboard.router, prefix="/api", tags=["Dashboard"])
+app.include_router(reports.router, prefix="/api", tags=["Reports"])
 app.include_router(uploads.router, prefix="/api", tags=["Uploads"])
 app.include_router(sync.router, prefix="/api", tags=["Synchronization"])
 app.include_router(farmers_qr.router, prefix="/api", tags=["Farmers QR"])
 app.include_router(health.router, prefix="/api/health", tags=["Health"])
+app.include_router(metrics.router, prefix="/api", tags=["Metrics"])
+app.include_router(duplicates.router, prefix="/api", tags=["Duplicates"])
 
 logger.info("✅ All API routers registered")
 
@@ -0,0 +1,146 @@
+# backend/app/middleware/conditional.py
+"""
+Conditional GET middleware: weak ETags, If-None-Match and Cache-Control.
+
+Pure ASGI. For successful GET/HEAD responses that are fully buffered the
+middleware:
+- computes a weak ETag from the body (unless the route already set one)
+- answers 304 Not Modified when If-None-Match matches, so clients on slow
+  links skip the download entirely
+- applies a Cache-Control policy by path prefix (geo, reports, ...)
+"""
+
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def make_weak_etag(body: bytes) -> str:
+    """
+    Build a weak ETag from response bytes.
+
+    Args:
+        body: Response body
+
+    Returns:
+        str: Weak validator, e.g. W/"3f2a...c1"
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag (RFC 9110).
+
+    Args:
+        if_none_match: Raw header value (may list several tags or be "*")
+        etag: Current ETag of the resource
+
+    Returns:
+        bool: True if the client's cached copy is still valid
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+# Headers that must not be sent with a 304 (RFC 9110 section 15.4.5)
+_STRIP_ON_304 = ("content-length", "content-type", "content-encoding")
+
+
+class ConditionalGetMiddleware:
+    """
+    Add weak ETags / 304 handling and per-route Cache-Control to GET responses.
+
+    Args:
+        app: Downstream ASGI app
+        cache_policies: Mapping of path prefix -> Cache-Control value.
+            Longest matching prefix wins; routes that set their own
+            Cache-Control header are left alone.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache_policies: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.app = app
+        # Sort once so lookup is a first-match scan
+        self.cache_policies: Tuple[Tuple[str, str], ...] = tuple(
+            sorted((cache_policies or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        )
+
+    def _policy_for(self, path: str) -> Optional[str]:
+        for prefix, value in self.cache_policies:
+            if path.startswith(prefix):
+                return value
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        policy = self._policy_for(scope["path"])
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            if policy and "cache-control" not in headers:
+                headers["Cache-Control"] = policy
+
+            if message.get("more_body", False):
+                # Streaming response - cannot hash the body up front
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            etag = headers.get("etag")
+            if etag is None and body:
+                etag = make_weak_etag(body)
+                headers["ETag"] = etag
+
+            if etag and etag_matches(if_none_match, etag):
+                for name in _STRIP_ON_304:
+                    if name in headers:
+                        del headers[name]
+                start_message["status"] = 304
+                await send(start_message)
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
@@ -0,0 +1,154 @@
+# backend/app/middleware/cors.py
+"""
+Pure-ASGI CORS middleware.
+
+Replaces the Starlette CORSMiddleware + BaseHTTPMiddleware pair that used
+to run on every request. Origin rules are compiled once at startup into an
+exact-match set plus a single regex, and the static header values are
+pre-encoded, so a request only costs a set lookup and (for allowed
+origins) a header append on the way out.
+"""
+
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class OriginMatcher:
+    """
+    Precompiled origin allow-list.
+
+    Args:
+        origins: Exact origins (e.g. "http://localhost:5173")
+        patterns: Regex patterns, OR-ed into one compiled expression
+    """
+
+    def __init__(self, origins: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        self.exact = frozenset(o.rstrip("/") for o in origins if o and o != "*")
+        self.allow_all = "*" in origins
+        patterns = [p for p in patterns if p]
+        self.regex = re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+
+    def __call__(self, origin: str) -> bool:
+        if self.allow_all or origin in self.exact:
+            return True
+        return bool(self.regex and self.regex.fullmatch(origin))
+
+
+class CORSMiddleware:
+    """
+    Answer CORS preflights and add CORS headers to responses for allowed origins.
+
+    Args:
+        app: Downstream ASGI app
+        allow_origins: Exact allowed origins
+        allow_origin_patterns: Regexes for allowed origins (e.g. Codespaces hosts)
+        allow_methods: Methods advertised on preflight
+        allow_headers: Request headers allowed on preflight ("*" mirrors the request)
+        allow_credentials: Send Access-Control-Allow-Credentials: true
+        expose_headers: Response headers readable from browser JS
+        max_age: Preflight cache lifetime in seconds
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: Sequence[str] = (),
+        allow_origin_patterns: Sequence[str] = (),
+        allow_methods: Sequence[str] = ("GET",),
+        allow_headers: Sequence[str] = (),
+        allow_credentials: bool = False,
+        expose_headers: Sequence[str] = (),
+        max_age: int = 600,
+    ) -> None:
+        self.app = app
+        self.is_allowed = OriginMatcher(allow_origins, allow_origin_patterns)
+        self.mirror_headers = "*" in allow_headers
+        self.allowed_headers = frozenset(h.lower() for h in allow_headers if h != "*")
+        # CORS-safelisted request headers are always acceptable on preflight
+        self.preflight_allowed = self.allowed_headers | {
+            "accept", "accept-language", "content-language", "content-type",
+        }
+
+        # Pre-encode everything that doesn't depend on the request
+        common: List[Tuple[bytes, bytes]] = [(b"vary", b"Origin")]
+        if allow_credentials:
+            common.append((b"access-control-allow-credentials", b"true"))
+        self.common_headers = tuple(common)
+
+        self.simple_headers = self.common_headers
+        if expose_headers:
+            self.simple_headers += (
+                (b"access-control-expose-headers", ", ".join(expose_headers).encode("latin-1")),
+            )
+
+        self.preflight_headers = self.common_headers + (
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode("latin-1")),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+        )
+        self.allow_headers_value = ", ".join(sorted(self.preflight_allowed)).encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        origin = headers.get("origin")
+        if not origin:
+            await self.app(scope, receive, send)
+            return
+
+        allowed = self.is_allowed(origin)
+
+        if scope["method"] == "OPTIONS" and "access-control-request-method" in headers:
+            await self._preflight(origin, allowed, headers, send)
+            return
+
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+
+        extra = ((b"access-control-allow-origin", origin.encode("latin-1")),) + self.simple_headers
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    (k, v) for k, v in message.get("headers", [])
+                    if not k.lower().startswith(b"access-control-")
+                ] + list(extra)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(self, origin: str, allowed: bool, headers: Headers, send: Send) -> None:
+        requested = headers.get("access-control-request-headers", "")
+        requested_set = {h.strip().lower() for h in requested.split(",") if h.strip()}
+
+        if not allowed or (not self.mirror_headers and not requested_set <= self.preflight_allowed):
+            await _send_plain(send, 400, b"Disallowed CORS request", self.common_headers)
+            return
+
+        allow_headers = requested.encode("latin-1") if self.mirror_headers and requested else self.allow_headers_value
+        response_headers = (
+            (b"access-control-allow-origin", origin.encode("latin-1")),
+            (b"access-control-allow-headers", allow_headers),
+        ) + self.preflight_headers
+        await _send_plain(send, 200, b"OK", response_headers)
+
+
+async def _send_plain(
+    send: Send,
+    status_code: int,
+    body: bytes,
+    headers: Optional[Sequence[Tuple[bytes, bytes]]] = None,
+) -> None:
+    raw_headers = [
+        (b"content-type", b"text/plain; charset=utf-8"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ]
+    raw_headers.extend(headers or ())
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,75 @@
+# backend/app/middleware/db_profiler.py
+"""
+Per-request database profiling middleware (pure ASGI).
+
+Installs a fresh QueryStats for each request so the QueryProfiler command
+listener can attribute MongoDB commands to it. After the response:
+- requests that issued too many commands or spent too long in the
+  database are logged with their request ID and a per-command breakdown
+  (this is how N+1 fan-outs show up)
+- optionally, X-DB-Queries and Server-Timing headers report the numbers
+  to the client (enable outside production only)
+"""
+
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.request_context import get_request_id
+from app.utils.db_profiler import QueryStats, query_stats_ctx
+
+
+logger = logging.getLogger("app.db.profiler")
+
+
+class DBProfilerMiddleware:
+    """
+    Count MongoDB commands and time per request.
+
+    Args:
+        app: Downstream ASGI app
+        max_queries: Log requests issuing more commands than this
+        max_db_ms: Log requests spending more DB time than this
+        emit_headers: Add X-DB-Queries / Server-Timing response headers
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_queries: int = 25,
+        max_db_ms: float = 250,
+        emit_headers: bool = False,
+    ) -> None:
+        self.app = app
+        self.max_queries = max_queries
+        self.max_db_ms = max_db_ms
+        self.emit_headers = emit_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats_ctx.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            if self.emit_headers and message["type"] == "http.response.start":
+                headers = message.setdefault("headers", [])
+                headers.append((b"x-db-queries", str(stats.count).encode("latin-1")))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'.encode("latin-1"),
+                ))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            query_stats_ctx.reset(token)
+            if stats.count > self.max_queries or stats.total_ms > self.max_db_ms:
+                logger.warning(
+                    f"Expensive request {scope['method']} {scope['path']}: "
+                    f"{stats.count} DB commands, {stats.total_ms:.1f}ms "
+                    f"[request_id={get_request_id() or '-'}] {stats.summary()}"
+                )
@@ -0,0 +1,54 @@
+# backend/app/middleware/metrics.py
+"""
+Request latency metrics middleware (pure ASGI).
+
+Records HTTP_REQUEST_SECONDS labelled by the matched route *template*
+(e.g. /api/farmers/{farmer_id}) rather than the raw path, so label
+cardinality stays bounded no matter how many farmers exist.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import HTTP_REQUEST_SECONDS
+
+
+# Label for requests that matched no route (404s, scanners, ...)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Observe request duration by method, route template and status code.
+
+    Args:
+        app: Downstream ASGI app
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # FastAPI stores the matched APIRoute in the (shared) scope
+            route = scope.get("route")
+            template = getattr(route, "path_format", None) or UNMATCHED_ROUTE
+            HTTP_REQUEST_SECONDS.labels(scope["method"], template, str(status_code)).observe(
+                time.perf_counter() - start
+            )
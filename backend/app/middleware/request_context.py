@@ -0,0 +1,81 @@
+# backend/app/middleware/request_context.py
+"""
+Request ID and timing middleware (pure ASGI).
+
+Every request gets an ID - taken from a well-formed incoming X-Request-ID
+header or freshly generated - which is:
+- stored in a contextvar so logs and DB instrumentation can attribute work
+  to the request that caused it
+- exposed on request.state.request_id
+- echoed back in the X-Request-ID response header
+
+The time to response start is returned in X-Response-Time (milliseconds).
+"""
+
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Current request ID (None outside a request, e.g. in startup code)
+request_id_ctx: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Accept client-supplied IDs only if they are short and header-safe
+_VALID_REQUEST_ID = re.compile(rb"^[A-Za-z0-9._\-]{1,128}$")
+
+
+def get_request_id() -> Optional[str]:
+    """Return the ID of the request being handled, if any."""
+    return request_id_ctx.get()
+
+
+class RequestContextMiddleware:
+    """
+    Assign a request ID and report handler time.
+
+    Args:
+        app: Downstream ASGI app
+        header_name: Header used to read/echo the request ID
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Request-ID") -> None:
+        self.app = app
+        self.header_key = header_name.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        raw_id = None
+        for key, value in scope["headers"]:
+            if key == self.header_key:
+                raw_id = value
+                break
+        request_id = (
+            raw_id.decode("latin-1")
+            if raw_id and _VALID_REQUEST_ID.match(raw_id)
+            else uuid.uuid4().hex
+        )
+
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_ctx.set(request_id)
+        start = time.perf_counter()
+        encoded_id = request_id.encode("latin-1")
+
+        async def send_with_context(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = message.setdefault("headers", [])
+                headers.append((self.header_key, encoded_id))
+                headers.append((b"x-response-time", f"{elapsed_ms:.1f}ms".encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_context)
+        finally:
+            request_id_ctx.reset(token)
@@ -0,0 +1,184 @@
+# backend/app/middleware/request_decoding.py
+"""
+Request body decompression middleware (gzip / zstd).
+
+Pure ASGI. Lets field devices upload sync batches compressed: a request
+with `Content-Encoding: gzip` or `zstd` is read, decoded and handed to
+the app as a plain body with the Content-Encoding header removed, so
+routes and body parsing never see the difference.
+
+Decoding is bounded. The compressed body and its decoded form are both
+capped at max_size bytes and anything larger is rejected with 413 before
+it is fully inflated, so a small "zip bomb" cannot exhaust memory.
+Malformed data gets 400 and unsupported encodings get 415.
+
+zstd is optional - without the `zstandard` package zstd bodies get 415.
+"""
+
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import REQUEST_BODY_BYTES
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# Bodies above this are inflated on a worker thread instead of the event loop
+THREADPOOL_THRESHOLD = 256 * 1024
+# Output produced per decompression step while checking the cap
+STEP_SIZE = 1024 * 1024
+
+SUPPORTED_ENCODINGS = ("gzip", "x-gzip", "zstd") if zstandard is not None else ("gzip", "x-gzip")
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def _gunzip(data: bytes, max_size: int) -> bytes:
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    parts: List[bytes] = []
+    size = 0
+    while not decoder.eof:
+        chunk = decoder.decompress(data, STEP_SIZE)
+        data = decoder.unconsumed_tail
+        if not chunk and not data:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise BodyTooLarge()
+        parts.append(chunk)
+    if not decoder.eof:
+        raise ValueError("truncated gzip stream")
+    return b"".join(parts)
+
+
+def _unzstd(data: bytes, max_size: int) -> bytes:
+    parts: List[bytes] = []
+    size = 0
+    with zstandard.ZstdDecompressor().stream_reader(data, read_across_frames=True) as reader:
+        while True:
+            chunk = reader.read(STEP_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise BodyTooLarge()
+            parts.append(chunk)
+    return b"".join(parts)
+
+
+def decode_body(encoding: str, data: bytes, max_size: int) -> bytes:
+    """
+    Decompress a request body.
+
+    Args:
+        encoding: Content-Encoding token ("gzip", "x-gzip" or "zstd")
+        data: Compressed body
+        max_size: Largest decoded size accepted, in bytes
+
+    Returns:
+        bytes: Decoded body
+
+    Raises:
+        BodyTooLarge: If the decoded body would exceed max_size
+        ValueError: If the data is not valid for the encoding
+    """
+    try:
+        if encoding == "zstd":
+            return _unzstd(data, max_size)
+        return _gunzip(data, max_size)
+    except BodyTooLarge:
+        raise
+    except Exception as e:
+        raise ValueError(f"invalid {encoding} body: {e}") from e
+
+
+class RequestDecompressionMiddleware:
+    """
+    Decode gzip/zstd request bodies.
+
+    Args:
+        app: Downstream ASGI app
+        max_size: Cap on the compressed and the decoded body (bytes)
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int = 50 * 1024 * 1024) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding: Optional[str] = None
+        headers: List[Tuple[bytes, bytes]] = []
+        for key, value in scope["headers"]:
+            if key == b"content-encoding":
+                encoding = value.decode("latin-1").strip().lower()
+            elif key != b"content-length":
+                headers.append((key, value))
+
+        if encoding is None or encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+        if encoding not in SUPPORTED_ENCODINGS:
+            await self._reject(scope, receive, send, 415, f"Unsupported Content-Encoding: {encoding}")
+            return
+
+        parts: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_size:
+                await self._reject(scope, receive, send, 413, "Request body too large")
+                return
+            parts.append(chunk)
+            if not message.get("more_body", False):
+                break
+        compressed = b"".join(parts)
+
+        try:
+            if len(compressed) > THREADPOOL_THRESHOLD:
+                body = await run_in_threadpool(decode_body, encoding, compressed, self.max_size)
+            else:
+                body = decode_body(encoding, compressed, self.max_size)
+        except BodyTooLarge:
+            await self._reject(scope, receive, send, 413, "Decompressed request body too large")
+            return
+        except ValueError:
+            await self._reject(scope, receive, send, 400, f"Request body is not valid {encoding}")
+            return
+
+        REQUEST_BODY_BYTES.labels(encoding=encoding, stage="wire").inc(len(compressed))
+        REQUEST_BODY_BYTES.labels(encoding=encoding, stage="decoded").inc(len(body))
+
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        sent = False
+
+        async def receive_decoded() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Body consumed; further reads wait for the client to go away
+            return await receive()
+
+        await self.app(dict(scope, headers=headers), receive_decoded, send)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str) -> None:
+        response = JSONResponse({"detail": detail}, status_code=status_code)
+        await response(scope, receive, send)
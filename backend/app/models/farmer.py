@@ -169,7 +169,6 @@ class FarmerInDB(FarmerBase):
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str, datetime: lambda v: v.isoformat()}
     )
 
 
@@ -180,16 +179,14 @@ class FarmerOut(BaseModel):
     registration_status: str
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int = Field(0, description="Incremented on every write; send it back in If-Match")
     personal_info: PersonalInfo
     address: Address
     farm_info: Optional[FarmInfo] = None
     household_info: Optional[HouseholdInfo] = None
     documents: Optional[Documents] = None
     
-    model_config = ConfigDict(
-        populate_by_name=True,
-        json_encoders={datetime: lambda v: v.isoformat()}
-    )
+    model_config = ConfigDict(populate_by_name=True)
     
     @classmethod
     def from_mongo(cls, data: dict) -> "FarmerOut":
@@ -15,6 +15,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime, timezone
 
 from app.database import get_db
+from app.services.cache import TAG_USERS, get_cache
 from app.models.user import (
     LoginRequest,
     LoginResponse,
@@ -203,6 +204,7 @@ async def register_user(
     
     # Insert into database
     result = await db.users.insert_one(user_doc)
+    await get_cache().invalidate(TAG_USERS)
     
     # Fetch created user
     created_user = await db.users.find_one({"_id": result.inserted_id})
@@ -1,11 +1,17 @@
 # backend/app/routes/dashboard.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from app.database import get_db
 from app.dependencies.roles import require_role
+from app.services.cache import TAG_FARMERS, TAG_USERS, CacheNamespace, get_cache
+from app.services.coalescing import coalesce
 from datetime import datetime
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# Same numbers for every admin/operator; served up to 2 minutes stale
+# while one request recomputes them
+DASHBOARD_CACHE = CacheNamespace("dashboard", ttl=30, stale_ttl=120, tags=(TAG_FARMERS, TAG_USERS))
+
 
 @router.get(
     "/stats",
@@ -13,9 +19,18 @@ router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
     description="Returns key dashboard statistics for admin/operator. Auth required."
 )
 async def get_dashboard_stats(
+    request: Request,
     db = Depends(get_db),
     current_user = Depends(require_role(["ADMIN", "OPERATOR"]))
 ):
+    return await coalesce(
+        request,
+        current_user,
+        lambda: get_cache().get_or_load(DASHBOARD_CACHE, "stats", lambda: _compute_stats(db)),
+    )
+
+
+async def _compute_stats(db) -> dict:
     total_farmers = await db.farmers.count_documents({})
     active_farmers = await db.farmers.count_documents({"registration_status": "approved"})
     pending_farmers = await db.farmers.count_documents({"registration_status": "pending"})
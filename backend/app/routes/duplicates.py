@@ -0,0 +1,127 @@
+# backend/app/routes/duplicates.py
+"""
+Admin review of fuzzy duplicate-farmer candidates.
+
+Endpoints:
+- GET   /api/duplicates                 - Page through candidate pairs (highest score first)
+- PATCH /api/duplicates/{candidate_id}  - Confirm or dismiss a pair
+- POST  /api/duplicates/scan            - Queue a detection run
+"""
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
+
+from app.database import get_db
+from app.dependencies.roles import require_admin
+from app.services.duplicate_detection import CANDIDATE_OPEN, STATE_ID
+from app.services.task_dispatch import get_task_dispatcher
+from app.tasks.duplicate_tasks import detect_duplicate_farmers
+
+
+router = APIRouter(prefix="/duplicates", tags=["Duplicates"])
+
+# Farmer fields shown next to each candidate pair
+SUMMARY_PROJECTION = {
+    "_id": 0,
+    "farmer_id": 1,
+    "registration_status": 1,
+    "personal_info.first_name": 1,
+    "personal_info.last_name": 1,
+    "personal_info.date_of_birth": 1,
+    "personal_info.nrc": 1,
+    "personal_info.phone_primary": 1,
+    "address.district_name": 1,
+    "address.chiefdom_name": 1,
+    "address.village": 1,
+}
+
+
+class CandidateReview(BaseModel):
+    status: Literal["confirmed", "dismissed", "open"]
+    note: Optional[str] = Field(None, max_length=500)
+
+
+class ScanRequest(BaseModel):
+    full: bool = False
+
+
+@router.get("", summary="List duplicate candidates")
+async def list_candidates(
+    status_filter: str = Query(CANDIDATE_OPEN, alias="status"),
+    min_score: float = Query(0.0, ge=0, le=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    user: dict = Depends(require_admin),
+    db=Depends(get_db),
+):
+    """Candidate pairs with both farmers' summaries, highest score first."""
+    query = {"status": status_filter, "score": {"$gte": min_score}}
+    total = await db.duplicate_candidates.count_documents(query)
+    candidates = await (
+        db.duplicate_candidates.find(query)
+        .sort("score", -1)
+        .skip(skip)
+        .limit(limit)
+        .to_list(length=limit)
+    )
+
+    farmer_ids = {fid for c in candidates for fid in c["farmer_ids"]}
+    farmers = {
+        f["farmer_id"]: f
+        async for f in db.farmers.find({"farmer_id": {"$in": list(farmer_ids)}}, SUMMARY_PROJECTION)
+    }
+
+    results = []
+    for c in candidates:
+        results.append({
+            "candidate_id": c["_id"],
+            "score": c["score"],
+            "features": c.get("features", {}),
+            "blocking": c.get("blocking", []),
+            "status": c["status"],
+            "updated_at": c.get("updated_at"),
+            # None if a farmer was deleted after detection
+            "farmers": [farmers.get(fid) for fid in c["farmer_ids"]],
+        })
+
+    state = await db.job_state.find_one({"_id": STATE_ID}) or {}
+    return {
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "results": results,
+        "last_run_at": state.get("last_run_at"),
+        "last_run": state.get("last_run"),
+    }
+
+
+@router.patch("/{candidate_id}", summary="Review a duplicate candidate")
+async def review_candidate(
+    candidate_id: str,
+    review: CandidateReview,
+    user: dict = Depends(require_admin),
+    db=Depends(get_db),
+):
+    """Record an admin decision; reviewed pairs keep it when rescored."""
+    result = await db.duplicate_candidates.update_one(
+        {"_id": candidate_id},
+        {"$set": {
+            "status": review.status,
+            "review_note": review.note,
+            "reviewed_by": user.get("email"),
+            "reviewed_at": datetime.utcnow(),
+        }},
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
+    return {"candidate_id": candidate_id, "status": review.status}
+
+
+@router.post("/scan", status_code=status.HTTP_202_ACCEPTED, summary="Run duplicate detection")
+async def scan_duplicates(payload: ScanRequest, user: dict = Depends(require_admin)):
+    """Queue an incremental (or full) detection run; poll it via /api/sync/status."""
+    task_id = await get_task_dispatcher().dispatch(detect_duplicate_farmers, kwargs={"full": payload.full})
+    return {"job_id": task_id, "status": "queued", "full": payload.full}
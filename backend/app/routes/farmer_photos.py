@@ -3,7 +3,10 @@ from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, status
 from app.database import get_db
 from app.dependencies.roles import require_operator
 from app.config import settings
+from app.services.farmer_service import invalidate_farmer_caches
+from app.utils.metrics import record_upload
 from pathlib import Path
+from datetime import datetime
 
 router = APIRouter(prefix="/farmers", tags=["Farmer Photos"])
 
@@ -35,6 +38,7 @@ async def upload_photo(
             status_code=400,
             detail=f"File too large. Max {MAX_UPLOAD_SIZE_MB}MB allowed."
         )
+    record_upload("photo", len(content))
     photo_folder = get_photo_folder(farmer_id)
     photo_folder.mkdir(parents=True, exist_ok=True)
     filename = f"photo.{file.filename.rsplit('.', 1)[-1].lower()}"
@@ -45,6 +49,8 @@ async def upload_photo(
     db_path = f"/uploads/{farmer_id}/photos/{filename}"
     await db.farmers.update_one(
         {"farmer_id": farmer_id},
-        {"$set": {"documents.photo": db_path}}
+        {"$set": {"documents.photo": db_path, "updated_at": datetime.utcnow()},
+         "$inc": {"version": 1}}
     )
+    await invalidate_farmer_caches(farmer_id)
     return {"message": "Photo uploaded", "photo_path": db_path}
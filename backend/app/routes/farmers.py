@@ -5,6 +5,9 @@ Farmer management endpoints.
 Endpoints:
 - POST /api/farmers - Create new farmer
 - GET /api/farmers - List farmers with pagination/filters
+- GET /api/farmers/near - Farmers nearest to a point
+- POST /api/farmers/within - Farmers inside a polygon
+- GET /api/farmers/clusters - Clustered farmer counts for a map viewport
 - GET /api/farmers/{farmer_id} - Get farmer details
 - PUT /api/farmers/{farmer_id} - Update farmer
 - PATCH /api/farmers/{farmer_id}/status - Update registration status
@@ -20,7 +23,10 @@ from fastapi import (
     HTTPException,
     status,
     BackgroundTasks,
+    Header,
     Query,
+    Request,
+    Response,
 )
 from typing import Optional, List
 from motor.motor_asyncio import AsyncIOMotorDatabase
@@ -39,8 +45,21 @@ from app.models.farmer import (
     FarmerOut,
     FarmerListItem,
 )
-from app.services.farmer_service import FarmerService
+from app.services.farmer_service import (
+    FarmerService,
+    farmer_etag,
+    invalidate_farmer_caches,
+    version_from_if_match,
+)
+from app.services.idempotency import idempotent
+from app.services.map_rollup import query_clusters
 from app.utils.security import verify_qr_signature, generate_qr_data
+from app.utils.crypto_utils import has_bad_check_digit
+from app.utils.serialization import json_response
+from app.middleware.conditional import etag_matches
+from app.utils.metrics import record_upload
+from app.utils.geo_utils import polygon_geometry
+from pydantic import BaseModel, Field
 from app.config import settings
 from pathlib import Path
 import time
@@ -71,6 +90,7 @@ router = APIRouter(prefix="/farmers", tags=["Farmers"])
 )
 async def create_farmer(
     farmer_data: FarmerCreate,
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_user: dict = Depends(require_operator)
 ):
@@ -91,6 +111,9 @@ async def create_farmer(
     2. Generate unique farmer ID (ZM + 8 hex chars)
     3. Create farmer record with "pending" status
     4. Return created farmer
+
+    **Retries:** send an `Idempotency-Key` header; a retry with the same key
+    returns the first response instead of registering the farmer again.
     
     **Example Request:**
     ```
@@ -118,11 +141,14 @@ async def create_farmer(
     # Initialize service
     farmer_service = FarmerService(db)
     
-    # Create farmer
+    # Create farmer (once per Idempotency-Key)
     created_by = current_user.get("email")
-    farmer = await farmer_service.create_farmer(farmer_data, created_by=created_by)
-    
-    return farmer
+
+    async def create():
+        farmer = await farmer_service.create_farmer(farmer_data, created_by=created_by)
+        return json_response(farmer, status_code=status.HTTP_201_CREATED)
+
+    return await idempotent(request, db, created_by, create)
 
 
 # =======================================================
@@ -186,7 +212,9 @@ async def list_farmers(
     """
     farmer_service = FarmerService(db)
     
-    farmers = await farmer_service.list_farmers(
+    # Hot path: rows are already in FarmerListItem shape, so render them
+    # directly instead of re-validating through response_model
+    farmers = await farmer_service.list_farmer_rows(
         skip=skip,
         limit=limit,
         status=status,
@@ -194,7 +222,7 @@ async def list_farmers(
         search=search
     )
     
-    return farmers
+    return json_response(farmers)
 
 
 @router.get(
@@ -235,6 +263,128 @@ async def count_farmers(
     }
 
 
+# =======================================================
+# Spatial Queries
+# =======================================================
+class PolygonQuery(BaseModel):
+    """Outer ring of a polygon as [longitude, latitude] pairs (GeoJSON order)."""
+    coordinates: List[List[float]] = Field(..., min_length=3, max_length=1000)
+    status: Optional[str] = Field(None, pattern="^(pending|approved|rejected)$")
+    limit: int = Field(500, ge=1, le=5000)
+
+
+@router.get(
+    "/near",
+    summary="Nearby farmers",
+    description="Farmers closest to a GPS point, e.g. a depot or extension office"
+)
+async def farmers_near(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude"),
+    radius_km: float = Query(10, gt=0, le=200, description="Search radius in kilometres"),
+    limit: int = Query(50, ge=1, le=500),
+    status: Optional[str] = Query(None, regex="^(pending|approved|rejected)$"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: dict = Depends(require_role(["ADMIN", "OPERATOR", "VIEWER"]))
+):
+    """
+    Farmers within `radius_km` of a point, closest first.
+    
+    **Permissions:** ADMIN, OPERATOR, or VIEWER
+    
+    **Example:**
+    ```
+    GET /api/farmers/near?lat=-11.5&lng=28.9&radius_km=15
+    ```
+    
+    Each row is a farmer summary plus `latitude`, `longitude` and `distance_m`.
+    Farmers without GPS coordinates are never returned.
+    """
+    farmer_service = FarmerService(db)
+    rows = await farmer_service.find_farmers_near(
+        latitude=lat,
+        longitude=lng,
+        max_distance_m=radius_km * 1000,
+        limit=limit,
+        status=status
+    )
+    return json_response(rows)
+
+
+@router.post(
+    "/within",
+    summary="Farmers within polygon",
+    description="Farmers whose GPS location lies inside a drawn polygon"
+)
+async def farmers_within(
+    payload: PolygonQuery,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: dict = Depends(require_role(["ADMIN", "OPERATOR", "VIEWER"]))
+):
+    """
+    Farmers inside a polygon (e.g. a catchment area drawn on the map).
+    
+    **Permissions:** ADMIN, OPERATOR, or VIEWER
+    
+    **Body:**
+    ```
+    {"coordinates": [[28.8, -11.6], [29.0, -11.6], [29.0, -11.4], [28.8, -11.4]]}
+    ```
+    """
+    try:
+        polygon = polygon_geometry(payload.coordinates)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    farmer_service = FarmerService(db)
+    rows = await farmer_service.find_farmers_within(
+        polygon,
+        limit=payload.limit,
+        status=payload.status
+    )
+    return json_response(rows)
+
+
+@router.get(
+    "/clusters",
+    summary="Map clusters",
+    description="Precomputed farmer counts per map cell for the visible bounding box"
+)
+async def farmer_clusters(
+    zoom: int = Query(..., ge=0, le=22, description="Current map zoom level"),
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: dict = Depends(require_role(["ADMIN", "OPERATOR", "VIEWER"]))
+):
+    """
+    Clustered farmer counts for a map viewport.
+    
+    **Permissions:** ADMIN, OPERATOR, or VIEWER
+    
+    Cells come from the `farmer_tile_counts` rollup (quadkey bins kept up to
+    date on every farmer write), so a pan or zoom is one small indexed query
+    no matter how many farmers exist.
+    
+    **Example:**
+    ```
+    GET /api/farmers/clusters?zoom=7&min_lat=-13&min_lng=27&max_lat=-9&max_lng=32
+    ```
+    
+    **Response:**
+    ```
+    {"zoom": 9, "clusters": [{"quadkey": "300211...", "count": 412, "lat": -11.2, "lng": 28.9}]}
+    ```
+    """
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    
+    result = await query_clusters(db, zoom, min_lat, min_lng, max_lat, max_lng)
+    return json_response(result)
+
+
 # =======================================================
 # GET Single Farmer
 # =======================================================
@@ -246,6 +396,7 @@ async def count_farmers(
 )
 async def get_farmer(
     farmer_id: str,
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_user: dict = Depends(require_role(["ADMIN", "OPERATOR", "VIEWER", "FARMER"]))
 ):
@@ -256,6 +407,10 @@ async def get_farmer(
     - ADMIN/OPERATOR/VIEWER: Can view all farmers
     - FARMER: Can only view their own data
     
+    **Caching:** Served from the farmer detail cache with an ETag derived
+    from `version` and `updated_at`; send it back in `If-None-Match` to get
+    a 304, or in `If-Match` on PUT to update only that version.
+    
     **Example Response:**
     ```
     {
@@ -278,20 +433,22 @@ async def get_farmer(
     }
     ```
     """
-    farmer_service = FarmerService(db)
+    if has_bad_check_digit(farmer_id):
+        # Mistyped ID: no such farmer can exist, skip the cache and database
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Farmer {farmer_id} not found")
     
-    farmer = await farmer_service.get_farmer_by_id(farmer_id)
+    farmer_service = FarmerService(db)
     
-    if not farmer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Farmer {farmer_id} not found"
-        )
+    farmer = await farmer_service.get_farmer_detail(farmer_id)
     
     # TODO: Add resource-based access control for FARMER role
     # if current_user has FARMER role, verify they own this farmer_id
     
-    return farmer
+    headers = {"Cache-Control": "private, no-cache", "ETag": farmer_etag(farmer)}
+    if etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return json_response(farmer, headers=headers)
 
 
 # =======================================================
@@ -306,6 +463,8 @@ async def get_farmer(
 async def update_farmer(
     farmer_id: str,
     update_data: FarmerUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="ETag from GET, or the farmer's version"),
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_user: dict = Depends(require_operator)
 ):
@@ -318,6 +477,9 @@ async def update_farmer(
     - Partial updates allowed (only send fields to update)
     - Cannot change farmer_id
     - Updates timestamp automatically
+    - With `If-Match`, the update only applies if the farmer is still at
+      that version; otherwise 409 with the current version and, for each
+      submitted field, the stored value it conflicts with
     
     **Example Request:**
     ```
@@ -329,9 +491,19 @@ async def update_farmer(
     }
     ```
     """
+    expected_version = None
+    if if_match:
+        try:
+            expected_version = version_from_if_match(if_match)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="If-Match must be an ETag from GET or a version number"
+            )
+    
     farmer_service = FarmerService(db)
     
-    updated_farmer = await farmer_service.update_farmer(farmer_id, update_data)
+    updated_farmer = await farmer_service.update_farmer(farmer_id, update_data, expected_version)
     
     if not updated_farmer:
         raise HTTPException(
@@ -339,6 +511,7 @@ async def update_farmer(
             detail=f"Farmer {farmer_id} not found"
         )
     
+    response.headers["ETag"] = farmer_etag(updated_farmer.model_dump())
     return updated_farmer
 
 
@@ -484,6 +657,8 @@ async def upload_farmer_photo(
             detail=f"File too large. Max size: {settings.MAX_UPLOAD_SIZE_MB}MB"
         )
     
+    record_upload("photo", len(file_content))
+    
     # Verify farmer exists
     farmer_service = FarmerService(db)
     farmer = await farmer_service.get_farmer_by_id(farmer_id)
@@ -678,6 +853,7 @@ async def upload_farmer_document(
         with open(file_path, "wb") as buffer:
             content = await file.read()
             buffer.write(content)
+        record_upload("document", len(content))
         
         # Update farmer record
         doc_data = {
@@ -696,11 +872,16 @@ async def upload_farmer_document(
         # Add document
         result = await db.farmers.update_one(
             {"farmer_id": farmer_id},
-            {"$push": {"identification_documents": doc_data}}
+            {
+                "$push": {"identification_documents": doc_data},
+                "$set": {"updated_at": datetime.utcnow()},
+                "$inc": {"version": 1},
+            }
         )
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Farmer not found")
+        await invalidate_farmer_caches(farmer_id)
         
         return {
             "message": f"{doc_type} uploaded successfully",
@@ -15,14 +15,20 @@ from typing import Optional, List
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field, ConfigDict
 from functools import lru_cache
+from bson import ObjectId
 import logging
 
 from app.database import get_db
+from app.services.cache import TAG_GEO, CacheNamespace, get_cache
+from app.utils.serialization import json_response
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/geo", tags=["Geographic Data"])
 
+# Reference data; reseeding invalidates it (scripts/seed_geo_from_csv.py)
+GEO_CACHE = CacheNamespace("geo", ttl=3600, stale_ttl=86400, tags=(TAG_GEO,))
+
 
 # =======================================================
 # Pydantic Models
@@ -99,7 +105,7 @@ def serialize_geo_doc(doc: dict, exclude_id: bool = True) -> dict:
             continue
         
         # Handle ObjectId
-        if hasattr(value, '__class__') and value.__class__.__name__ == 'ObjectId':
+        if isinstance(value, ObjectId):
             result[key] = str(value)
         else:
             result[key] = value
@@ -147,19 +153,22 @@ async def list_provinces(
     ```
     """
     try:
-        # Query provinces, sorted by name
-        cursor = db.provinces.find({}).sort("province_name", 1)
-        provinces = await cursor.to_list(length=100)
-        
-        if not provinces:
-            logger.warning("No provinces found in database")
-            return []
-        
-        # Serialize and return
-        result = [serialize_geo_doc(p) for p in provinces]
-        logger.info(f"Retrieved {len(result)} provinces")
+        async def load():
+            # Query provinces, sorted by name
+            cursor = db.provinces.find({}).sort("province_name", 1)
+            provinces = await cursor.to_list(length=100)
+            
+            if not provinces:
+                logger.warning("No provinces found in database")
+                return []
+            
+            # Serialize and return
+            result = [serialize_geo_doc(p) for p in provinces]
+            logger.info(f"Retrieved {len(result)} provinces")
+            
+            return result
         
-        return result
+        return await get_cache().get_or_load(GEO_CACHE, "provinces", load)
         
     except Exception as e:
         logger.error(f"Error retrieving provinces: {e}")
@@ -260,24 +269,27 @@ async def list_districts(
     ```
     """
     try:
-        # Build query
-        query = {}
-        if province_code:
-            query["province_id"] = province_code.upper()
-        
-        # Execute query, sorted by name
-        cursor = db.districts.find(query).sort("district_name", 1)
-        districts = await cursor.to_list(length=500)
-        
-        if not districts:
-            logger.warning(f"No districts found for query: {query}")
-            return []
-        
-        # Serialize and return
-        result = [serialize_geo_doc(d) for d in districts]
-        logger.info(f"Retrieved {len(result)} districts")
+        async def load():
+            # Build query
+            query = {}
+            if province_code:
+                query["province_id"] = province_code.upper()
+            
+            # Execute query, sorted by name
+            cursor = db.districts.find(query).sort("district_name", 1)
+            districts = await cursor.to_list(length=500)
+            
+            if not districts:
+                logger.warning(f"No districts found for query: {query}")
+                return []
+            
+            # Serialize and return
+            result = [serialize_geo_doc(d) for d in districts]
+            logger.info(f"Retrieved {len(result)} districts")
+            
+            return result
         
-        return result
+        return await get_cache().get_or_load(GEO_CACHE, f"districts:{(province_code or '').upper()}", load)
         
     except Exception as e:
         logger.error(f"Error retrieving districts: {e}")
@@ -379,41 +391,44 @@ async def list_chiefdoms(
     ```
     """
     try:
-        # Build query (case-insensitive)
-        query = {}
-        if district_code:
-            # Case-insensitive match
-            query["district_id"] = {
-                "$regex": f"^{district_code}$",
-                "$options": "i"
-            }
-        
-        # Execute query, sorted by name
-        cursor = db.chiefdoms.find(query).sort("chiefdom_name", 1)
-        chiefdoms = await cursor.to_list(length=2000)
-        
-        if not chiefdoms:
-            logger.warning(f"No chiefdoms found for query: {query}")
-            return []
-        
-        # Serialize and normalize field names
-        result = []
-        for c in chiefdoms:
-            try:
-                doc = serialize_geo_doc(c)
+        async def load():
+            # Build query (case-insensitive)
+            query = {}
+            if district_code:
+                # Case-insensitive match
+                query["district_id"] = {
+                    "$regex": f"^{district_code}$",
+                    "$options": "i"
+                }
+            
+            # Execute query, sorted by name
+            cursor = db.chiefdoms.find(query).sort("chiefdom_name", 1)
+            chiefdoms = await cursor.to_list(length=2000)
+            
+            if not chiefdoms:
+                logger.warning(f"No chiefdoms found for query: {query}")
+                return []
+            
+            # Serialize and normalize field names
+            result = []
+            for c in chiefdoms:
+                try:
+                    doc = serialize_geo_doc(c)
                 
-                # Normalize chiefdom_name (handle legacy "chief_name" field)
-                if "chiefdom_name" not in doc and "chief_name" in doc:
-                    doc["chiefdom_name"] = doc.pop("chief_name")
+                    # Normalize chiefdom_name (handle legacy "chief_name" field)
+                    if "chiefdom_name" not in doc and "chief_name" in doc:
+                        doc["chiefdom_name"] = doc.pop("chief_name")
                 
-                result.append(doc)
+                    result.append(doc)
                 
-            except Exception as e:
-                logger.warning(f"Error processing chiefdom {c.get('chiefdom_code', 'unknown')}: {e}")
-                continue
+                except Exception as e:
+                    logger.warning(f"Error processing chiefdom {c.get('chiefdom_code', 'unknown')}: {e}")
+                    continue
+            
+            logger.info(f"Retrieved {len(result)} chiefdoms")
+            return result
         
-        logger.info(f"Retrieved {len(result)} chiefdoms")
-        return result
+        return await get_cache().get_or_load(GEO_CACHE, f"chiefdoms:{(district_code or '').upper()}", load)
         
     except Exception as e:
         logger.error(f"Error retrieving chiefdoms: {e}")
@@ -518,50 +533,39 @@ async def get_geo_hierarchy(
     ```
     """
     try:
-        # Fetch all data
-        provinces = await db.provinces.find({}).sort("province_name", 1).to_list(100)
-        districts = await db.districts.find({}).sort("district_name", 1).to_list(500)
-        chiefdoms = await db.chiefdoms.find({}).sort("chiefdom_name", 1).to_list(2000)
-        
-        # Build hierarchy
-        hierarchy = []
-        
-        for province in provinces:
-            province_code = province["province_code"]
+        async def load():
+            # Fetch all data
+            provinces = await db.provinces.find({}).sort("province_name", 1).to_list(100)
+            districts = await db.districts.find({}).sort("district_name", 1).to_list(500)
+            chiefdoms = await db.chiefdoms.find({}).sort("chiefdom_name", 1).to_list(2000)
             
-            # Get districts for this province
-            province_districts = [
-                d for d in districts 
-                if d.get("province_code") == province_code
-            ]
+            # Serialize once, then group children by parent code in a single
+            # pass instead of rescanning every district/chiefdom per parent
+            chiefdoms_by_district = {}
+            for c in chiefdoms:
+                chief = serialize_geo_doc(c)
+                if "chiefdom_name" not in chief and "chief_name" in chief:
+                    chief["chiefdom_name"] = chief.pop("chief_name")
+                parent = str(chief.get("district_code", "")).upper()
+                chiefdoms_by_district.setdefault(parent, []).append(chief)
             
-            # For each district, get chiefdoms
-            districts_with_chiefdoms = []
-            for district in province_districts:
-                district_code = district["district_code"]
-                
-                district_chiefdoms = [
-                    serialize_geo_doc(c)
-                    for c in chiefdoms
-                    if c.get("district_code", "").upper() == district_code.upper()
-                ]
-                
-                # Normalize chiefdom names
-                for chief in district_chiefdoms:
-                    if "chiefdom_name" not in chief and "chief_name" in chief:
-                        chief["chiefdom_name"] = chief.pop("chief_name")
-                
-                districts_with_chiefdoms.append({
-                    **serialize_geo_doc(district),
-                    "chiefdoms": district_chiefdoms
-                })
+            districts_by_province = {}
+            for d in districts:
+                district = serialize_geo_doc(d)
+                district_code = str(district.get("district_code", "")).upper()
+                district["chiefdoms"] = chiefdoms_by_district.get(district_code, [])
+                districts_by_province.setdefault(district.get("province_code"), []).append(district)
+            
+            hierarchy = []
+            for p in provinces:
+                province = serialize_geo_doc(p)
+                province["districts"] = districts_by_province.get(province.get("province_code"), [])
+                hierarchy.append(province)
             
-            hierarchy.append({
-                **serialize_geo_doc(province),
-                "districts": districts_with_chiefdoms
-            })
+            return hierarchy
         
-        return {"provinces": hierarchy}
+        hierarchy = await get_cache().get_or_load(GEO_CACHE, "hierarchy", load)
+        return json_response({"provinces": hierarchy})
         
     except Exception as e:
         logger.error(f"Error building geographic hierarchy: {e}")
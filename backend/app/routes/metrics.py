@@ -0,0 +1,64 @@
+# backend/app/routes/metrics.py
+"""
+Prometheus scrape endpoint.
+
+Endpoints:
+- GET /api/metrics - Metrics in Prometheus text exposition format
+
+If METRICS_TOKEN is configured the scraper must send
+`Authorization: Bearer <METRICS_TOKEN>`.
+"""
+
+import hmac
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import Response
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.utils.metrics import CELERY_QUEUE_LENGTH, render_latest
+
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def _get_redis() -> aioredis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(settings.REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return _redis
+
+
+async def _sample_queue_lengths() -> None:
+    """Refresh CELERY_QUEUE_LENGTH from the Redis broker (best effort)."""
+    try:
+        client = _get_redis()
+        for queue in settings.CELERY_QUEUES:
+            CELERY_QUEUE_LENGTH.labels(queue=queue).set(await client.llen(queue))
+    except Exception as e:
+        logger.warning(f"Could not sample Celery queue lengths: {e}")
+
+
+@router.get(
+    "",
+    summary="Prometheus metrics",
+    description="Request, database, Celery, upload and hashing metrics for Prometheus",
+    include_in_schema=False,
+)
+async def metrics(authorization: Optional[str] = Header(None)):
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not authorization or not hmac.compare_digest(authorization, expected):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+            )
+
+    await _sample_queue_lengths()
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
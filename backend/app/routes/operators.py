@@ -8,6 +8,7 @@ from app.database import get_db
 from app.dependencies.roles import require_role, require_admin, get_current_user
 from app.utils.security import hash_password
 from app.models.user import UserRole
+from app.services.cache import TAG_USERS, get_cache
 
 router = APIRouter(prefix="/operators", tags=["Operators"])
 
@@ -129,6 +130,7 @@ async def create_operator(payload: OperatorCreate, db=Depends(get_db)):
         "updated_at": now,
     }
     await db.operators.insert_one(operator_doc)
+    await get_cache().invalidate(TAG_USERS)
 
     out = OperatorOut(
         operator_id=operator_id,
@@ -213,6 +215,7 @@ async def update_operator(operator_id: str, payload: OperatorUpdate, db=Depends(
     # If disabling operator, disable user as well
     if "is_active" in update_data and update_data["is_active"] is False:
         await db.users.update_one({"_id": op["user_id"]}, {"$set": {"is_active": False}})
+    await get_cache().invalidate(TAG_USERS)
 
     updated = await db.operators.find_one({"operator_id": operator_id})
     return _doc_to_operator(updated)
@@ -238,6 +241,7 @@ async def delete_operator(operator_id: str, db=Depends(get_db)):
 
     await db.operators.delete_one({"operator_id": operator_id})
     await db.users.delete_one({"_id": op["user_id"]})
+    await get_cache().invalidate(TAG_USERS)
     return {"message": "Operator deleted"}
 
 
@@ -1,14 +1,19 @@
 # backend/app/routes/reports.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from datetime import datetime, timedelta
 from app.database import get_db
 from app.dependencies.roles import require_role
+from app.services.coalescing import coalesce
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
-@router.get("/dashboard", dependencies=[Depends(require_role(["ADMIN"]))])
-async def dashboard_summary(db=Depends(get_db)):
+@router.get("/dashboard")
+async def dashboard_summary(
+    request: Request,
+    user: dict = Depends(require_role(["ADMIN"])),
+    db=Depends(get_db),
+):
     """
     High-level admin dashboard summary:
      - total farmers
@@ -16,6 +21,10 @@ async def dashboard_summary(db=Depends(get_db)):
      - active users
      - farmers registered this month
     """
+    return await coalesce(request, user, lambda: _dashboard_summary(db))
+
+
+async def _dashboard_summary(db) -> dict:
     total_farmers = await db.farmers.count_documents({})
     total_operators = await db.operators.count_documents({})
     total_users = await db.users.count_documents({})
@@ -34,11 +43,19 @@ async def dashboard_summary(db=Depends(get_db)):
     }
 
 
-@router.get("/farmers-by-region", dependencies=[Depends(require_role(["ADMIN"]))])
-async def farmers_by_region(db=Depends(get_db)):
+@router.get("/farmers-by-region")
+async def farmers_by_region(
+    request: Request,
+    user: dict = Depends(require_role(["ADMIN"])),
+    db=Depends(get_db),
+):
     """
     Aggregate farmer counts by province/district for admin geographic analytics.
     """
+    return await coalesce(request, user, lambda: _farmers_by_region(db))
+
+
+async def _farmers_by_region(db) -> dict:
     pipeline = [
         {
             "$group": {
@@ -63,11 +80,19 @@ async def farmers_by_region(db=Depends(get_db)):
     return {"generated_at": datetime.utcnow(), "regions": formatted}
 
 
-@router.get("/operator-performance", dependencies=[Depends(require_role(["ADMIN"]))])
-async def operator_performance(db=Depends(get_db)):
+@router.get("/operator-performance")
+async def operator_performance(
+    request: Request,
+    user: dict = Depends(require_role(["ADMIN"])),
+    db=Depends(get_db),
+):
     """
     Aggregate stats per operator: total farmers registered, recent registrations (30d).
     """
+    return await coalesce(request, user, lambda: _operator_performance(db))
+
+
+async def _operator_performance(db) -> dict:
     cutoff = datetime.utcnow() - timedelta(days=30)
     pipeline = [
         {
@@ -104,11 +129,19 @@ async def operator_performance(db=Depends(get_db)):
     return {"generated_at": datetime.utcnow(), "operators": out}
 
 
-@router.get("/activity-trends", dependencies=[Depends(require_role(["ADMIN"]))])
-async def activity_trends(db=Depends(get_db)):
+@router.get("/activity-trends")
+async def activity_trends(
+    request: Request,
+    user: dict = Depends(require_role(["ADMIN"])),
+    db=Depends(get_db),
+):
     """
     Daily registration count for past 14 days for charting.
     """
+    return await coalesce(request, user, lambda: _activity_trends(db))
+
+
+async def _activity_trends(db) -> dict:
     days = 14
     start = datetime.utcnow() - timedelta(days=days)
     pipeline = [
@@ -1,16 +1,34 @@
 # backend/app/routes/sync.py
-from fastapi import APIRouter, Depends, HTTPException, Header, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from datetime import datetime
+from app.config import settings
+from app.database import get_db
+from app.dependencies.roles import require_admin, require_operator
+from app.services.duplicate_prefilter import get_duplicate_prefilter
+from app.services.farmer_service import invalidate_farmer_caches, version_filter
+from app.services.idempotency import idempotent
+from app.services.id_lease_service import IdLeaseService
+from app.services.map_rollup import apply_rollup, rollup_ops
+from app.services.sync_jobs import CELERY_STATES, JOB_DONE, SyncJobService
+from app.services.sync_progress import read_progress, stream_progress
+from app.services.task_dispatch import get_task_dispatcher
+from app.services.sync_merge import CONFLICTS_COLLECTION, CONFLICT_OPEN, CONFLICT_RESOLVED, merge_update
 from app.utils.security import decode_token
-from app.tasks.celery_app import celery_app
+from app.utils.serialization import MsgPackRoute, negotiated_response
 from app.tasks.sync_tasks import process_sync_batch
 
-router = APIRouter(prefix="/sync", tags=["Sync"])
+# Field devices may send and receive application/msgpack instead of JSON
+router = APIRouter(prefix="/sync", tags=["Sync"], route_class=MsgPackRoute)
 
 
 class SyncRecord(BaseModel):
     temp_id: Optional[str]
+    farmer_id: Optional[str] = None  # From an ID lease (see /sync/id-leases)
+    base_version: Optional[int] = None  # Version the device edited; fields changed on both sides come back as "conflict"
+    changed_fields: Optional[List[str]] = None  # Dot paths edited on the device; None = all
     nrc_number: Optional[str] = None
     personal_info: dict
     address: dict
@@ -21,6 +39,37 @@ class SyncRequest(BaseModel):
     last_sync: Optional[str] = None
 
 
+class IdLeaseRequest(BaseModel):
+    device_id: str = Field(..., min_length=1, max_length=128)
+    count: int = Field(50, ge=1)
+
+
+class IdLeaseOut(BaseModel):
+    lease_id: str
+    device_id: str
+    farmer_ids: List[str]
+    issued_at: datetime
+    expires_at: datetime
+
+
+class ConflictResolution(BaseModel):
+    accept_fields: List[str] = Field(
+        default_factory=list,
+        description="Conflicting fields to take from the device; the rest keep the server value",
+    )
+    note: Optional[str] = Field(None, max_length=500)
+
+
+def _lease_out(lease: dict) -> IdLeaseOut:
+    return IdLeaseOut(
+        lease_id=lease["_id"],
+        device_id=lease["device_id"],
+        farmer_ids=lease["farmer_ids"],
+        issued_at=lease["issued_at"],
+        expires_at=lease["expires_at"],
+    )
+
+
 async def get_current_user(authorization: Optional[str] = Header(None)):
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing token")
@@ -32,18 +81,237 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
-@router.post("/batch")
-async def sync_batch(payload: SyncRequest, current_user=Depends(get_current_user)):
+async def queue_sync_batch(db, user_email: str, payload: SyncRequest) -> str:
+    """
+    Store a batch in sync_jobs and queue it; only the job id goes through Celery.
+
+    Also used by resumable uploads (routes/uploads.py) once a batch is complete.
+
+    Returns:
+        str: Sync job id
+
+    Raises:
+        HTTPException: 503 if the task queue is unavailable (the job is marked failed
+            and a late delivery is skipped by the worker)
+    """
     farmers_payload = [f.dict() for f in payload.farmers]
-    task = process_sync_batch.apply_async(args=[current_user, farmers_payload])
-    return {"job_id": task.id, "status": "queued"}
+    service = SyncJobService(db)
+    job_id = await service.create_job(user_email, farmers_payload)
+    try:
+        await get_task_dispatcher().dispatch(process_sync_batch, args=[job_id], task_id=job_id)
+    except HTTPException:
+        if await service.mark_failed(job_id, "Could not be queued"):
+            raise
+        # A slow enqueue went through after the timeout and a worker has the job
+    return job_id
+
+
+@router.post("/batch")
+async def sync_batch(
+    payload: SyncRequest,
+    request: Request,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    Queue a sync batch.
+
+    Accepts JSON or MessagePack, optionally gzip/zstd compressed. Batches
+    too large for one request on a poor link can go through a resumable
+    upload session instead (POST /uploads/sessions, kind "sync_batch").
+    Retries carrying the same Idempotency-Key get the first job id back
+    instead of queueing the batch again.
+    """
+    async def queue():
+        job_id = await queue_sync_batch(db, current_user, payload)
+        return negotiated_response(request, {"job_id": job_id, "status": "queued"})
+
+    return await idempotent(request, db, current_user, queue)
 
 
 @router.get("/status")
-async def sync_status(job_id: str = Query(...), current_user=Depends(get_current_user)):
-    async_result = celery_app.AsyncResult(job_id)
-    state = async_result.state
-    result = None
-    if async_result.ready():
-        result = async_result.result
-    return {"job_id": job_id, "state": state, "result": result}
+async def sync_status(
+    request: Request,
+    job_id: str = Query(...),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    result_status: Optional[str] = Query(None, alias="status", description="Only results with this status"),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    State of a sync job and one page of its per-record results, or live
+    progress while it runs (see /sync/jobs/{job_id}/events to stream it).
+    Ids of other Celery tasks (e.g. duplicate scans) are looked up in the
+    Celery result backend.
+    """
+    service = SyncJobService(db)
+    job = await service.get_job(job_id)
+    if job is None:
+        state, result = await get_task_dispatcher().status(job_id)
+        return negotiated_response(request, {"job_id": job_id, "state": state, "result": result})
+    if job["submitted_by"] != current_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sync job not found")
+
+    result, progress = None, None
+    if job["status"] != JOB_DONE:
+        progress = await read_progress(job_id)
+    else:
+        total, results = await service.list_results(job_id, skip, limit, result_status)
+        result = {
+            "job_id": job_id,
+            "summary": job.get("summary", {}),
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "results": results,
+        }
+    return negotiated_response(request, {
+        "job_id": job_id,
+        "state": CELERY_STATES[job["status"]],
+        "status": job["status"],
+        "record_count": job["record_count"],
+        "error": job.get("error"),
+        "progress": progress,
+        "result": result,
+    })
+
+
+def _job_snapshot(job: dict) -> dict:
+    """Progress snapshot built from a job document."""
+    summary = job.get("summary") or {}
+    return {
+        "job_id": job["_id"],
+        "state": job["status"],
+        "total": job["record_count"],
+        "done": sum(summary.values()),
+        **summary,
+    }
+
+
+@router.get("/jobs/{job_id}/events", summary="Stream sync job progress (Server-Sent Events)")
+async def sync_job_events(job_id: str, current_user=Depends(get_current_user), db=Depends(get_db)):
+    """
+    `progress` events with record counts by status (created, updated,
+    merged, conflict, error, ...) as the job runs, then one `done` event.
+    Fetch the per-record results from /sync/status afterwards.
+    """
+    service = SyncJobService(db)
+    job = await service.get_job(job_id)
+    if job is None or job["submitted_by"] != current_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sync job not found")
+
+    async def from_job() -> dict:
+        return _job_snapshot(await service.get_job(job_id) or job)
+
+    return StreamingResponse(
+        stream_progress(job_id, from_job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/id-leases", response_model=IdLeaseOut, status_code=status.HTTP_201_CREATED)
+async def lease_farmer_ids(
+    payload: IdLeaseRequest,
+    user: dict = Depends(require_operator),
+    db=Depends(get_db),
+):
+    """
+    Lease a block of real farmer IDs to a field device for offline registration.
+    Records synced with a leased farmer_id are upserted directly under that ID.
+    """
+    if payload.count > settings.ID_LEASE_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ID_LEASE_MAX_SIZE} IDs can be leased at once",
+        )
+    lease = await IdLeaseService(db).issue_lease(user["email"], payload.device_id, payload.count)
+    return _lease_out(lease)
+
+
+@router.get("/id-leases", response_model=List[IdLeaseOut])
+async def list_farmer_id_leases(user: dict = Depends(require_operator), db=Depends(get_db)):
+    """List the current user's unexpired ID leases."""
+    leases = await IdLeaseService(db).list_active_leases(user["email"])
+    return [_lease_out(lease) for lease in leases]
+
+
+@router.get("/conflicts", summary="List sync merge conflicts")
+async def list_sync_conflicts(
+    status_filter: str = Query(CONFLICT_OPEN, alias="status"),
+    farmer_id: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    user: dict = Depends(require_admin),
+    db=Depends(get_db),
+):
+    """Fields changed both on a device and on the server, newest first."""
+    query = {"status": status_filter}
+    if farmer_id:
+        query["farmer_id"] = farmer_id
+    total = await db[CONFLICTS_COLLECTION].count_documents(query)
+    conflicts = await (
+        db[CONFLICTS_COLLECTION].find(query)
+        .sort("created_at", -1)
+        .skip(skip)
+        .limit(limit)
+        .to_list(length=limit)
+    )
+    return {"total": total, "skip": skip, "limit": limit, "results": conflicts}
+
+
+@router.patch("/conflicts/{conflict_id}", summary="Resolve a sync merge conflict")
+async def resolve_sync_conflict(
+    conflict_id: str,
+    resolution: ConflictResolution,
+    user: dict = Depends(require_admin),
+    db=Depends(get_db),
+):
+    """
+    Apply the device's values for `accept_fields` and close the conflict.
+    Fields not accepted keep the value the server already has.
+    """
+    conflict = await db[CONFLICTS_COLLECTION].find_one({"_id": conflict_id, "status": CONFLICT_OPEN})
+    if not conflict:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Open conflict not found")
+
+    submitted = {entry["field"]: entry["submitted"] for entry in conflict["conflicts"]}
+    unknown = sorted(set(resolution.accept_fields) - set(submitted))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not conflicting fields of this record: {', '.join(unknown)}",
+        )
+
+    now = datetime.utcnow()
+    accepted = {path: submitted[path] for path in resolution.accept_fields}
+    if accepted:
+        farmer = await db.farmers.find_one({"farmer_id": conflict["farmer_id"]})
+        if not farmer:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Farmer not found")
+        update, merged = merge_update(farmer, accepted, user["email"], now)
+        result = await db.farmers.update_one(
+            {"_id": farmer["_id"], **version_filter(farmer.get("version", 0))},
+            update,
+        )
+        if result.matched_count == 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Farmer was modified while resolving, try again",
+            )
+        await get_duplicate_prefilter().add_farmer(merged)
+        await apply_rollup(db, rollup_ops(farmer.get("location"), merged.get("location")))
+        await invalidate_farmer_caches(conflict["farmer_id"])
+
+    await db[CONFLICTS_COLLECTION].update_one(
+        {"_id": conflict_id},
+        {"$set": {
+            "status": CONFLICT_RESOLVED,
+            "accepted_fields": sorted(accepted),
+            "review_note": resolution.note,
+            "reviewed_by": user.get("email"),
+            "reviewed_at": now,
+        }},
+    )
+    return {"conflict_id": conflict_id, "status": CONFLICT_RESOLVED, "accepted_fields": sorted(accepted)}
@@ -1,9 +1,31 @@
 # backend/app/routes/uploads.py
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pymongo import UpdateOne
+from starlette.datastructures import UploadFile as FormFile
 from pathlib import Path
+from datetime import datetime
+from pydantic import BaseModel, Field, ValidationError
+from app.config import settings
 from app.database import get_db
 from app.dependencies.roles import require_role, require_operator
-from typing import Optional
+from app.middleware.request_decoding import BodyTooLarge, decode_body
+from app.routes.sync import SyncRequest, queue_sync_batch
+from app.services.farmer_service import invalidate_farmer_caches
+from app.services.upload_sessions import (
+    KIND_DOCUMENT,
+    KIND_PHOTO,
+    KIND_SYNC_BATCH,
+    SESSION_COMPLETE,
+    UploadSessionService,
+    offset_conflict,
+)
+from app.utils.metrics import record_upload
+from app.utils.serialization import MSGPACK_MEDIA_TYPES, loads, unpackb
+from collections import Counter
+from typing import Dict, List, Literal, Optional
+import asyncio
+import re
 import shutil
 
 router = APIRouter(prefix="/uploads", tags=["Uploads"])
@@ -15,11 +37,45 @@ ALLOWED_PHOTO_TYPES = {"image/jpeg", "image/png"}
 ALLOWED_DOC_TYPES = {"image/jpeg", "image/png", "application/pdf"}
 
 
-async def save_file(file: UploadFile, dest: Path):
-    """Save an upload to local filesystem."""
+def copy_file(file: UploadFile, dest: Path) -> int:
+    """Blocking copy of an upload to local filesystem; returns the bytes written."""
     dest.parent.mkdir(parents=True, exist_ok=True)
     with dest.open("wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
+        return buffer.tell()
+
+
+async def save_file(file: UploadFile, dest: Path) -> int:
+    """Save an upload to local filesystem and return the bytes written."""
+    return copy_file(file, dest)
+
+
+def write_file(dest: Path, data: bytes) -> None:
+    """Write an already assembled upload to local filesystem."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_bytes(data)
+
+
+def photo_destination(farmer_id: str, filename: Optional[str]) -> tuple:
+    """Disk location and stored path of a farmer's photo."""
+    name = f"{farmer_id}_photo{Path(filename or '').suffix}"
+    return UPLOAD_ROOT / "photos" / farmer_id / name, f"/uploads/photos/{farmer_id}/{name}"
+
+
+def document_destination(farmer_id: str, document_type: str, filename: Optional[str]) -> tuple:
+    """Disk location and stored path of a farmer's document."""
+    name = f"{farmer_id}_{document_type}{Path(filename or '').suffix}"
+    return UPLOAD_ROOT / "documents" / farmer_id / name, f"/uploads/documents/{farmer_id}/{name}"
+
+
+async def attach_file(db, farmer_id: str, key: str, path: str) -> None:
+    """Point documents.<key> of a farmer at a stored file."""
+    await db.farmers.update_one(
+        {"farmer_id": farmer_id},
+        {"$set": {f"documents.{key}": path, "updated_at": datetime.utcnow()},
+         "$inc": {"version": 1}}
+    )
+    await invalidate_farmer_caches(farmer_id)
 
 
 def validate_file_upload(file: UploadFile, allowed_types: set, max_size_mb: int):
@@ -41,12 +97,9 @@ async def upload_photo(
     db=Depends(get_db)
 ):
     validate_file_upload(file, ALLOWED_PHOTO_TYPES, MAX_FILE_SIZE_MB)
-    filename = f"{farmer_id}_photo{Path(file.filename).suffix}"
-    dest = UPLOAD_ROOT / "photos" / farmer_id / filename
-    await save_file(file, dest)
-    path = f"/uploads/photos/{farmer_id}/{filename}"
-    await db.farmers.update_one({"farmer_id": farmer_id},
-                                {"$set": {"documents.photo": path}})
+    dest, path = photo_destination(farmer_id, file.filename)
+    record_upload("photo", await save_file(file, dest))
+    await attach_file(db, farmer_id, "photo", path)
     return {"message": "Photo uploaded", "photo_path": path}
 
 
@@ -63,12 +116,295 @@ async def upload_document(
     db=Depends(get_db)
 ):
     validate_file_upload(file, ALLOWED_DOC_TYPES, MAX_FILE_SIZE_MB)
-    filename = f"{farmer_id}_{document_type}{Path(file.filename).suffix}"
-    dest = UPLOAD_ROOT / "documents" / farmer_id / filename
-    await save_file(file, dest)
-    path = f"/uploads/documents/{farmer_id}/{filename}"
-    await db.farmers.update_one(
-        {"farmer_id": farmer_id},
-        {"$set": {f"documents.{document_type}": path}}
-    )
+    dest, path = document_destination(farmer_id, document_type, file.filename)
+    record_upload("document", await save_file(file, dest))
+    await attach_file(db, farmer_id, document_type, path)
     return {"message": f"{document_type} uploaded", "file_path": path}
+
+
+# =======================================================
+# Batch upload (many files, many farmers)
+# =======================================================
+# Part names are "<slot>:<farmer_id>", e.g. "photo:ZMB00000012" or "nrc:ZMB00000012"
+BATCH_PART_NAME = re.compile(r"^([a-z][a-z0-9_]{0,31}):([A-Za-z0-9_-]{1,64})$")
+
+
+@router.post(
+    "/batch",
+    summary="Upload many photos/documents at once",
+    description=(
+        "multipart/form-data with one part per file, named '<slot>:<farmer_id>' where slot is "
+        "'photo' or a document type. Farmer document paths are updated with one bulk write; "
+        "the response has a result per part."
+    )
+)
+async def upload_batch(
+    request: Request,
+    user: dict = Depends(require_operator),
+    db=Depends(get_db)
+):
+    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
+    # Starlette spools each part to a temporary file while parsing
+    form = await request.form(max_files=settings.UPLOAD_BATCH_MAX_FILES, max_fields=settings.UPLOAD_BATCH_MAX_FILES)
+    try:
+        results: List[dict] = []
+        accepted: List[tuple] = []  # (result, file, slot, farmer_id)
+        seen = set()
+        for field, value in form.multi_items():
+            result = {"field": field, "status": "rejected"}
+            results.append(result)
+            if not isinstance(value, FormFile):
+                result["error"] = "Not a file"
+                continue
+            match = BATCH_PART_NAME.match(field)
+            if not match:
+                result["error"] = "Part name must be '<slot>:<farmer_id>'"
+                continue
+            slot, farmer_id = match.groups()
+            result.update(farmer_id=farmer_id, slot=slot)
+            allowed_types = ALLOWED_PHOTO_TYPES if slot == "photo" else ALLOWED_DOC_TYPES
+            if value.content_type not in allowed_types:
+                result["error"] = "Invalid file type"
+            elif value.size is not None and value.size > max_bytes:
+                result["error"] = f"File exceeds the {MAX_FILE_SIZE_MB} MB limit"
+            elif (slot, farmer_id) in seen:
+                result["error"] = "Duplicate part for this farmer and slot"
+            else:
+                seen.add((slot, farmer_id))
+                accepted.append((result, value, slot, farmer_id))
+
+        farmer_ids = {farmer_id for _, _, _, farmer_id in accepted}
+        existing = {
+            doc["farmer_id"]
+            async for doc in db.farmers.find({"farmer_id": {"$in": list(farmer_ids)}}, {"farmer_id": 1})
+        } if farmer_ids else set()
+
+        updates: Dict[str, dict] = {}
+        for result, file, slot, farmer_id in accepted:
+            if farmer_id not in existing:
+                result.update(status="not_found", error="Farmer not found")
+                continue
+            if slot == "photo":
+                dest, path = photo_destination(farmer_id, file.filename)
+            else:
+                dest, path = document_destination(farmer_id, slot, file.filename)
+            try:
+                size = await asyncio.to_thread(copy_file, file, dest)
+            except OSError as e:
+                result["error"] = f"Could not store file: {e}"
+                continue
+            record_upload("photo" if slot == "photo" else "document", size)
+            updates.setdefault(farmer_id, {})[f"documents.{slot}"] = path
+            result.update(status="stored", path=path, bytes=size)
+    finally:
+        await form.close()
+
+    if updates:
+        now = datetime.utcnow()
+        await db.farmers.bulk_write(
+            [
+                UpdateOne({"farmer_id": farmer_id}, {"$set": {**paths, "updated_at": now}, "$inc": {"version": 1}})
+                for farmer_id, paths in updates.items()
+            ],
+            ordered=False,
+        )
+        await invalidate_farmer_caches(*updates)
+
+    return {
+        "summary": dict(Counter(result["status"] for result in results)),
+        "results": results,
+    }
+
+
+# =======================================================
+# Resumable uploads (services/upload_sessions.py)
+# =======================================================
+class UploadSessionCreate(BaseModel):
+    kind: Literal["sync_batch", "photo", "document"]
+    length: int = Field(..., ge=1, description="Total size of the upload in bytes")
+    farmer_id: Optional[str] = None  # photo / document
+    document_type: Optional[str] = Field(None, pattern=r"^[a-z][a-z0-9_]{0,31}$")  # document
+    filename: Optional[str] = Field(None, max_length=255)
+    content_type: Optional[str] = None  # sync_batch: application/json (default) or application/msgpack
+    content_encoding: Optional[Literal["gzip", "zstd"]] = None  # sync_batch sent compressed
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+def _session_out(session: dict) -> dict:
+    return {
+        "upload_id": session["_id"],
+        "kind": session["kind"],
+        "length": session["length"],
+        "offset": session["offset"],
+        "status": session["status"],
+        "chunk_size": settings.UPLOAD_CHUNK_MAX_MB * 1024 * 1024,
+        "expires_at": session["expires_at"],
+        "result": session.get("result"),
+    }
+
+
+def _offset_headers(session: dict) -> dict:
+    return {"Upload-Offset": str(session["offset"]), "Cache-Control": "no-store"}
+
+
+@router.post(
+    "/sessions",
+    status_code=status.HTTP_201_CREATED,
+    summary="Start a resumable upload",
+    description="Declare a sync batch, photo or document upload; send it with PATCH in chunks, then finalize"
+)
+async def create_upload_session(
+    body: UploadSessionCreate,
+    response: Response,
+    user: dict = Depends(require_operator),
+    db=Depends(get_db)
+):
+    if body.kind == KIND_SYNC_BATCH:
+        max_mb = settings.REQUEST_MAX_DECOMPRESSED_MB
+        if body.content_type not in (None, "application/json", *MSGPACK_MEDIA_TYPES):
+            raise HTTPException(status_code=415, detail="Sync batches must be application/json or application/msgpack")
+    else:
+        max_mb = MAX_FILE_SIZE_MB
+        allowed_types = ALLOWED_PHOTO_TYPES if body.kind == KIND_PHOTO else ALLOWED_DOC_TYPES
+        if body.content_type not in allowed_types:
+            raise HTTPException(status_code=400, detail="Invalid file type")
+        if not body.farmer_id or (body.kind == KIND_DOCUMENT and not body.document_type):
+            raise HTTPException(status_code=400, detail="farmer_id (and document_type for documents) is required")
+        if not await db.farmers.find_one({"farmer_id": body.farmer_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Farmer not found")
+    if body.length > max_mb * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the {max_mb} MB limit")
+
+    session = await UploadSessionService(db).create(user["email"], **body.model_dump())
+    response.headers.update(_offset_headers(session))
+    response.headers["Location"] = f"/api/uploads/sessions/{session['_id']}"
+    return _session_out(session)
+
+
+@router.api_route(
+    "/sessions/{upload_id}",
+    methods=["GET", "HEAD"],
+    summary="Resumable upload state",
+    description="Upload-Offset header (and body) give the byte offset to resume from"
+)
+async def get_upload_session(
+    upload_id: str,
+    response: Response,
+    user: dict = Depends(require_operator),
+    db=Depends(get_db)
+):
+    session = await UploadSessionService(db).get(upload_id, user["email"])
+    response.headers.update(_offset_headers(session))
+    return _session_out(session)
+
+
+@router.patch(
+    "/sessions/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Upload a chunk",
+    description="Raw bytes starting at Upload-Offset; a mismatched offset gets 409 with the current one"
+)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    user: dict = Depends(require_operator),
+    db=Depends(get_db)
+):
+    service = UploadSessionService(db)
+    session = await service.get(upload_id, user["email"])
+
+    limit = settings.UPLOAD_CHUNK_MAX_MB * 1024 * 1024
+    parts, size = [], 0
+    async for part in request.stream():
+        size += len(part)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"Chunks are limited to {settings.UPLOAD_CHUNK_MAX_MB} MB")
+        parts.append(part)
+
+    session = await service.append(session, upload_offset, b"".join(parts))
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_offset_headers(session))
+
+
+def _parse_sync_batch(session: dict, body: bytes) -> SyncRequest:
+    if session.get("content_encoding"):
+        try:
+            body = decode_body(session["content_encoding"], body, settings.REQUEST_MAX_DECOMPRESSED_MB * 1024 * 1024)
+        except BodyTooLarge:
+            raise HTTPException(status_code=413, detail="Decompressed sync batch too large")
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Upload is not valid {session['content_encoding']}")
+    try:
+        data = unpackb(body) if session.get("content_type") in MSGPACK_MEDIA_TYPES else loads(body)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not parse the uploaded sync batch")
+    try:
+        return SyncRequest.model_validate(data)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+
+@router.post(
+    "/sessions/{upload_id}/finalize",
+    summary="Finish a resumable upload",
+    description="Queues the sync batch or stores the photo/document; repeat calls return the same result"
+)
+async def finalize_upload_session(
+    upload_id: str,
+    user: dict = Depends(require_operator),
+    db=Depends(get_db)
+):
+    service = UploadSessionService(db)
+    session = await service.get(upload_id, user["email"])
+    if session["status"] == SESSION_COMPLETE:
+        return session["result"]
+
+    body, claim = await service.begin_finalize(session)
+    # Keeps another finalize from taking over while this one is still working
+    holder = asyncio.create_task(service.hold_finalize(session, claim))
+    try:
+        if session["kind"] == KIND_SYNC_BATCH:
+            # Decompressing, parsing and validating a large batch is CPU-bound
+            batch = await asyncio.to_thread(_parse_sync_batch, session, body)
+            job_id = await queue_sync_batch(db, session["owner"], batch)
+            result = {"upload_id": upload_id, "job_id": job_id, "status": "queued"}
+        elif session["kind"] == KIND_PHOTO:
+            dest, path = photo_destination(session["farmer_id"], session["filename"])
+            await asyncio.to_thread(write_file, dest, body)
+            await attach_file(db, session["farmer_id"], "photo", path)
+            result = {"upload_id": upload_id, "message": "Photo uploaded", "photo_path": path}
+        else:
+            dest, path = document_destination(session["farmer_id"], session["document_type"], session["filename"])
+            await asyncio.to_thread(write_file, dest, body)
+            await attach_file(db, session["farmer_id"], session["document_type"], path)
+            result = {"upload_id": upload_id, "message": f"{session['document_type']} uploaded", "file_path": path}
+    except Exception:
+        # Leave the session open so the client can fix the cause and finalize again
+        await service.reopen(session, claim)
+        raise
+    finally:
+        holder.cancel()
+
+    if not await service.complete(session, claim, result):
+        # The lease ran out and another finalize took over; its result stands
+        current = await service.get(upload_id, user["email"])
+        if current["status"] == SESSION_COMPLETE:
+            return current["result"]
+        raise offset_conflict(current, "Upload session is already being finalized")
+    record_upload(session["kind"], len(body))
+    return result
+
+
+@router.delete(
+    "/sessions/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Abort a resumable upload"
+)
+async def delete_upload_session(
+    upload_id: str,
+    user: dict = Depends(require_operator),
+    db=Depends(get_db)
+):
+    service = UploadSessionService(db)
+    await service.abort(await service.get(upload_id, user["email"]))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from app.database import get_db
 from app.dependencies.roles import require_admin
 from app.models.user import UserCreate, UserOut, UserRole
+from app.services.cache import TAG_USERS, get_cache
 from app.utils.security import hash_password
 from typing import Optional, List
 from datetime import datetime, timezone
@@ -60,6 +61,7 @@ async def create_user(
         "updated_at": now
     }
     result = await db.users.insert_one(new_user_doc)
+    await get_cache().invalidate(TAG_USERS)
     new_user = await db.users.find_one({"_id": result.inserted_id})
     return UserOut.from_mongo(new_user)
 
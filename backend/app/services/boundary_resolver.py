@@ -0,0 +1,232 @@
+# backend/app/services/boundary_resolver.py
+"""
+GPS -> administrative area resolution against local boundary polygons.
+
+Province, district and chiefdom polygons are loaded once per process from
+GeoJSON FeatureCollections in BOUNDARIES_DIR:
+
+    provinces.geojson   districts.geojson   chiefdoms.geojson
+
+Each feature needs `code` and `name` properties matching the codes seeded
+into the geo collections (e.g. "LP", "LP05", "LP05-002"). Every level gets
+its own STR-tree, and a whole batch of points is resolved with one
+vectorized query per level, so sync batches check thousands of points
+per second.
+
+Addresses are then validated against the point (ADDRESS_BOUNDARY_CHECK):
+- "off":     nothing is checked
+- "warn":    missing codes are filled in, mismatches are only logged
+- "enforce": missing codes are filled in, mismatches reject the record
+
+Points within BOUNDARY_TOLERANCE_METERS of the claimed area are accepted,
+absorbing GPS error next to a border. Levels without a boundary file, and
+points no polygon of a level covers, are not checked. Shapely is optional:
+without it (or without boundary files) the resolver is disabled.
+"""
+
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+try:
+    import numpy as np
+    import shapely
+    from shapely.geometry import shape
+    from shapely.strtree import STRtree
+except ImportError:  # pragma: no cover - optional dependency
+    shapely = None
+
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ("province", "district", "chiefdom")
+
+# Address codes that carry no real claim and may be overwritten
+PLACEHOLDER_CODES = {"", "LEGACY"}
+
+# Good enough for tolerances of a few hundred metres at Zambian latitudes
+METERS_PER_DEGREE = 111_320.0
+
+
+class _Layer:
+    """Polygons of one administrative level with their STR-tree."""
+
+    def __init__(self, codes: List[str], names: List[str], geometries: List[Any]) -> None:
+        self.codes = codes
+        self.names = names
+        self.geometries = geometries
+        self.tree = STRtree(geometries)
+        self.index_by_code = {code: i for i, code in enumerate(codes)}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def _load_layer(path: str) -> Optional[_Layer]:
+    with open(path, "r", encoding="utf-8") as f:
+        collection = json.load(f)
+
+    codes, names, geometries = [], [], []
+    for feature in collection.get("features", []):
+        props = feature.get("properties") or {}
+        code = props.get("code")
+        if not code or not feature.get("geometry"):
+            continue
+        geometry = shape(feature["geometry"])
+        if not geometry.is_valid:
+            geometry = shapely.make_valid(geometry)
+        codes.append(str(code))
+        names.append(props.get("name") or "")
+        geometries.append(geometry)
+
+    return _Layer(codes, names, geometries) if codes else None
+
+
+class BoundaryResolver:
+    """Resolves GPS points to province / district / chiefdom codes."""
+
+    def __init__(self, layers: Dict[str, _Layer]) -> None:
+        self.layers = layers
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.layers)
+
+    @classmethod
+    def from_directory(cls, directory: str) -> "BoundaryResolver":
+        """
+        Load whichever level files exist in `directory`.
+
+        Returns:
+            BoundaryResolver: Disabled (no layers) if shapely or the files are missing
+        """
+        if shapely is None:
+            logger.info("Boundary checks disabled: shapely is not installed")
+            return cls({})
+
+        layers = {}
+        for level in LEVELS:
+            path = os.path.join(directory, f"{level}s.geojson")
+            if not os.path.exists(path):
+                continue
+            try:
+                layer = _load_layer(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ Could not load {path}: {e}")
+                continue
+            if layer:
+                layers[level] = layer
+                logger.info(f"✅ Loaded {len(layer)} {level} boundaries")
+
+        if not layers:
+            logger.info(f"Boundary checks disabled: no boundary files in {directory}")
+        return cls(layers)
+
+    def resolve_many(
+        self,
+        points: Sequence[Tuple[float, float]],
+    ) -> List[Dict[str, Optional[Tuple[str, str]]]]:
+        """
+        Resolve a batch of points.
+
+        Args:
+            points: (latitude, longitude) pairs
+
+        Returns:
+            List[dict]: Per point, {level: (code, name) or None} for every loaded level
+        """
+        results: List[Dict[str, Optional[Tuple[str, str]]]] = [{} for _ in points]
+        if not points or not self.layers:
+            return results
+
+        coords = np.asarray(points, dtype=float)
+        geoms = shapely.points(coords[:, 1], coords[:, 0])
+        for level, layer in self.layers.items():
+            point_idx, polygon_idx = layer.tree.query(geoms, predicate="intersects")
+            # A point on a shared border hits two polygons; keep the first
+            hits = np.full(len(points), -1)
+            hits[point_idx[::-1]] = polygon_idx[::-1]
+            for i, hit in enumerate(hits.tolist()):
+                results[i][level] = (layer.codes[hit], layer.names[hit]) if hit >= 0 else None
+        return results
+
+    def resolve(self, latitude: float, longitude: float) -> Dict[str, Optional[Tuple[str, str]]]:
+        """Resolve a single point; see resolve_many."""
+        return self.resolve_many([(latitude, longitude)])[0]
+
+    def is_near(self, level: str, code: str, latitude: float, longitude: float, meters: float) -> bool:
+        """True if the point is within `meters` of the area `code` at `level`."""
+        layer = self.layers.get(level)
+        index = layer.index_by_code.get(code) if layer else None
+        if index is None:
+            return False
+        point = shapely.Point(longitude, latitude)
+        return shapely.distance(layer.geometries[index], point) * METERS_PER_DEGREE <= meters
+
+
+@lru_cache()
+def get_boundary_resolver() -> BoundaryResolver:
+    """Return the process-wide resolver, loading boundaries on first use."""
+    return BoundaryResolver.from_directory(settings.BOUNDARIES_DIR)
+
+
+def _gps_point(address: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+    if not address:
+        return None
+    try:
+        lat, lon = float(address["gps_latitude"]), float(address["gps_longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return lat, lon
+
+
+def check_address_boundaries(
+    addresses: Sequence[Optional[Dict[str, Any]]],
+    mode: Optional[str] = None,
+) -> List[List[str]]:
+    """
+    Validate (and auto-fill, in place) addresses against their GPS points.
+
+    Args:
+        addresses: Address sub-documents; None or GPS-less entries are skipped
+        mode: Overrides settings.ADDRESS_BOUNDARY_CHECK
+
+    Returns:
+        List[List[str]]: Errors per address (always empty unless mode is "enforce")
+    """
+    mode = mode or settings.ADDRESS_BOUNDARY_CHECK
+    errors: List[List[str]] = [[] for _ in addresses]
+    if mode == "off":
+        return errors
+    resolver = get_boundary_resolver()
+    if not resolver.enabled:
+        return errors
+
+    located = [(i, point) for i, point in enumerate(map(_gps_point, addresses)) if point]
+    resolved = resolver.resolve_many([point for _, point in located])
+
+    for (i, (lat, lon)), areas in zip(located, resolved):
+        address = addresses[i]
+        for level, hit in areas.items():
+            if hit is None:
+                continue
+            code, name = hit
+            code_key, name_key = f"{level}_code", f"{level}_name"
+            claimed = address.get(code_key) or ""
+            if claimed in PLACEHOLDER_CODES:
+                address[code_key] = code
+                if name:
+                    address[name_key] = name
+                continue
+            if claimed == code or resolver.is_near(level, claimed, lat, lon, settings.BOUNDARY_TOLERANCE_METERS):
+                continue
+            message = f"GPS point lies in {level} {code} ({name}), not {claimed}"
+            if mode == "enforce":
+                errors[i].append(message)
+            else:
+                logger.warning(f"Address boundary mismatch: {message}")
+    return errors
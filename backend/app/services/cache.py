@@ -0,0 +1,490 @@
+# backend/app/services/cache.py
+"""
+Two-tier read cache shared by every API and Celery process.
+
+- L1: per-process LRU of decoded values (no network hop)
+- L2: Redis (REDIS_URL), shared by all uvicorn and Celery workers
+
+Invalidation is tag based. Each namespace lists the data it is derived
+from (TAG_FARMERS, TAG_USERS, TAG_GEO). Writers call `invalidate(tag)`,
+which bumps a version counter in Redis and publishes it on a pub/sub
+channel; every API process listens and from then on rejects entries
+stored under an older version, in L1 and L2 alike. Celery workers, which
+write but do not serve, use `invalidate_sync`. If the listener loses its
+connection it drops L1 on reconnect, so a missed message cannot keep a
+stale entry alive.
+
+Single records (e.g. one farmer's detail) are dropped by key instead with
+`invalidate_keys`, which bumps the key's generation in Redis, deletes the
+L2 entry and tells every process to forget its L1 copy. A load stores its
+result only if the generation it read before loading is unchanged
+(WATCH/MULTI), so a load racing with the invalidation - in this process
+or another - is served once and not stored.
+
+Reads go through `get_or_load`:
+- fresh entry       -> returned
+- stale entry       -> returned, refreshed in the background
+                       (stale-while-revalidate, within stale_ttl)
+- miss/invalidated  -> loaded once; concurrent callers in this process
+                       await the same load, and other processes wait for
+                       the Redis lock holder's result (single-flight)
+
+Values must be JSON-serializable (Mongo types allowed). They come back
+JSON-decoded - ObjectIds and datetimes as strings - whichever tier
+answers, and are shared between callers, so treat them as read-only.
+When Redis is down the cache degrades to L1 only.
+
+Usage:
+    DASHBOARD_CACHE = CacheNamespace("dashboard", ttl=30, stale_ttl=120, tags=(TAG_FARMERS,))
+
+    stats = await get_cache().get_or_load(DASHBOARD_CACHE, "all", compute_stats)
+    ...
+    await get_cache().invalidate(TAG_FARMERS)
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.utils.metrics import CACHE_REQUESTS
+from app.utils.serialization import dumps, loads
+
+
+logger = logging.getLogger(__name__)
+
+TAG_FARMERS = "farmers"
+TAG_USERS = "users"
+TAG_GEO = "geo"
+
+KEY_PREFIX = "cache"
+CHANNEL = f"{KEY_PREFIX}:invalidate"
+
+# How long a process waits for another process's load before doing it itself
+LOCK_TIMEOUT_SECONDS = 10.0
+LOCK_POLL_SECONDS = 0.05
+# Key generations only need to outlive the loads that read them
+GENERATION_TTL_SECONDS = 24 * 3600
+
+
+@dataclass(frozen=True)
+class CacheNamespace:
+    """
+    A family of cached values.
+
+    Attributes:
+        name: Key prefix, unique per namespace
+        ttl: Seconds an entry is fresh
+        stale_ttl: Further seconds a stale entry may be served while it is refreshed
+        tags: Data the values are derived from; invalidating a tag drops them
+    """
+    name: str
+    ttl: float
+    stale_ttl: float = 0.0
+    tags: Tuple[str, ...] = ()
+
+
+@dataclass
+class _Entry:
+    value: Any
+    versions: Dict[str, int]
+    fresh_until: float
+    stale_until: float
+
+    def to_bytes(self) -> bytes:
+        return dumps({"v": self.value, "t": self.versions, "f": self.fresh_until, "s": self.stale_until})
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "_Entry":
+        raw = loads(data)
+        return cls(raw["v"], raw["t"], raw["f"], raw["s"])
+
+
+def _full_keys(namespace: CacheNamespace, keys: Iterable[str]) -> List[str]:
+    return [f"{namespace.name}:{key}" for key in keys]
+
+
+def _version_key(tag: str) -> str:
+    return f"{KEY_PREFIX}:version:{tag}"
+
+
+def _entry_key(full_key: str) -> str:
+    return f"{KEY_PREFIX}:entry:{full_key}"
+
+
+def _lock_key(full_key: str) -> str:
+    return f"{KEY_PREFIX}:lock:{full_key}"
+
+
+def _generation_key(full_key: str) -> str:
+    return f"{KEY_PREFIX}:generation:{full_key}"
+
+
+class TieredCache:
+    """L1 LRU + Redis L2 cache for the API process."""
+
+    def __init__(self, redis_url: str, max_entries: int) -> None:
+        self.redis_url = redis_url
+        self.redis = aioredis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+        self.max_entries = max_entries
+        self._l1: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # In-flight loads whose key was invalidated meanwhile
+        self._dirty: Set[str] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    # ----------------------------------------
+    # Lifecycle
+    # ----------------------------------------
+    def start(self) -> None:
+        """Start listening for invalidations (call once from the lifespan)."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        for task in list(self._inflight.values()):
+            task.cancel()
+
+    async def _listen(self) -> None:
+        while True:
+            # Pub/sub connections idle for long periods; no read timeout here
+            client = aioredis.from_url(self.redis_url, socket_connect_timeout=1, health_check_interval=30)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    # Anything published while disconnected was missed
+                    self._reset_local()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        self._apply_message(loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener disconnected: {e}")
+                self._reset_local()
+                await asyncio.sleep(5)
+            finally:
+                await client.aclose()
+
+    def _reset_local(self) -> None:
+        self._l1.clear()
+        self._versions.clear()
+
+    def _apply_message(self, message: Dict[str, Any]) -> None:
+        for tag, version in message.get("tags", {}).items():
+            self._apply_version(tag, int(version))
+        for full_key in message.get("keys", []):
+            self._drop_local(full_key)
+
+    def _drop_local(self, full_key: str) -> None:
+        self._l1.pop(full_key, None)
+        if full_key in self._inflight:
+            self._dirty.add(full_key)
+
+    def _apply_version(self, tag: str, version: int) -> None:
+        # L1 entries carry their versions and are rejected lazily on read
+        if version > self._versions.get(tag, 0):
+            self._versions[tag] = version
+
+    # ----------------------------------------
+    # Versions
+    # ----------------------------------------
+    async def _current_versions(self, tags: Tuple[str, ...]) -> Dict[str, int]:
+        unknown = [tag for tag in tags if tag not in self._versions]
+        if unknown:
+            try:
+                values = await self.redis.mget([_version_key(tag) for tag in unknown])
+                for tag, value in zip(unknown, values):
+                    self._versions[tag] = max(self._versions.get(tag, 0), int(value or 0))
+            except Exception as e:
+                logger.warning(f"Cache versions unavailable: {e}")
+                for tag in unknown:
+                    self._versions.setdefault(tag, 0)
+        return {tag: self._versions[tag] for tag in tags}
+
+    def _is_current(self, entry: _Entry, namespace: CacheNamespace) -> bool:
+        # Entries written by a process that saw a newer version are fine too
+        return all(entry.versions.get(tag, 0) >= self._versions.get(tag, 0) for tag in namespace.tags)
+
+    # ----------------------------------------
+    # Tiers
+    # ----------------------------------------
+    def _l1_get(self, full_key: str) -> Optional[_Entry]:
+        entry = self._l1.get(full_key)
+        if entry is not None:
+            self._l1.move_to_end(full_key)
+        return entry
+
+    def _l1_set(self, full_key: str, entry: _Entry) -> None:
+        self._l1[full_key] = entry
+        self._l1.move_to_end(full_key)
+        while len(self._l1) > self.max_entries:
+            self._l1.popitem(last=False)
+
+    async def _l2_get(self, full_key: str) -> Optional[_Entry]:
+        try:
+            data = await self.redis.get(_entry_key(full_key))
+        except Exception as e:
+            logger.warning(f"Cache L2 unavailable: {e}")
+            return None
+        return _Entry.from_bytes(data) if data else None
+
+    async def _generation(self, full_key: str) -> Optional[int]:
+        """Invalidation count of a key (None if Redis is unavailable)."""
+        try:
+            return int(await self.redis.get(_generation_key(full_key)) or 0)
+        except Exception:
+            return None
+
+    async def _l2_set(self, full_key: str, payload: bytes, ttl: float, generation: Optional[int]) -> bool:
+        """
+        Store an entry in L2 unless the key was invalidated since `generation` was read.
+
+        Returns:
+            bool: False if the key was invalidated meanwhile (nothing stored)
+        """
+        if generation is None:
+            return True  # Redis was down when the load started: L1 only
+        generation_key = _generation_key(full_key)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(generation_key)
+                if int(await pipe.get(generation_key) or 0) != generation:
+                    return False
+                pipe.multi()
+                pipe.set(_entry_key(full_key), payload, px=int(ttl * 1000))
+                await pipe.execute()
+        except redis.WatchError:
+            return False  # invalidated between the check and the write
+        except Exception as e:
+            logger.warning(f"Cache L2 write failed: {e}")
+        return True
+
+    async def _lookup(self, namespace: CacheNamespace, full_key: str) -> Tuple[Optional[_Entry], str]:
+        """Current entry from the nearest tier, and which tier answered."""
+        await self._current_versions(namespace.tags)
+        entry = self._l1_get(full_key)
+        if entry is not None and self._is_current(entry, namespace) and time.time() < entry.stale_until:
+            return entry, "l1"
+        entry = await self._l2_get(full_key)
+        if entry is not None and self._is_current(entry, namespace) and time.time() < entry.stale_until:
+            self._l1_set(full_key, entry)
+            return entry, "l2"
+        self._l1.pop(full_key, None)
+        return None, "miss"
+
+    # ----------------------------------------
+    # Loading
+    # ----------------------------------------
+    async def _load(
+        self,
+        namespace: CacheNamespace,
+        full_key: str,
+        loader: Callable[[], Awaitable[Any]],
+        wait_for_others: bool,
+    ) -> Optional[_Entry]:
+        # Versions are taken before loading so a write racing with the load
+        # leaves the result already outdated
+        versions = await self._current_versions(namespace.tags)
+        generation = await self._generation(full_key)
+        lock_key = _lock_key(full_key)
+        try:
+            locked = bool(await self.redis.set(lock_key, "1", nx=True, ex=int(LOCK_TIMEOUT_SECONDS)))
+            held_elsewhere = not locked
+        except Exception:
+            locked = held_elsewhere = False  # Redis down: load locally
+
+        if held_elsewhere:
+            if not wait_for_others:
+                return None  # someone else is refreshing; keep serving stale
+            deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+                entry, _ = await self._lookup(namespace, full_key)
+                if entry is not None and time.time() < entry.fresh_until:
+                    return entry
+
+        try:
+            value = await loader()
+            now = time.time()
+            entry = _Entry(value, versions, now + namespace.ttl, now + namespace.ttl + namespace.stale_ttl)
+            payload = entry.to_bytes()
+            # Every caller sees the JSON-decoded shape, whichever tier answers
+            entry.value = loads(payload)["v"]
+            # Invalidated while loading (seen locally or via the generation):
+            # serve once, keep nothing
+            if full_key in self._dirty:
+                return entry
+            if not await self._l2_set(full_key, payload, namespace.ttl + namespace.stale_ttl, generation):
+                return entry
+            if full_key not in self._dirty:  # not invalidated during the L2 write either
+                self._l1_set(full_key, entry)
+            return entry
+        finally:
+            if locked:
+                try:
+                    await self.redis.delete(lock_key)
+                except Exception:
+                    pass
+
+    def _forget_inflight(self, full_key: str) -> None:
+        self._inflight.pop(full_key, None)
+        self._dirty.discard(full_key)
+
+    def _single_flight(self, full_key: str, make: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(full_key)
+        if task is None:
+            task = asyncio.create_task(make())
+            self._inflight[full_key] = task
+            task.add_done_callback(lambda _: self._forget_inflight(full_key))
+        return task
+
+    async def get_or_load(
+        self,
+        namespace: CacheNamespace,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Cached value for `key`, loading it with `loader` on a miss.
+
+        Args:
+            namespace: Namespace with TTLs and tags
+            key: Key within the namespace (already normalized by the caller)
+            loader: Coroutine function computing the value
+
+        Returns:
+            Any: JSON-decoded value; do not mutate
+        """
+        full_key = _full_keys(namespace, [key])[0]
+        entry, tier = await self._lookup(namespace, full_key)
+
+        if entry is not None and time.time() < entry.fresh_until:
+            CACHE_REQUESTS.labels(namespace=namespace.name, result=f"{tier}_hit").inc()
+            return entry.value
+
+        if entry is not None:
+            CACHE_REQUESTS.labels(namespace=namespace.name, result="stale").inc()
+            self._single_flight(
+                full_key, lambda: self._load(namespace, full_key, loader, wait_for_others=False)
+            ).add_done_callback(_log_refresh_error)
+            return entry.value
+
+        CACHE_REQUESTS.labels(namespace=namespace.name, result="miss").inc()
+        task = self._single_flight(
+            full_key, lambda: self._load(namespace, full_key, loader, wait_for_others=True)
+        )
+        # A cancelled request must not cancel the load other callers share
+        entry = await asyncio.shield(task)
+        if entry is None:
+            # Joined a stale refresh that found another process already loading
+            entry = await self._load(namespace, full_key, loader, wait_for_others=True)
+        return entry.value
+
+    # ----------------------------------------
+    # Invalidation
+    # ----------------------------------------
+    async def invalidate(self, *tags: str) -> None:
+        """Drop every cached value derived from `tags`, in all processes."""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(_version_key(tag))
+            versions = dict(zip(tags, await pipe.execute()))
+            await self.redis.publish(CHANNEL, dumps({"tags": versions}))
+        except Exception as e:
+            logger.warning(f"Cache invalidation not published: {e}")
+            versions = {tag: self._versions.get(tag, 0) + 1 for tag in tags}
+        # Applied locally right away; the pub/sub echo is then a no-op
+        for tag, version in versions.items():
+            self._apply_version(tag, version)
+
+    async def invalidate_keys(self, namespace: CacheNamespace, *keys: str) -> None:
+        """Drop specific keys of `namespace`, in all processes."""
+        if not keys:
+            return
+        full_keys = _full_keys(namespace, keys)
+        for full_key in full_keys:
+            self._drop_local(full_key)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            _queue_key_invalidation(pipe, full_keys)
+            pipe.publish(CHANNEL, dumps({"keys": full_keys}))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Cache invalidation not published: {e}")
+
+
+def _queue_key_invalidation(pipe, full_keys: List[str]) -> None:
+    # Generations first: a load that read the old one can no longer store
+    for full_key in full_keys:
+        pipe.incr(_generation_key(full_key))
+        pipe.expire(_generation_key(full_key), GENERATION_TTL_SECONDS)
+    pipe.delete(*[_entry_key(k) for k in full_keys])
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception():
+        logger.warning(f"Background cache refresh failed: {task.exception()}")
+
+
+_cache: Optional[TieredCache] = None
+
+
+def get_cache() -> TieredCache:
+    """Return the API process's cache."""
+    global _cache
+    if _cache is None:
+        _cache = TieredCache(settings.REDIS_URL, settings.CACHE_L1_MAX_ENTRIES)
+    return _cache
+
+
+# ============================================
+# Invalidation from Celery
+# ============================================
+_sync_redis: Optional[redis.Redis] = None
+
+
+def _get_sync_redis() -> redis.Redis:
+    global _sync_redis
+    if _sync_redis is None:
+        _sync_redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return _sync_redis
+
+
+def invalidate_sync(*tags: str) -> None:
+    """Blocking twin of TieredCache.invalidate for Celery tasks and scripts."""
+    client = _get_sync_redis()
+    try:
+        pipe = client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(_version_key(tag))
+        versions = dict(zip(tags, pipe.execute()))
+        client.publish(CHANNEL, dumps({"tags": versions}))
+    except Exception as e:
+        logger.error(f"Cache invalidation for {tags} not published: {e}")
+
+
+def invalidate_keys_sync(namespace: CacheNamespace, *keys: str) -> None:
+    """Blocking twin of TieredCache.invalidate_keys."""
+    if not keys:
+        return
+    full_keys = _full_keys(namespace, keys)
+    try:
+        pipe = _get_sync_redis().pipeline(transaction=False)
+        _queue_key_invalidation(pipe, full_keys)
+        pipe.publish(CHANNEL, dumps({"keys": full_keys}))
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Cache invalidation for {len(full_keys)} {namespace.name} keys not published: {e}")
@@ -0,0 +1,108 @@
+# backend/app/services/coalescing.py
+"""
+Request coalescing for expensive read endpoints.
+
+When many clients ask for the same report at once (a district office
+opening the dashboard at 8am), only the first request runs the
+aggregations; identical requests arriving while it is in flight await
+the same computation and receive the same serialized bytes.
+
+Requests are identical when they share the route template, the sorted
+query string and the caller's role scope, so users with different
+visibility never share a result. Authentication still runs per request -
+coalescing happens inside the handler, after its dependencies.
+
+Coalescing is per process and lasts only while the computation runs;
+combine with services/cache.py for reuse across time and processes.
+coalesced_requests_total{role="leader|follower"} gives the coalescing
+ratio (followers / all).
+
+Usage:
+    @router.get("/summary")
+    async def summary(request: Request, user: dict = Depends(require_admin), db=Depends(get_db)):
+        return await coalesce(request, user, lambda: compute_summary(db))
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable
+from urllib.parse import urlencode
+
+from fastapi import Request
+
+from app.utils.metrics import COALESCED_REQUESTS
+from app.utils.serialization import MongoJSONResponse, dumps
+
+
+def coalescing_key(request: Request, roles: Iterable[str]) -> str:
+    """
+    Key identifying equivalent requests.
+
+    Args:
+        request: Incoming request
+        roles: Caller's roles (the visibility scope of the result)
+
+    Returns:
+        str: "<route template>?<sorted query>#<sorted roles>"
+    """
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{path}?{query}#{','.join(sorted(set(roles)))}"
+
+
+class RequestCoalescer:
+    """Shares one in-flight computation between identical requests."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    async def _serialize(compute: Callable[[], Awaitable[Any]]) -> bytes:
+        return dumps(await compute())
+
+    async def run(self, key: str, route: str, compute: Callable[[], Awaitable[Any]]) -> bytes:
+        """
+        Serialized result of `compute`, shared with concurrent callers of `key`.
+
+        Args:
+            key: Coalescing key (see coalescing_key)
+            route: Route template, used as the metrics label
+            compute: Coroutine function producing a JSON-serializable result
+
+        Returns:
+            bytes: JSON payload
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            COALESCED_REQUESTS.labels(route=route, role="leader").inc()
+            task = asyncio.create_task(self._serialize(compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            COALESCED_REQUESTS.labels(route=route, role="follower").inc()
+        # A disconnecting client must not cancel the computation others await
+        return await asyncio.shield(task)
+
+
+_coalescer = RequestCoalescer()
+
+
+async def coalesce(
+    request: Request,
+    user: dict,
+    compute: Callable[[], Awaitable[Any]],
+) -> MongoJSONResponse:
+    """
+    Run `compute` once for all identical concurrent requests.
+
+    Args:
+        request: Incoming request
+        user: Authenticated user document (its roles scope the result)
+        compute: Coroutine function producing the response body
+
+    Returns:
+        MongoJSONResponse: Response carrying the shared pre-serialized body
+    """
+    key = coalescing_key(request, user.get("roles", []))
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    return MongoJSONResponse(content=await _coalescer.run(key, route, compute))
@@ -0,0 +1,396 @@
+# backend/app/services/duplicate_detection.py
+"""
+Fuzzy duplicate-farmer detection.
+
+Exact NRC matching misses typos in NRC numbers, swapped first/last names
+and re-registration in another district. Comparing every pair of farmers
+is quadratic, so candidates are generated by blocking instead:
+
+- phonetic keys: Soundex of the (sorted) name pair combined with DOB or
+  chiefdom, so swapped or misspelled names still collide
+- DOB + chiefdom
+- NRC halves: a single-digit NRC typo leaves one half intact
+- normalized phone
+- MinHash/LSH bands over character shingles of name + village
+
+Each farmer's keys are stored in `farmers.dedupe_keys` (multikey index),
+so an incremental run only computes keys for farmers changed since the
+last watermark and finds their block mates with one indexed query per
+batch. Candidate pairs are scored on name, DOB, NRC, phone, location and
+village similarity; pairs above DUPLICATE_MIN_SCORE are upserted into
+`duplicate_candidates` for admin review.
+
+Runs in Celery (see tasks/duplicate_tasks.py) with a synchronous pymongo
+database.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services.duplicate_prefilter import normalize_phone
+
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = "duplicate_detection"
+
+CANDIDATE_OPEN = "open"
+CANDIDATE_CONFIRMED = "confirmed"
+CANDIDATE_DISMISSED = "dismissed"
+
+# Fields needed for keys and scoring
+PROFILE_PROJECTION = {
+    "farmer_id": 1,
+    "dedupe_keys": 1,
+    "personal_info.first_name": 1,
+    "personal_info.last_name": 1,
+    "personal_info.date_of_birth": 1,
+    "personal_info.nrc": 1,
+    "personal_info.phone_primary": 1,
+    "address.province_code": 1,
+    "address.district_code": 1,
+    "address.chiefdom_code": 1,
+    "address.village": 1,
+}
+
+# MinHash / LSH: 8 bands x 4 rows -> ~50% collision at Jaccard 0.59
+MINHASH_PERMUTATIONS = 32
+LSH_BANDS = 8
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)  # Fixed seed: signatures must be stable across runs
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+# Score weights (sum to 1.0)
+WEIGHTS = {
+    "name": 0.35,
+    "dob": 0.20,
+    "nrc": 0.20,
+    "phone": 0.10,
+    "location": 0.10,
+    "village": 0.05,
+}
+
+_NON_LETTERS = re.compile(r"[^a-z ]")
+_NON_DIGITS = re.compile(r"\D")
+
+
+# =======================================================
+# Normalization & phonetic codes
+# =======================================================
+def normalize_name(value: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    if not value:
+        return ""
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    return " ".join(_NON_LETTERS.sub(" ", ascii_value.lower()).split())
+
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def soundex(word: str) -> str:
+    """American Soundex code (e.g. 'Mwansa' -> 'M520'); '' for empty input."""
+    word = "".join(c for c in word.lower() if c.isalpha())
+    if not word:
+        return ""
+    code = word[0].upper()
+    previous = _SOUNDEX_CODES.get(word[0], "")
+    for char in word[1:]:
+        digit = _SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+# =======================================================
+# Profiles, keys, MinHash
+# =======================================================
+def build_profile(farmer: dict) -> Dict[str, Any]:
+    """Extract the normalized fields used for blocking and scoring."""
+    personal = farmer.get("personal_info") or {}
+    address = farmer.get("address") or {}
+    first = normalize_name(personal.get("first_name"))
+    last = normalize_name(personal.get("last_name"))
+    return {
+        "farmer_id": farmer.get("farmer_id"),
+        # Sorted so "John Banda" and "Banda John" compare equal
+        "names": " ".join(sorted(f"{first} {last}".split())),
+        "name_codes": ":".join(sorted(c for c in (soundex(first), soundex(last)) if c)),
+        "dob": (personal.get("date_of_birth") or "")[:10],
+        "nrc": _NON_DIGITS.sub("", personal.get("nrc") or ""),
+        "phone": normalize_phone(personal.get("phone_primary")),
+        "province": address.get("province_code") or "",
+        "district": address.get("district_code") or "",
+        "chiefdom": address.get("chiefdom_code") or "",
+        "village": normalize_name(address.get("village")),
+    }
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    text = f" {text} "
+    return {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+
+
+def minhash_signature(text: str) -> List[int]:
+    """MinHash signature of the character 3-gram set of `text`."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+        for s in _shingles(text)
+    ]
+    return [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def blocking_keys(profile: Dict[str, Any]) -> List[str]:
+    """
+    Blocking keys for a profile; two farmers sharing any key are compared.
+
+    Args:
+        profile: Output of build_profile
+
+    Returns:
+        List[str]: Keys to store in farmers.dedupe_keys
+    """
+    keys = []
+    codes, dob, chiefdom = profile["name_codes"], profile["dob"], profile["chiefdom"]
+    if codes and dob:
+        keys.append(f"nd:{codes}:{dob}")
+    if codes and chiefdom:
+        keys.append(f"nc:{codes}:{chiefdom}")
+    if dob and chiefdom:
+        keys.append(f"dc:{dob}:{chiefdom}")
+
+    nrc = profile["nrc"]
+    if len(nrc) == 9:
+        keys.append(f"r1:{nrc[:6]}")
+        keys.append(f"r2:{nrc[6:]}:{dob}")
+
+    if profile["phone"]:
+        keys.append(f"p:{profile['phone']}")
+
+    text = f"{profile['names']} {profile['village']}".strip()
+    if text:
+        signature = minhash_signature(text)
+        for band in range(LSH_BANDS):
+            rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            digest = hashlib.blake2b(repr(rows).encode(), digest_size=6).hexdigest()
+            keys.append(f"l{band}:{digest}")
+    return keys
+
+
+# =======================================================
+# Pair scoring
+# =======================================================
+def _ratio(a: str, b: str) -> float:
+    return SequenceMatcher(None, a, b).ratio() if a and b else 0.0
+
+
+def _dob_similarity(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    # Same year with day/month swapped or a single-field typo
+    ya, ma, da = (a.split("-") + ["", ""])[:3]
+    yb, mb, db = (b.split("-") + ["", ""])[:3]
+    if ya == yb and (ma, da) == (db, mb):
+        return 0.8
+    return 0.5 if sum(x == y for x, y in ((ya, yb), (ma, mb), (da, db))) == 2 else 0.0
+
+
+def _nrc_similarity(a: str, b: str) -> float:
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    if a == b:
+        return 1.0
+    diffs = [i for i in range(len(a)) if a[i] != b[i]]
+    if len(diffs) == 1:
+        return 0.8
+    if len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]:
+        return 0.8  # Adjacent transposition
+    return 0.0
+
+
+def _location_similarity(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    if a["chiefdom"] and a["chiefdom"] == b["chiefdom"]:
+        return 1.0
+    if a["district"] and a["district"] == b["district"]:
+        return 0.7
+    if a["province"] and a["province"] == b["province"]:
+        return 0.4
+    return 0.0
+
+
+def score_pair(a: Dict[str, Any], b: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
+    """
+    Score two profiles.
+
+    Returns:
+        Tuple[float, Dict[str, float]]: Weighted score in [0, 1] and per-feature similarities
+    """
+    features = {
+        "name": _ratio(a["names"], b["names"]),
+        "dob": _dob_similarity(a["dob"], b["dob"]),
+        "nrc": _nrc_similarity(a["nrc"], b["nrc"]),
+        "phone": 1.0 if a["phone"] and a["phone"] == b["phone"] else 0.0,
+        "location": _location_similarity(a, b),
+        "village": _ratio(a["village"], b["village"]),
+    }
+    score = sum(WEIGHTS[name] * value for name, value in features.items())
+    return round(score, 4), {name: round(value, 3) for name, value in features.items()}
+
+
+# =======================================================
+# Detector
+# =======================================================
+class DuplicateDetector:
+    """
+    Incremental duplicate detection over a synchronous pymongo database.
+
+    Args:
+        db: pymongo Database
+        batch_size: Changed farmers processed per round
+        min_score: Minimum score for a pair to be recorded
+        max_block_size: Keys shared by more farmers than this are ignored
+            as too generic to be useful
+    """
+
+    def __init__(
+        self,
+        db,
+        batch_size: int = 500,
+        min_score: float = 0.6,
+        max_block_size: int = 200,
+    ) -> None:
+        self.db = db
+        self.batch_size = batch_size
+        self.min_score = min_score
+        self.max_block_size = max_block_size
+
+    def run(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Process farmers changed since the last watermark (all farmers if full).
+
+        Returns:
+            dict: Run summary (farmers scanned, pairs compared, candidates written)
+        """
+        started_at = datetime.utcnow()
+        state = self.db.job_state.find_one({"_id": STATE_ID}) or {}
+        watermark = None if full else state.get("watermark")
+
+        query: Dict[str, Any] = {}
+        if watermark:
+            query = {"$or": [{"updated_at": {"$gte": watermark}}, {"created_at": {"$gte": watermark}}]}
+
+        summary = {"farmers": 0, "pairs": 0, "candidates": 0}
+        batch: List[dict] = []
+        for farmer in self.db.farmers.find(query, PROFILE_PROJECTION, batch_size=self.batch_size):
+            batch.append(farmer)
+            if len(batch) >= self.batch_size:
+                self._process_batch(batch, summary)
+                batch = []
+        if batch:
+            self._process_batch(batch, summary)
+
+        # Overlap protects against clock skew between writers; reruns are idempotent
+        overlap = timedelta(seconds=settings.DUPLICATE_WATERMARK_OVERLAP_SECONDS)
+        self.db.job_state.update_one(
+            {"_id": STATE_ID},
+            {"$set": {"watermark": started_at - overlap, "last_run": summary, "last_run_at": started_at}},
+            upsert=True,
+        )
+        logger.info(f"Duplicate detection run complete: {summary}")
+        return summary
+
+    def _process_batch(self, farmers: List[dict], summary: Dict[str, int]) -> None:
+        profiles = {}
+        key_updates = []
+        for farmer in farmers:
+            profile = build_profile(farmer)
+            if not profile["farmer_id"]:
+                continue
+            keys = blocking_keys(profile)
+            profile["keys"] = keys
+            profiles[profile["farmer_id"]] = profile
+            if sorted(keys) != sorted(farmer.get("dedupe_keys") or []):
+                key_updates.append(UpdateOne({"_id": farmer["_id"]}, {"$set": {"dedupe_keys": keys}}))
+        if key_updates:
+            self.db.farmers.bulk_write(key_updates, ordered=False)
+        summary["farmers"] += len(profiles)
+
+        # Block mates of every farmer in the batch, in one indexed query
+        all_keys = {key for p in profiles.values() for key in p["keys"]}
+        if not all_keys:
+            return
+        members: Dict[str, List[str]] = {}
+        others: Dict[str, Dict[str, Any]] = {}
+        for farmer in self.db.farmers.find({"dedupe_keys": {"$in": list(all_keys)}}, PROFILE_PROJECTION):
+            fid = farmer.get("farmer_id")
+            if not fid:
+                continue
+            others[fid] = profiles.get(fid) or build_profile(farmer)
+            for key in farmer.get("dedupe_keys") or []:
+                if key in all_keys:
+                    members.setdefault(key, []).append(fid)
+
+        pairs: Dict[Tuple[str, str], Set[str]] = {}
+        for fid, profile in profiles.items():
+            for key in profile["keys"]:
+                mates = members.get(key, [])
+                if len(mates) > self.max_block_size:
+                    continue
+                for other in mates:
+                    if other != fid:
+                        pairs.setdefault(tuple(sorted((fid, other))), set()).add(key.split(":", 1)[0])
+
+        now = datetime.utcnow()
+        writes = []
+        for (a, b), key_types in pairs.items():
+            score, features = score_pair(others[a], others[b])
+            if score < self.min_score:
+                continue
+            writes.append(UpdateOne(
+                {"_id": f"{a}|{b}"},
+                {
+                    "$set": {
+                        "farmer_ids": [a, b],
+                        "score": score,
+                        "features": features,
+                        "blocking": sorted(key_types),
+                        "updated_at": now,
+                    },
+                    # Reviewed pairs keep their decision when rescored
+                    "$setOnInsert": {"status": CANDIDATE_OPEN, "created_at": now},
+                },
+                upsert=True,
+            ))
+        summary["pairs"] += len(pairs)
+        if writes:
+            self.db.duplicate_candidates.bulk_write(writes, ordered=False)
+            summary["candidates"] += len(writes)
@@ -0,0 +1,325 @@
+# backend/app/services/duplicate_prefilter.py
+"""
+Bloom-filter prefilter for NRC and phone duplicate checks.
+
+Two Redis bitmaps hold every known NRC hash and normalized phone number.
+A negative answer is definite, so the common "new farmer" case skips the
+MongoDB lookup entirely; a positive answer still goes to the database.
+Keeping the bitmaps in Redis means API workers and Celery sync workers
+see each other's writes - an in-process filter would produce false
+negatives for farmers created in another process.
+
+Lifecycle:
+- rebuilt at API startup (one worker wins a Redis lock) from a scan of
+  `farmers`; writes made during the scan went into the replaced bitmaps,
+  so they are replayed before the filter is marked ready again
+- maintained on every create/update/sync write via `add_farmer`
+- until the first build finishes, or if Redis is unavailable, every check
+  answers "maybe" and callers fall back to the database
+- if an add is lost (Redis briefly down) the ready flag is cleared on the
+  next successful call, disabling the filter until an API process rebuilds it
+"""
+
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.utils.bloom import BloomBits, bloom_parameters, bloom_positions, estimated_false_positive_rate
+from app.utils.metrics import BLOOM_CHECKS, BLOOM_ESTIMATED_FPR, BLOOM_REBUILD_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+FILTER_NRC = "nrc"
+FILTER_PHONE = "phone"
+FILTERS = (FILTER_NRC, FILTER_PHONE)
+
+KEY_PREFIX = "dedupe:bloom"
+READY_KEY = f"{KEY_PREFIX}:ready"
+LOCK_KEY = f"{KEY_PREFIX}:rebuild-lock"
+
+# Only the fields the filters need
+SCAN_PROJECTION = {"_id": 0, "nrc_hash": 1, "personal_info.phone_primary": 1}
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Canonicalize a Zambian phone number to +260XXXXXXXXX.
+    0977000000, +260977000000 and "260 977 000 000" all map to the same key.
+    """
+    if not phone:
+        return None
+    digits = _NON_DIGITS.sub("", phone)
+    if len(digits) < 9:
+        return None
+    return "+260" + digits[-9:]
+
+
+def farmer_filter_values(farmer: dict) -> List[Tuple[str, str]]:
+    """(filter, value) pairs a farmer document contributes."""
+    values = []
+    if farmer.get("nrc_hash"):
+        values.append((FILTER_NRC, farmer["nrc_hash"]))
+    phone = normalize_phone((farmer.get("personal_info") or {}).get("phone_primary"))
+    if phone:
+        values.append((FILTER_PHONE, phone))
+    return values
+
+
+def _filter_key(kind: str) -> str:
+    return f"{KEY_PREFIX}:{kind}"
+
+
+@lru_cache()
+def _params() -> Tuple[int, int]:
+    return bloom_parameters(settings.DEDUPE_BLOOM_CAPACITY, settings.DEDUPE_BLOOM_ERROR_RATE)
+
+
+def _ready_token() -> bytes:
+    # Filters built with other sizing parameters must not be trusted
+    return "{}:{}".format(*_params()).encode()
+
+
+def _queue_checks(pipe, kind: str, value: str) -> None:
+    num_bits, num_hashes = _params()
+    pipe.get(READY_KEY)
+    for pos in bloom_positions(value, num_bits, num_hashes):
+        pipe.getbit(_filter_key(kind), pos)
+
+
+def _queue_adds(pipe, values: Iterable[Tuple[str, str]]) -> None:
+    num_bits, num_hashes = _params()
+    for kind, value in values:
+        for pos in bloom_positions(value, num_bits, num_hashes):
+            pipe.setbit(_filter_key(kind), pos, 1)
+
+
+def _answer(kind: str, replies: list) -> Optional[bool]:
+    """Pipeline replies -> maybe-present flag, or None if the filter is not ready."""
+    ready, bits = replies[0], replies[1:]
+    if ready != _ready_token():
+        return None
+    maybe = all(bits)
+    if not maybe:
+        BLOOM_CHECKS.labels(filter=kind, result="negative").inc()
+    return maybe
+
+
+def record_lookup(kind: str, found: bool) -> None:
+    """
+    Record the database outcome of a positive prefilter answer.
+    found=False is an observed false positive.
+    """
+    BLOOM_CHECKS.labels(filter=kind, result="hit" if found else "false_positive").inc()
+
+
+# ============================================
+# Async prefilter (API)
+# ============================================
+class DuplicatePrefilter:
+    """Redis-backed prefilter used by the API process."""
+
+    def __init__(self, redis_url: str) -> None:
+        self.redis = aioredis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+        self._lost_writes = False
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._last_rebuild_attempt = 0.0
+
+    async def _invalidate_if_lost_writes(self) -> None:
+        if self._lost_writes:
+            await self.redis.delete(READY_KEY)
+            self._lost_writes = False
+            logger.error("Duplicate prefilter missed writes; disabled until rebuilt")
+
+    def _schedule_rebuild(self) -> None:
+        """Start a background rebuild, at most once a minute per process."""
+        now = time.monotonic()
+        if self._rebuild_task and not self._rebuild_task.done():
+            return
+        if now - self._last_rebuild_attempt < 60:
+            return
+        self._last_rebuild_attempt = now
+        from app.database import get_database
+
+        try:
+            self._rebuild_task = asyncio.create_task(self.rebuild(get_database()))
+        except RuntimeError as e:
+            logger.warning(f"Cannot rebuild duplicate prefilter yet: {e}")
+
+    async def might_contain(self, kind: str, value: Optional[str]) -> bool:
+        """
+        False only if `value` has definitely never been stored.
+
+        Args:
+            kind: FILTER_NRC (nrc_hash values) or FILTER_PHONE (raw phones)
+            value: Value to test
+        """
+        if kind == FILTER_PHONE:
+            value = normalize_phone(value)
+        if not value:
+            return True
+        try:
+            await self._invalidate_if_lost_writes()
+            pipe = self.redis.pipeline(transaction=False)
+            _queue_checks(pipe, kind, value)
+            maybe = _answer(kind, await pipe.execute())
+        except Exception as e:
+            logger.warning(f"Duplicate prefilter unavailable, falling back to DB: {e}")
+            return True
+        if maybe is None:
+            self._schedule_rebuild()
+            return True
+        return maybe
+
+    async def add_farmer(self, farmer: dict) -> None:
+        """Add a written farmer's NRC hash and phone to the filters."""
+        values = farmer_filter_values(farmer)
+        if not values:
+            return
+        try:
+            await self._invalidate_if_lost_writes()
+            pipe = self.redis.pipeline(transaction=False)
+            _queue_adds(pipe, values)
+            await pipe.execute()
+        except Exception as e:
+            self._lost_writes = True
+            logger.warning(f"Could not update duplicate prefilter: {e}")
+
+    async def rebuild(self, db) -> None:
+        """
+        Rebuild both filters from the farmers collection.
+        Only one process rebuilds at a time; others return immediately.
+        """
+        try:
+            if not await self.redis.set(LOCK_KEY, "1", nx=True, ex=settings.DEDUPE_BLOOM_REBUILD_LOCK_SECONDS):
+                return
+        except Exception as e:
+            logger.warning(f"Skipping duplicate prefilter rebuild (Redis unavailable): {e}")
+            return
+
+        try:
+            started_at = datetime.utcnow()
+            start = time.perf_counter()
+            num_bits, num_hashes = _params()
+            bits = {kind: BloomBits(num_bits, num_hashes) for kind in FILTERS}
+
+            count = 0
+            async for farmer in db.farmers.find({}, SCAN_PROJECTION, batch_size=5000):
+                for kind, value in farmer_filter_values(farmer):
+                    bits[kind].add(value)
+                count += 1
+
+            # Swap in atomically. Adds made during the scan went into the old
+            # bitmaps, so checks answer "maybe" until they are replayed
+            pipe = self.redis.pipeline(transaction=True)
+            for kind in FILTERS:
+                pipe.set(f"{_filter_key(kind)}:next", bits[kind].to_bytes())
+                pipe.rename(f"{_filter_key(kind)}:next", _filter_key(kind))
+            pipe.delete(READY_KEY)
+            await pipe.execute()
+
+            recent = db.farmers.find(
+                {"$or": [{"created_at": {"$gte": started_at}}, {"updated_at": {"$gte": started_at}}]},
+                SCAN_PROJECTION,
+            )
+            # Errors propagate: READY stays unset and a later check reschedules the rebuild
+            pipe = self.redis.pipeline(transaction=False)
+            async for farmer in recent:
+                _queue_adds(pipe, farmer_filter_values(farmer))
+            pipe.set(READY_KEY, _ready_token())
+            await pipe.execute()
+
+            elapsed = time.perf_counter() - start
+            BLOOM_REBUILD_SECONDS.set(elapsed)
+            for kind in FILTERS:
+                BLOOM_ESTIMATED_FPR.labels(filter=kind).set(
+                    estimated_false_positive_rate(bits[kind].bits_set(), num_bits, num_hashes)
+                )
+            logger.info(f"✅ Duplicate prefilter rebuilt from {count} farmers in {elapsed:.1f}s")
+        except Exception as e:
+            logger.error(f"❌ Duplicate prefilter rebuild failed: {e}")
+        finally:
+            try:
+                await self.redis.delete(LOCK_KEY)
+            except Exception:
+                pass
+
+
+_prefilter: Optional[DuplicatePrefilter] = None
+
+
+def get_duplicate_prefilter() -> DuplicatePrefilter:
+    """Return the API process's prefilter."""
+    global _prefilter
+    if _prefilter is None:
+        _prefilter = DuplicatePrefilter(settings.REDIS_URL)
+    return _prefilter
+
+
+# ============================================
+# Sync prefilter (Celery)
+# ============================================
+class SyncDuplicatePrefilter:
+    """Blocking twin of DuplicatePrefilter for Celery tasks."""
+
+    def __init__(self, redis_url: str) -> None:
+        self.redis = redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+        self._lost_writes = False
+
+    def _invalidate_if_lost_writes(self) -> None:
+        if self._lost_writes:
+            self.redis.delete(READY_KEY)
+            self._lost_writes = False
+            logger.error("Duplicate prefilter missed writes; disabled until rebuilt")
+
+    def might_contain(self, kind: str, value: Optional[str]) -> bool:
+        """False only if `value` has definitely never been stored."""
+        if kind == FILTER_PHONE:
+            value = normalize_phone(value)
+        if not value:
+            return True
+        try:
+            self._invalidate_if_lost_writes()
+            pipe = self.redis.pipeline(transaction=False)
+            _queue_checks(pipe, kind, value)
+            maybe = _answer(kind, pipe.execute())
+        except Exception as e:
+            logger.warning(f"Duplicate prefilter unavailable, falling back to DB: {e}")
+            return True
+        # Not ready: the API side notices too and schedules the rebuild
+        return True if maybe is None else maybe
+
+    def add_farmers(self, farmers: Iterable[dict]) -> None:
+        """Add written farmers' NRC hashes and phones to the filters."""
+        values = [v for farmer in farmers for v in farmer_filter_values(farmer)]
+        if not values:
+            return
+        try:
+            self._invalidate_if_lost_writes()
+            pipe = self.redis.pipeline(transaction=False)
+            _queue_adds(pipe, values)
+            pipe.execute()
+        except Exception as e:
+            self._lost_writes = True
+            logger.warning(f"Could not update duplicate prefilter: {e}")
+
+
+_sync_prefilter: Optional[SyncDuplicatePrefilter] = None
+
+
+def get_sync_duplicate_prefilter() -> SyncDuplicatePrefilter:
+    """Return the worker process's prefilter."""
+    global _sync_prefilter
+    if _sync_prefilter is None:
+        _sync_prefilter = SyncDuplicatePrefilter(settings.REDIS_URL)
+    return _sync_prefilter
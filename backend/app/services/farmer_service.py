@@ -10,6 +10,7 @@ Responsibilities:
 - Search and filtering
 """
 
+import hashlib
 import re
 from datetime import datetime
 from typing import Optional, List, Dict, Any
@@ -24,8 +25,23 @@ from app.models.farmer import (
     FarmerOut,
     FarmerListItem
 )
-from app.utils.crypto_utils import generate_farmer_id, hmac_hash
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.utils.crypto_utils import hmac_hash
+from app.utils.doc_diff import field_diff, flatten, get_path
+from app.utils.geo_utils import location_update, point_from_address
 from app.database import get_farmers_collection
+from app.services.boundary_resolver import check_address_boundaries
+from app.services.cache import TAG_FARMERS, CacheNamespace, get_cache
+from app.services.id_allocator import get_farmer_id_allocator
+from app.services.map_rollup import apply_rollup, rollup_ops
+from app.services.sync_merge import FIELD_VERSIONS, set_ops, stamp_tree
+from app.services.duplicate_prefilter import (
+    FILTER_NRC,
+    get_duplicate_prefilter,
+    record_lookup,
+)
 
 
 # =======================================================
@@ -36,6 +52,71 @@ ZAMBIA_LON_RANGE = (21.0, 34.0)
 NRC_PATTERN = re.compile(r"^\d{6}/\d{2}/\d$")
 ZAMBIA_PHONE_PATTERN = re.compile(r"^(\+260|0)[0-9]{9}$")
 
+# Rendered FarmerOut per farmer_id; every mutation below drops its entry
+FARMER_DETAIL_CACHE = CacheNamespace("farmer", ttl=600)
+
+
+def farmer_etag(farmer: Dict[str, Any]) -> str:
+    """
+    Weak ETag of a farmer document (raw or JSON-dumped): W/"<version>-<digest>".
+    The digest covers updated_at; the version part is what If-Match checks.
+    """
+    stamp = farmer.get("updated_at") or farmer.get("created_at")
+    if isinstance(stamp, datetime):
+        stamp = stamp.isoformat()
+    digest = hashlib.blake2b(f"{farmer.get('farmer_id')}|{stamp}".encode(), digest_size=8).hexdigest()
+    return f'W/"{farmer.get("version", 0)}-{digest}"'
+
+
+def version_from_if_match(value: str) -> Optional[int]:
+    """
+    Version a client based its edit on, from an If-Match header holding
+    an ETag from GET or a bare version number. Of a list of tags the first
+    one counts; `*` means no version check (None).
+    
+    Raises:
+        ValueError: If the header is neither
+    """
+    tag = value.split(",", 1)[0].strip()
+    if tag == "*":
+        return None
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    return int(tag.strip('"').split("-", 1)[0])
+
+
+def version_filter(version: int) -> Dict[str, Any]:
+    """Query fragment matching a document at `version` (0 = never versioned)."""
+    if version:
+        return {"version": version}
+    return {"version": {"$in": [None, 0]}}
+
+
+def conflict_details(current: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Describe a version conflict: the current version and, per submitted
+    field, where the stored value differs from the client's.
+    """
+    return {
+        "farmer_id": current.get("farmer_id"),
+        "current_version": current.get("version", 0),
+        "conflicts": field_diff(
+            current,
+            changes,
+            ignore=("updated_at", "created_at", "version", "last_modified_by", "location"),
+        ),
+    }
+
+
+async def invalidate_farmer_caches(*farmer_ids: str) -> None:
+    """
+    Drop the farmers' cached details and everything derived from farmers.
+    Call after any write to a farmer document, including upload routes.
+    """
+    cache = get_cache()
+    await cache.invalidate_keys(FARMER_DETAIL_CACHE, *farmer_ids)
+    await cache.invalidate(TAG_FARMERS)
+
 
 class FarmerService:
     """
@@ -75,23 +156,20 @@ class FarmerService:
             HTTPException: If validation fails or farmer already exists
         """
         # Validate the farmer data
-        self._validate_farmer_data(farmer_data.model_dump())
+        self.validate_farmer_data(farmer_data.model_dump())
         
         # Check for duplicate NRC
         if farmer_data.personal_info.nrc:
             await self._check_duplicate_nrc(farmer_data.personal_info.nrc)
         
-        # Generate unique farmer ID
-        farmer_id = await self._generate_unique_farmer_id()
-        
         # Build farmer document
         now = datetime.now(datetime.timezone.utc) if hasattr(datetime, 'timezone') else datetime.utcnow()
         
         farmer_doc = {
-            "farmer_id": farmer_id,
             "registration_status": "pending",
             "created_at": now,
             "updated_at": now,
+            "version": 1,
             "personal_info": farmer_data.personal_info.model_dump(),
             "address": farmer_data.address.model_dump(),
             "farm_info": farmer_data.farm_info.model_dump() if farmer_data.farm_info else None,
@@ -99,6 +177,21 @@ class FarmerService:
             "documents": None,  # Will be populated during document upload
         }
         
+        # Check (and fill in) admin area codes against the GPS point
+        self._check_boundaries(farmer_doc["address"])
+        
+        # GeoJSON point for the 2dsphere index
+        location = point_from_address(farmer_doc["address"])
+        if location:
+            farmer_doc["location"] = location
+        
+        # Every field starts at version 1 (see services/sync_merge.py)
+        farmer_doc[FIELD_VERSIONS] = stamp_tree(flatten({
+            key: farmer_doc[key]
+            for key in ("personal_info", "address", "farm_info", "household_info")
+            if farmer_doc[key]
+        }), 1)
+        
         # Add metadata
         if created_by:
             farmer_doc["created_by"] = created_by
@@ -110,17 +203,41 @@ class FarmerService:
                 salt="nrc"
             )
         
-        # Insert into database
-        result = await self.collection.insert_one(farmer_doc)
-        
-        # Fetch and return the created farmer
-        created_farmer = await self.collection.find_one({"_id": result.inserted_id})
+        # Insert with a freshly allocated ID (insert_one sets farmer_doc["_id"])
+        await self._insert_with_new_farmer_id(farmer_doc)
+        await get_duplicate_prefilter().add_farmer(farmer_doc)
+        await apply_rollup(self.db, rollup_ops(None, farmer_doc.get("location")))
+        await invalidate_farmer_caches(farmer_doc["farmer_id"])
         
-        return FarmerOut.from_mongo(created_farmer)
+        return FarmerOut.from_mongo(farmer_doc)
     
     # =======================================================
     # 2️⃣ READ Operations
     # =======================================================
+    async def get_farmer_detail(self, farmer_id: str) -> Dict[str, Any]:
+        """
+        JSON-ready FarmerOut for a farmer, served from the detail cache.
+        
+        Args:
+            farmer_id: Unique farmer identifier
+        
+        Returns:
+            dict: FarmerOut dumped in JSON mode (by alias); do not mutate
+        
+        Raises:
+            HTTPException: If the farmer does not exist (not cached)
+        """
+        async def load():
+            farmer = await self.collection.find_one({"farmer_id": farmer_id})
+            if not farmer:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Farmer {farmer_id} not found"
+                )
+            return FarmerOut.from_mongo(farmer).model_dump(mode="json", by_alias=True)
+        
+        return await get_cache().get_or_load(FARMER_DETAIL_CACHE, farmer_id, load)
+    
     async def get_farmer_by_id(self, farmer_id: str) -> Optional[FarmerOut]:
         """
         Get farmer by farmer_id.
@@ -169,13 +286,118 @@ class FarmerService:
             Optional[FarmerOut]: Farmer document or None
         """
         nrc_hash = hmac_hash(nrc, salt="nrc")
+        if not await get_duplicate_prefilter().might_contain(FILTER_NRC, nrc_hash):
+            return None
+        
         farmer = await self.collection.find_one({"nrc_hash": nrc_hash})
+        record_lookup(FILTER_NRC, farmer is not None)
         
         if not farmer:
             return None
         
         return FarmerOut.from_mongo(farmer)
     
+    # Fields needed to build a FarmerListItem (keeps list reads small)
+    LIST_PROJECTION = {
+        "farmer_id": 1,
+        "registration_status": 1,
+        "created_at": 1,
+        "personal_info.first_name": 1,
+        "personal_info.last_name": 1,
+        "personal_info.phone_primary": 1,
+        "address.village": 1,
+        "address.district_name": 1,
+        "address.district": 1,
+    }
+    
+    def _build_list_query(
+        self,
+        status: Optional[str] = None,
+        district: Optional[str] = None,
+        search: Optional[str] = None
+    ) -> dict:
+        """Build the MongoDB filter shared by list endpoints."""
+        query = {}
+        
+        if status:
+            query["registration_status"] = status
+        
+        if district:
+            query["address.district_name"] = district
+        
+        if search:
+            # Search in multiple fields
+            query["$or"] = [
+                {"farmer_id": {"$regex": search, "$options": "i"}},
+                {"personal_info.first_name": {"$regex": search, "$options": "i"}},
+                {"personal_info.last_name": {"$regex": search, "$options": "i"}},
+                {"personal_info.phone_primary": {"$regex": search, "$options": "i"}},
+            ]
+        
+        return query
+    
+    @staticmethod
+    def _to_list_row(farmer: dict) -> Dict[str, Any]:
+        """
+        Shape a raw farmer document into the FarmerListItem JSON layout.
+        
+        Args:
+            farmer: MongoDB document (may be partially projected)
+        
+        Returns:
+            dict: Plain dict with the same keys FarmerListItem serializes to
+        """
+        # Handle legacy created_at (might be empty string or missing)
+        created_at = farmer.get("created_at")
+        if not created_at or created_at == "":
+            created_at = datetime.utcnow()
+        
+        # Handle legacy address format (district vs district_name)
+        address = farmer.get("address") or {}
+        personal_info = farmer.get("personal_info") or {}
+        district_name = address.get("district_name") or address.get("district", "Unknown")
+        
+        return {
+            "_id": str(farmer["_id"]),
+            "farmer_id": farmer.get("farmer_id", "UNKNOWN"),
+            "registration_status": farmer.get("registration_status", "pending"),
+            "created_at": created_at,
+            "first_name": personal_info.get("first_name", ""),
+            "last_name": personal_info.get("last_name", ""),
+            "phone_primary": personal_info.get("phone_primary", ""),
+            "village": address.get("village", ""),
+            "district_name": district_name,
+        }
+    
+    async def list_farmer_rows(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        district: Optional[str] = None,
+        search: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List farmers as plain dicts ready for direct JSON rendering.
+        
+        Same filters as list_farmers(), but skips building Pydantic models so
+        the route can hand the rows straight to orjson.
+        
+        Returns:
+            List[dict]: Farmer summaries in FarmerListItem layout
+        """
+        query = self._build_list_query(status=status, district=district, search=search)
+        
+        cursor = (
+            self.collection.find(query, self.LIST_PROJECTION)
+            .sort("created_at", -1)
+            .skip(skip)
+            .limit(limit)
+        )
+        farmers = await cursor.to_list(length=limit)
+        
+        return [self._to_list_row(farmer) for farmer in farmers]
+    
     async def list_farmers(
         self,
         skip: int = 0,
@@ -197,53 +419,86 @@ class FarmerService:
         Returns:
             List[FarmerListItem]: List of farmer summaries
         """
-        # Build query filter
-        query = {}
+        rows = await self.list_farmer_rows(
+            skip=skip,
+            limit=limit,
+            status=status,
+            district=district,
+            search=search
+        )
+        return [FarmerListItem(**row) for row in rows]
+    
+    async def find_farmers_near(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance_m: float,
+        limit: int = 50,
+        status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Farmers nearest to a point, closest first ($geoNear on the 2dsphere index).
         
-        if status:
-            query["registration_status"] = status
+        Args:
+            latitude: Point latitude
+            longitude: Point longitude
+            max_distance_m: Search radius in metres
+            limit: Maximum farmers to return
+            status: Optional registration status filter
         
-        if district:
-            query["address.district_name"] = district
+        Returns:
+            List[dict]: Farmer summaries with `distance_m`, `latitude`, `longitude`
+        """
+        pipeline = [
+            {
+                "$geoNear": {
+                    "near": {"type": "Point", "coordinates": [longitude, latitude]},
+                    "distanceField": "distance_m",
+                    "maxDistance": max_distance_m,
+                    "spherical": True,
+                    "query": self._build_list_query(status=status),
+                    "key": "location",
+                }
+            },
+            {"$limit": limit},
+            {"$project": {**self.LIST_PROJECTION, "location": 1, "distance_m": 1}},
+        ]
+        farmers = await self.collection.aggregate(pipeline).to_list(length=limit)
+        return [self._to_geo_row(farmer) for farmer in farmers]
+    
+    async def find_farmers_within(
+        self,
+        polygon: Dict[str, Any],
+        limit: int = 500,
+        status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Farmers whose location lies inside a GeoJSON polygon.
         
-        if search:
-            # Search in multiple fields
-            query["$or"] = [
-                {"farmer_id": {"$regex": search, "$options": "i"}},
-                {"personal_info.first_name": {"$regex": search, "$options": "i"}},
-                {"personal_info.last_name": {"$regex": search, "$options": "i"}},
-                {"personal_info.phone_primary": {"$regex": search, "$options": "i"}},
-            ]
+        Args:
+            polygon: GeoJSON Polygon geometry
+            limit: Maximum farmers to return
+            status: Optional registration status filter
         
-        # Execute query with pagination
-        cursor = self.collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
+        Returns:
+            List[dict]: Farmer summaries with `latitude`, `longitude`
+        """
+        query = self._build_list_query(status=status)
+        query["location"] = {"$geoWithin": {"$geometry": polygon}}
+        cursor = self.collection.find(query, {**self.LIST_PROJECTION, "location": 1}).limit(limit)
         farmers = await cursor.to_list(length=limit)
-        
-        # Transform to list items
-        result = []
-        for farmer in farmers:
-            # Handle legacy created_at (might be empty string or missing)
-            created_at = farmer.get("created_at")
-            if not created_at or created_at == "":
-                created_at = datetime.now(datetime.timezone.utc) if hasattr(datetime, 'timezone') else datetime.utcnow()
-            
-            # Handle legacy address format (district vs district_name)
-            address = farmer.get("address", {})
-            district_name = address.get("district_name") or address.get("district", "Unknown")
-            
-            result.append(FarmerListItem(
-                _id=str(farmer["_id"]),
-                farmer_id=farmer.get("farmer_id", "UNKNOWN"),
-                registration_status=farmer.get("registration_status", "pending"),
-                created_at=created_at,
-                first_name=farmer.get("personal_info", {}).get("first_name", ""),
-                last_name=farmer.get("personal_info", {}).get("last_name", ""),
-                phone_primary=farmer.get("personal_info", {}).get("phone_primary", ""),
-                village=address.get("village", ""),
-                district_name=district_name,
-            ))
-        
-        return result
+        return [self._to_geo_row(farmer) for farmer in farmers]
+    
+    @classmethod
+    def _to_geo_row(cls, farmer: dict) -> Dict[str, Any]:
+        """List row plus coordinates (and distance for $geoNear results)."""
+        row = cls._to_list_row(farmer)
+        longitude, latitude = farmer["location"]["coordinates"]
+        row["latitude"] = latitude
+        row["longitude"] = longitude
+        if "distance_m" in farmer:
+            row["distance_m"] = round(farmer["distance_m"], 1)
+        return row
     
     async def count_farmers(
         self,
@@ -276,7 +531,8 @@ class FarmerService:
     async def update_farmer(
         self,
         farmer_id: str,
-        update_data: FarmerUpdate
+        update_data: FarmerUpdate,
+        expected_version: Optional[int] = None,
     ) -> Optional[FarmerOut]:
         """
         Update farmer information.
@@ -284,36 +540,69 @@ class FarmerService:
         Args:
             farmer_id: Farmer ID to update
             update_data: Partial update data
+            expected_version: Version the client edited (If-Match); None
+                updates unconditionally
         
         Returns:
             Optional[FarmerOut]: Updated farmer or None if not found
-        """
-        # Check if farmer exists
-        existing = await self.collection.find_one({"farmer_id": farmer_id})
-        if not existing:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Farmer {farmer_id} not found"
-            )
         
+        Raises:
+            HTTPException: 404 if not found, 409 with a field diff if the
+                farmer is no longer at expected_version
+        """
         # Build update document (only include non-None fields)
         update_dict = update_data.model_dump(exclude_none=True)
         
-        if not update_dict:
-            return FarmerOut.from_mongo(existing)
+        # Keep the GeoJSON location in step with a replaced address
+        location_set, location_unset = {}, {}
+        if "address" in update_dict:
+            self._check_boundaries(update_dict["address"])
+            location_set, location_unset = location_update(update_dict["address"])
         
-        # Add updated timestamp
-        now = datetime.now(datetime.timezone.utc) if hasattr(datetime, 'timezone') else datetime.utcnow()
-        update_dict["updated_at"] = now
-        
-        # Perform update
-        await self.collection.update_one(
-            {"farmer_id": farmer_id},
-            {"$set": update_dict}
-        )
+        # Every write is guarded on the version it was computed from, so the
+        # per-field version stamps sync merges rely on stay exact; without
+        # If-Match a concurrent write just means reading and trying again
+        for _ in range(3):
+            existing = await self.collection.find_one({"farmer_id": farmer_id})
+            if not existing:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Farmer {farmer_id} not found"
+                )
+            current_version = existing.get("version", 0)
+            if expected_version is not None and expected_version != current_version:
+                raise self._conflict(existing, update_dict)
+            if not update_dict:
+                return FarmerOut.from_mongo(existing)
+            
+            now = datetime.now(datetime.timezone.utc) if hasattr(datetime, 'timezone') else datetime.utcnow()
+            changed = [path for path, value in flatten(update_dict).items() if get_path(existing, path) != value]
+            fields = {**update_dict, **location_set, "updated_at": now}
+            fields.update(set_ops(
+                existing.get(FIELD_VERSIONS) or {},
+                {path: current_version + 1 for path in changed},
+                f"{FIELD_VERSIONS}.",
+            ))
+            update_doc = {"$set": fields, "$inc": {"version": 1}}
+            if location_unset:
+                update_doc["$unset"] = location_unset
+            
+            updated = await self.collection.find_one_and_update(
+                {"farmer_id": farmer_id, **version_filter(current_version)},
+                update_doc,
+                return_document=ReturnDocument.AFTER
+            )
+            if updated is not None:
+                break
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Farmer {farmer_id} is being modified concurrently, try again"
+            )
         
-        # Fetch and return updated farmer
-        updated = await self.collection.find_one({"farmer_id": farmer_id})
+        await get_duplicate_prefilter().add_farmer(updated)
+        await apply_rollup(self.db, rollup_ops(existing.get("location"), updated.get("location")))
+        await invalidate_farmer_caches(farmer_id)
         return FarmerOut.from_mongo(updated)
     
     async def update_registration_status(
@@ -342,23 +631,25 @@ class FarmerService:
         
         now = datetime.now(datetime.timezone.utc) if hasattr(datetime, 'timezone') else datetime.utcnow()
         
-        result = await self.collection.update_one(
+        updated = await self.collection.find_one_and_update(
             {"farmer_id": farmer_id},
             {
                 "$set": {
                     "registration_status": new_status,
                     "updated_at": now
-                }
-            }
+                },
+                "$inc": {"version": 1},
+            },
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.matched_count == 0:
+        if updated is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Farmer {farmer_id} not found"
             )
         
-        updated = await self.collection.find_one({"farmer_id": farmer_id})
+        await invalidate_farmer_caches(farmer_id)
         return FarmerOut.from_mongo(updated)
     
     async def update_documents(
@@ -377,16 +668,19 @@ class FarmerService:
             upsert=False
         )
         
-        # Now perform the actual update using dot notation
+        # Now perform the actual update using dot notation; updated_at
+        # moves so cached copies (ETags) of the farmer change too
+        now = datetime.now(datetime.timezone.utc) if hasattr(datetime, 'timezone') else datetime.utcnow()
         result = await self.collection.update_one(
             {"farmer_id": farmer_id},
-            {"$set": update_data},
+            {"$set": {**update_data, "updated_at": now}, "$inc": {"version": 1}},
             upsert=False
         )
         
         if result.matched_count == 0:
             raise ValueError(f"Farmer {farmer_id} not found")
         
+        await invalidate_farmer_caches(farmer_id)
         return {"success": True, "modified": result.modified_count}
     
     # =======================================================
@@ -402,13 +696,22 @@ class FarmerService:
         Returns:
             bool: True if deleted, False if not found
         """
-        result = await self.collection.delete_one({"farmer_id": farmer_id})
-        return result.deleted_count > 0
+        deleted = await self.collection.find_one_and_delete(
+            {"farmer_id": farmer_id},
+            projection={"location": 1}
+        )
+        if deleted is None:
+            return False
+        
+        await apply_rollup(self.db, rollup_ops(deleted.get("location"), None))
+        await invalidate_farmer_caches(farmer_id)
+        return True
     
     # =======================================================
     # 5️⃣ Validation Helpers
     # =======================================================
-    def _validate_farmer_data(self, data: dict) -> None:
+    @staticmethod
+    def validate_farmer_data(data: dict) -> None:
         """
         Validate farmer data before database operations.
         
@@ -481,6 +784,56 @@ class FarmerService:
                 },
             )
     
+    @staticmethod
+    def _conflict(current: dict, changes: dict) -> HTTPException:
+        """409 for an update based on an outdated version, with a field-level diff."""
+        detail = conflict_details(current, changes)
+        detail["message"] = (
+            f"Farmer {current.get('farmer_id')} was modified by someone else "
+            f"(now at version {detail['current_version']})"
+        )
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail,
+            headers={"ETag": farmer_etag(current)},
+        )
+    
+    @staticmethod
+    def _check_boundaries(address: dict) -> None:
+        """
+        Validate an address's admin codes against its GPS point, filling in
+        missing codes. See services/boundary_resolver.py.
+        
+        Raises:
+            HTTPException: If the point lies outside the claimed areas (enforce mode)
+        """
+        errors = check_address_boundaries([address])[0]
+        if errors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "Validation failed",
+                    "errors": errors,
+                },
+            )
+    
+    @staticmethod
+    def encrypt_sensitive_fields(data: dict) -> dict:
+        """
+        Add the searchable NRC hash to a raw farmer record (e.g. from sync).
+        Mirrors what create_farmer stores for API-created farmers.
+        
+        Args:
+            data: Farmer data dictionary
+        
+        Returns:
+            dict: The same dictionary with nrc_hash set when an NRC is present
+        """
+        nrc = (data.get("personal_info") or {}).get("nrc") or data.get("nrc_number")
+        if nrc:
+            data["nrc_hash"] = hmac_hash(nrc, salt="nrc")
+        return data
+    
     async def _check_duplicate_nrc(self, nrc: str) -> None:
         """
         Check if NRC already exists in database.
@@ -492,7 +845,13 @@ class FarmerService:
             HTTPException: If NRC already exists
         """
         nrc_hash = hmac_hash(nrc, salt="nrc")
+        
+        # Definite negatives (the common case) skip the database
+        if not await get_duplicate_prefilter().might_contain(FILTER_NRC, nrc_hash):
+            return
+        
         existing = await self.collection.find_one({"nrc_hash": nrc_hash})
+        record_lookup(FILTER_NRC, existing is not None)
         
         if existing:
             raise HTTPException(
@@ -500,28 +859,40 @@ class FarmerService:
                 detail=f"Farmer with NRC {nrc} already exists (Farmer ID: {existing['farmer_id']})"
             )
     
-    async def _generate_unique_farmer_id(self) -> str:
+    async def _insert_with_new_farmer_id(self, farmer_doc: Dict[str, Any]) -> str:
         """
-        Generate a unique farmer ID with collision detection.
+        Assign a block-allocated farmer ID and insert the document.
+        
+        IDs come from the counter-backed allocator, so no existence check
+        is needed; the unique farmer_id index only fires if the counter was
+        reset behind existing data, in which case the next ID is tried.
+        
+        Args:
+            farmer_doc: Farmer document without farmer_id
         
         Returns:
-            str: Unique farmer ID (e.g., ZM1A2B3C4D)
+            str: Assigned farmer ID (e.g., ZM000000422)
+        
+        Raises:
+            HTTPException: If no free ID could be assigned
         """
-        max_attempts = 10
+        allocator = get_farmer_id_allocator()
+        max_attempts = 5
         
         for _ in range(max_attempts):
-            farmer_id = generate_farmer_id()
-            
-            # Check if ID already exists
-            existing = await self.collection.find_one({"farmer_id": farmer_id})
-            
-            if not existing:
-                return farmer_id
-        
-        # If we reach here, something is very wrong
+            farmer_doc["farmer_id"] = await allocator.next_id()
+            try:
+                await self.collection.insert_one(farmer_doc)
+                return farmer_doc["farmer_id"]
+            except DuplicateKeyError as e:
+                if "farmer_id" not in (e.details or {}).get("keyPattern", {}):
+                    raise
+                farmer_doc.pop("_id", None)
+        
+        # If we reach here, the counter is behind the stored IDs
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to generate unique farmer ID after multiple attempts"
+            detail="Failed to assign a unique farmer ID; check the farmer_id counter"
         )
     
     # =======================================================
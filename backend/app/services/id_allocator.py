@@ -0,0 +1,188 @@
+# backend/app/services/id_allocator.py
+"""
+Block-leased farmer ID allocation.
+
+IDs come from an atomic counter document in the `counters` collection:
+
+    {"_id": "farmer_id", "seq": 120400}
+
+Each process reserves a block of FARMER_ID_BLOCK_SIZE numbers with one
+`$inc` and hands them out from memory, so creating a farmer costs no extra
+round-trip most of the time and never needs a "does this ID exist?" read.
+Numbers left in a block when a process exits are simply skipped; IDs are
+unique, not gapless. The unique index on farmers.farmer_id (see
+database.ensure_indexes) remains the backstop.
+
+Usage (API):
+    farmer_id = await get_farmer_id_allocator().next_id()
+
+Usage (Celery):
+    farmer_id = get_sync_farmer_id_allocator(db).next_id()
+"""
+
+import asyncio
+import os
+import threading
+from typing import Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+from app.config import settings
+from app.database import get_collection
+from app.utils.crypto_utils import format_farmer_id
+
+
+FARMER_ID_COUNTER = "farmer_id"
+
+
+class _Block:
+    """Half-open range [next, end) of reserved sequence numbers."""
+
+    __slots__ = ("next", "end", "pid")
+
+    def __init__(self, start: int = 0, end: int = 0) -> None:
+        self.next = start
+        self.end = end
+        # Blocks must never be shared across fork() (Celery prefork workers)
+        self.pid = os.getpid()
+
+    def take(self) -> Optional[int]:
+        if self.next >= self.end or self.pid != os.getpid():
+            return None
+        value = self.next
+        self.next += 1
+        return value
+
+
+def _reserved_range(counter: dict, count: int) -> Tuple[int, int]:
+    """Turn the post-$inc counter document into the reserved [start, end) range."""
+    end = counter["seq"] + 1
+    return end - count, end
+
+
+class FarmerIdAllocator:
+    """
+    Async allocator backed by a Motor collection.
+
+    Args:
+        counters: `counters` collection
+        block_size: Sequence numbers reserved per round-trip
+        counter_name: Counter document _id
+    """
+
+    def __init__(
+        self,
+        counters: AsyncIOMotorCollection,
+        block_size: int = 100,
+        counter_name: str = FARMER_ID_COUNTER,
+    ) -> None:
+        self.counters = counters
+        self.block_size = block_size
+        self.counter_name = counter_name
+        self._block = _Block()
+        self._lock = asyncio.Lock()
+
+    async def reserve(self, count: int) -> Tuple[int, int]:
+        """
+        Atomically reserve `count` consecutive sequence numbers.
+
+        Returns:
+            Tuple[int, int]: Reserved range [start, end)
+        """
+        counter = await self.counters.find_one_and_update(
+            {"_id": self.counter_name},
+            {"$inc": {"seq": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return _reserved_range(counter, count)
+
+    async def next_id(self) -> str:
+        """Return the next farmer ID, leasing a new block when needed."""
+        async with self._lock:
+            value = self._block.take()
+            if value is None:
+                self._block = _Block(*await self.reserve(self.block_size))
+                value = self._block.take()
+        return format_farmer_id(value)
+
+
+class SyncFarmerIdAllocator:
+    """
+    Blocking allocator for Celery tasks (pymongo).
+
+    Args:
+        counters: `counters` collection
+        block_size: Sequence numbers reserved per round-trip
+        counter_name: Counter document _id
+    """
+
+    def __init__(
+        self,
+        counters: Collection,
+        block_size: int = 100,
+        counter_name: str = FARMER_ID_COUNTER,
+    ) -> None:
+        self.counters = counters
+        self.block_size = block_size
+        self.counter_name = counter_name
+        self._block = _Block()
+        self._lock = threading.Lock()
+
+    def reserve(self, count: int) -> Tuple[int, int]:
+        """
+        Atomically reserve `count` consecutive sequence numbers.
+
+        Returns:
+            Tuple[int, int]: Reserved range [start, end)
+        """
+        counter = self.counters.find_one_and_update(
+            {"_id": self.counter_name},
+            {"$inc": {"seq": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return _reserved_range(counter, count)
+
+    def next_id(self) -> str:
+        """Return the next farmer ID, leasing a new block when needed."""
+        with self._lock:
+            value = self._block.take()
+            if value is None:
+                self._block = _Block(*self.reserve(self.block_size))
+                value = self._block.take()
+        return format_farmer_id(value)
+
+
+# ============================================
+# Process-wide instances
+# ============================================
+_allocator: Optional[FarmerIdAllocator] = None
+_sync_allocator: Optional[SyncFarmerIdAllocator] = None
+
+
+def get_farmer_id_allocator() -> FarmerIdAllocator:
+    """Return the API process's allocator (requires an initialized database)."""
+    global _allocator
+    if _allocator is None:
+        _allocator = FarmerIdAllocator(
+            get_collection("counters"), block_size=settings.FARMER_ID_BLOCK_SIZE
+        )
+    return _allocator
+
+
+def get_sync_farmer_id_allocator(db) -> SyncFarmerIdAllocator:
+    """
+    Return the worker process's allocator.
+
+    Args:
+        db: pymongo Database used on first call
+    """
+    global _sync_allocator
+    if _sync_allocator is None:
+        _sync_allocator = SyncFarmerIdAllocator(
+            db.counters, block_size=settings.FARMER_ID_BLOCK_SIZE
+        )
+    return _sync_allocator
@@ -0,0 +1,145 @@
+# backend/app/services/id_lease_service.py
+"""
+Farmer ID leases for offline field devices.
+
+An operator's device leases a batch of real farmer IDs while online and
+assigns them to farmers registered offline, so photos, documents and ID
+cards can reference the final ID from the start and sync needs no
+temp_id -> farmer_id remapping.
+
+Lease documents (`farmer_id_leases`):
+
+    {
+        "_id": "<lease id>",
+        "operator": "op@example.com",
+        "device_id": "tablet-17",
+        "farmer_ids": ["ZM000120015", ...],
+        "issued_at": datetime,
+        "expires_at": datetime,
+        "status": "active" | "reclaimed"
+    }
+
+Sync accepts a leased ID only from its own operator while the lease is
+active and unexpired. Once a lease has been expired for longer than the
+grace period its unused IDs go to `farmer_id_pool` and are handed out
+again before new numbers are drawn from the counter. The grace period
+keeps sync acceptance and reclamation from overlapping.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from app.config import settings
+from app.services.id_allocator import get_farmer_id_allocator
+from app.utils.crypto_utils import format_farmer_id
+
+
+LEASE_ACTIVE = "active"
+LEASE_RECLAIMED = "reclaimed"
+
+
+class IdLeaseService:
+    """
+    Issue and reclaim farmer ID leases.
+
+    Args:
+        db: MongoDB database instance
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.leases = db.farmer_id_leases
+        self.pool = db.farmer_id_pool
+
+    async def issue_lease(self, operator: str, device_id: str, count: int) -> Dict[str, Any]:
+        """
+        Lease `count` farmer IDs to an operator's device.
+
+        Reclaimed IDs are reused first; the rest come from the counter.
+
+        Args:
+            operator: Email of the authenticated operator
+            device_id: Client-chosen identifier of the field device
+            count: Number of IDs requested
+
+        Returns:
+            dict: Lease document
+        """
+        await self.reclaim_expired()
+
+        farmer_ids = await self._take_from_pool(count)
+        missing = count - len(farmer_ids)
+        if missing:
+            start, end = await get_farmer_id_allocator().reserve(missing)
+            farmer_ids.extend(format_farmer_id(seq) for seq in range(start, end))
+
+        now = datetime.utcnow()
+        lease = {
+            "_id": uuid.uuid4().hex,
+            "operator": operator,
+            "device_id": device_id,
+            "farmer_ids": farmer_ids,
+            "issued_at": now,
+            "expires_at": now + timedelta(days=settings.ID_LEASE_TTL_DAYS),
+            "status": LEASE_ACTIVE,
+        }
+        await self.leases.insert_one(lease)
+        return lease
+
+    async def list_active_leases(self, operator: str) -> List[Dict[str, Any]]:
+        """Return the operator's unexpired leases, newest first."""
+        cursor = self.leases.find(
+            {"operator": operator, "status": LEASE_ACTIVE, "expires_at": {"$gt": datetime.utcnow()}}
+        ).sort("issued_at", -1)
+        return await cursor.to_list(length=100)
+
+    async def reclaim_expired(self, limit: int = 20) -> int:
+        """
+        Return unused IDs of long-expired leases to the pool.
+
+        Args:
+            limit: Maximum leases to process in one call
+
+        Returns:
+            int: Number of IDs returned to the pool
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=settings.ID_LEASE_GRACE_HOURS)
+        reclaimed = 0
+
+        for _ in range(limit):
+            # Claim atomically so concurrent callers never pool the same lease twice
+            lease = await self.leases.find_one_and_update(
+                {"status": LEASE_ACTIVE, "expires_at": {"$lt": cutoff}},
+                {"$set": {"status": LEASE_RECLAIMED, "reclaimed_at": datetime.utcnow()}},
+            )
+            if lease is None:
+                break
+
+            used = set(await self.db.farmers.distinct(
+                "farmer_id", {"farmer_id": {"$in": lease["farmer_ids"]}}
+            ))
+            unused = [fid for fid in lease["farmer_ids"] if fid not in used]
+            if unused:
+                await self.pool.insert_one({"farmer_ids": unused, "from_lease": lease["_id"]})
+                reclaimed += len(unused)
+
+        return reclaimed
+
+    async def _take_from_pool(self, count: int) -> List[str]:
+        """Take up to `count` reclaimed IDs, returning any surplus to the pool."""
+        taken: List[str] = []
+        while len(taken) < count:
+            chunk = await self.pool.find_one_and_delete({}, sort=[("_id", ASCENDING)])
+            if chunk is None:
+                break
+            need = count - len(taken)
+            taken.extend(chunk["farmer_ids"][:need])
+            surplus = chunk["farmer_ids"][need:]
+            if surplus:
+                await self.pool.insert_one({"farmer_ids": surplus, "from_lease": chunk.get("from_lease")})
+        return taken
+
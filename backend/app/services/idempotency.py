@@ -0,0 +1,261 @@
+# backend/app/services/idempotency.py
+"""
+Idempotency-Key handling for create and sync endpoints.
+
+Mobile clients retry POSTs after timeouts, and every retry used to
+repeat the validation, NRC checks and insert, or queue another sync job.
+With an `Idempotency-Key` header the first request does the work and its
+response is stored, and later requests with the same key get that
+response back with `Idempotent-Replayed: true`:
+
+    idempotency_keys  {_id: "<user>:<key>", route, fingerprint, status,
+                       locked_until, response: {status_code, body, media_type,
+                       headers}, created_at}
+
+- Keys are scoped to the user, so two users never share a response.
+- A key reused with a different body or route gets 422.
+- A duplicate that arrives while the first request is still running waits
+  for it (up to IDEMPOTENCY_WAIT_SECONDS) instead of running in parallel.
+  If it is still running after that, the duplicate gets 409 and Retry-After.
+- 2xx-4xx responses are stored. On a 5xx or an unexpected error the key is
+  released, so a retry runs again.
+- A request that dies mid-way (process killed) holds the key only until
+  locked_until. After that the next retry takes over.
+
+Records expire IDEMPOTENCY_TTL_HOURS after the first request. Requests
+without the header behave exactly as before. Like services/coalescing.py
+this runs inside the handler, after authentication.
+idempotent_requests_total{route,outcome} counts new, replayed, waited,
+conflict and mismatch requests.
+
+Usage:
+    @router.post("/things")
+    async def create_thing(body: ThingIn, request: Request, user: dict = Depends(require_operator), db=Depends(get_db)):
+        async def create():
+            return json_response(await ThingService(db).create(body), status_code=201)
+        return await idempotent(request, db, user["email"], create)
+"""
+
+import asyncio
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from bson import Binary
+from fastapi import HTTPException, Request, Response, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.utils.metrics import IDEMPOTENT_REQUESTS
+from app.utils.serialization import dumps
+
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+KEY_IN_PROGRESS = "in_progress"
+KEY_DONE = "done"
+
+_VALID_KEY = re.compile(r"^[\x21-\x7e]{1,255}$")
+# Response headers worth replaying; the rest are per-response (request id, timing, ...)
+REPLAYED_HEADERS = ("location", "etag", "content-encoding")
+POLL_INITIAL_SECONDS = 0.05
+POLL_MAX_SECONDS = 0.5
+
+
+def _route(request: Request) -> str:
+    return getattr(request.scope.get("route"), "path", request.url.path)
+
+
+async def _fingerprint(request: Request) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {_route(request)}\n".encode())
+    digest.update(await request.body())
+    return digest.hexdigest()
+
+
+def _stored_response(response: Response) -> Dict[str, Any]:
+    return {
+        "status_code": response.status_code,
+        "body": Binary(bytes(response.body)),
+        "media_type": response.headers.get("content-type"),
+        "headers": {k: v for k, v in response.headers.items() if k in REPLAYED_HEADERS},
+    }
+
+
+def _error_response(exc: HTTPException) -> Response:
+    return Response(
+        content=dumps({"detail": exc.detail}),
+        status_code=exc.status_code,
+        headers=exc.headers,
+        media_type="application/json",
+    )
+
+
+def _replay(stored: Dict[str, Any]) -> Response:
+    headers = dict(stored.get("headers") or {})
+    headers[REPLAYED_HEADER] = "true"
+    if stored.get("media_type"):
+        headers["content-type"] = stored["media_type"]
+    return Response(content=bytes(stored["body"]), status_code=stored["status_code"], headers=headers)
+
+
+class IdempotencyStore:
+    """
+    Claims, completes and replays idempotency keys in MongoDB.
+
+    Args:
+        db: MongoDB database instance
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.keys = db[IDEMPOTENCY_COLLECTION]
+
+    async def claim(self, record_id: str, route: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Take the key for this request.
+
+        Returns:
+            Optional[dict]: None if this request now owns the key, otherwise
+            the existing record (done, or still held by another request)
+        """
+        now = datetime.utcnow()
+        locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+        try:
+            await self.keys.insert_one({
+                "_id": record_id,
+                "route": route,
+                "fingerprint": fingerprint,
+                "status": KEY_IN_PROGRESS,
+                "locked_until": locked_until,
+                "created_at": now,
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        # Take over from a request that died while holding the key
+        taken = await self.keys.find_one_and_update(
+            {
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "status": KEY_IN_PROGRESS,
+                "locked_until": {"$lt": now},
+            },
+            {"$set": {"locked_until": locked_until}},
+        )
+        if taken is not None:
+            return None
+        existing = await self.keys.find_one({"_id": record_id})
+        if existing is None:
+            # Released (or expired) in the meantime; try once more
+            return await self.claim(record_id, route, fingerprint)
+        return existing
+
+    async def complete(self, record_id: str, response: Response) -> None:
+        await self.keys.update_one(
+            {"_id": record_id},
+            {"$set": {"status": KEY_DONE, "response": _stored_response(response)}, "$unset": {"locked_until": ""}},
+        )
+
+    async def release(self, record_id: str) -> None:
+        await self.keys.delete_one({"_id": record_id, "status": KEY_IN_PROGRESS})
+
+    async def wait(self, record_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Poll until the record is done, released or `timeout` passes.
+
+        Returns:
+            Optional[dict]: Latest record (None if it was released)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = POLL_INITIAL_SECONDS
+        while True:
+            record = await self.keys.find_one({"_id": record_id})
+            if record is None or record["status"] == KEY_DONE or loop.time() >= deadline:
+                return record
+            await asyncio.sleep(min(delay, max(0.0, deadline - loop.time())))
+            delay = min(delay * 2, POLL_MAX_SECONDS)
+
+
+async def idempotent(
+    request: Request,
+    db: AsyncIOMotorDatabase,
+    owner: str,
+    compute: Callable[[], Awaitable[Response]],
+) -> Response:
+    """
+    Run `compute` at most once per Idempotency-Key and user.
+
+    Args:
+        request: Incoming request (its body and route make up the fingerprint)
+        db: MongoDB database instance
+        owner: Email of the authenticated user the key belongs to
+        compute: Coroutine function performing the request and returning a Response
+
+    Returns:
+        Response: The new response, or the stored one for a replay
+
+    Raises:
+        HTTPException: 400 for a malformed key, 422 if the key was used for a
+            different request, 409 if the first request is still running
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return await compute()
+    if not _VALID_KEY.match(key):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Idempotency-Key header")
+
+    route = _route(request)
+    record_id = f"{owner}:{key}"
+    fingerprint = await _fingerprint(request)
+    store = IdempotencyStore(db)
+
+    existing = await store.claim(record_id, route, fingerprint)
+    if existing is not None:
+        if existing["fingerprint"] != fingerprint:
+            IDEMPOTENT_REQUESTS.labels(route=route, outcome="mismatch").inc()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if existing["status"] != KEY_DONE:
+            existing = await store.wait(record_id, settings.IDEMPOTENCY_WAIT_SECONDS)
+            if existing is None:
+                # The first request failed and released the key: this one runs it
+                return await idempotent(request, db, owner, compute)
+            if existing["status"] != KEY_DONE:
+                IDEMPOTENT_REQUESTS.labels(route=route, outcome="conflict").inc()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still being processed",
+                    headers={"Retry-After": "1"},
+                )
+            IDEMPOTENT_REQUESTS.labels(route=route, outcome="waited").inc()
+        else:
+            IDEMPOTENT_REQUESTS.labels(route=route, outcome="replayed").inc()
+        return _replay(existing["response"])
+
+    IDEMPOTENT_REQUESTS.labels(route=route, outcome="new").inc()
+    try:
+        response = await compute()
+    except HTTPException as exc:
+        if exc.status_code < 500:
+            await store.complete(record_id, _error_response(exc))
+        else:
+            await store.release(record_id)
+        raise
+    except BaseException:
+        # Includes cancellation: a retry must be able to run the request again
+        await asyncio.shield(store.release(record_id))
+        raise
+
+    if response.status_code < 500:
+        await store.complete(record_id, response)
+    else:
+        await store.release(record_id)
+    return response
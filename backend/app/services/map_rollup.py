@@ -0,0 +1,138 @@
+# backend/app/services/map_rollup.py
+"""
+Precomputed farmer counts per map tile for server-side clustering.
+
+`farmer_tile_counts` holds one document per non-empty quadkey tile at every
+zoom level in MAP_TILE_MIN_ZOOM..MAP_TILE_MAX_ZOOM:
+
+    {"_id": "30021", "z": 5, "x": 18, "y": 17,
+     "count": 412, "sum_lat": -4898.1, "sum_lng": 11872.3}
+
+sum_lat / sum_lng give each cluster's centroid without storing points.
+Writes keep it current incrementally: every farmer write that moves,
+adds or removes a location emits $inc operations (rollup_ops) for the old
+and new tiles. Concurrent writers can make counts drift slightly; run
+scripts/rebuild_tile_rollup.py to recompute from scratch.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.utils.geo_utils import lat_lng_to_tile, tile_to_quadkey
+
+
+ROLLUP_COLLECTION = "farmer_tile_counts"
+
+# Bins are this many zoom levels finer than the map, i.e. 4x4 clusters per
+# 256px tile on screen
+CLUSTER_PRECISION = 2
+
+
+def _tiles(location: Dict[str, Any]) -> Iterable[Tuple[str, int, int, int]]:
+    longitude, latitude = location["coordinates"]
+    for zoom in range(settings.MAP_TILE_MIN_ZOOM, settings.MAP_TILE_MAX_ZOOM + 1):
+        x, y = lat_lng_to_tile(latitude, longitude, zoom)
+        yield tile_to_quadkey(x, y, zoom), zoom, x, y
+
+
+def rollup_ops(
+    old_location: Optional[Dict[str, Any]],
+    new_location: Optional[Dict[str, Any]],
+) -> List[UpdateOne]:
+    """
+    Tile count updates for a farmer whose location changed.
+
+    Args:
+        old_location: GeoJSON point before the write (None if none/new farmer)
+        new_location: GeoJSON point after the write (None if removed/deleted)
+
+    Returns:
+        List[UpdateOne]: Operations for a bulk_write on farmer_tile_counts
+    """
+    if old_location == new_location:
+        return []
+
+    deltas: Dict[str, List] = {}
+    for location, sign in ((old_location, -1), (new_location, 1)):
+        if not location:
+            continue
+        longitude, latitude = location["coordinates"]
+        for quadkey, zoom, x, y in _tiles(location):
+            entry = deltas.setdefault(quadkey, [zoom, x, y, 0, 0.0, 0.0])
+            entry[3] += sign
+            entry[4] += sign * latitude
+            entry[5] += sign * longitude
+
+    return [
+        UpdateOne(
+            {"_id": quadkey},
+            {
+                "$inc": {"count": count, "sum_lat": sum_lat, "sum_lng": sum_lng},
+                "$setOnInsert": {"z": zoom, "x": x, "y": y},
+            },
+            upsert=True,
+        )
+        for quadkey, (zoom, x, y, count, sum_lat, sum_lng) in deltas.items()
+        # A move inside the same tile changes only the centroid sums
+        if count or sum_lat or sum_lng
+    ]
+
+
+def cluster_zoom(map_zoom: int) -> int:
+    """Rollup zoom level used to serve a map at `map_zoom`."""
+    return max(settings.MAP_TILE_MIN_ZOOM, min(settings.MAP_TILE_MAX_ZOOM, map_zoom + CLUSTER_PRECISION))
+
+
+async def apply_rollup(db, ops: List[UpdateOne]) -> None:
+    """Apply rollup operations (Motor)."""
+    if ops:
+        await db[ROLLUP_COLLECTION].bulk_write(ops, ordered=False)
+
+
+async def query_clusters(
+    db,
+    map_zoom: int,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    limit: int = 5000,
+) -> Dict[str, Any]:
+    """
+    Clusters visible in a bounding box.
+
+    Args:
+        db: Motor database
+        map_zoom: Current map zoom level
+        min_lat, min_lng, max_lat, max_lng: Viewport bounds
+
+    Returns:
+        dict: Rollup zoom used and clusters with centroid and count
+    """
+    zoom = cluster_zoom(map_zoom)
+    # Tile y grows southwards
+    x_min, y_min = lat_lng_to_tile(max_lat, min_lng, zoom)
+    x_max, y_max = lat_lng_to_tile(min_lat, max_lng, zoom)
+
+    cursor = db[ROLLUP_COLLECTION].find(
+        {
+            "z": zoom,
+            "x": {"$gte": x_min, "$lte": x_max},
+            "y": {"$gte": y_min, "$lte": y_max},
+            "count": {"$gt": 0},
+        },
+        {"count": 1, "sum_lat": 1, "sum_lng": 1},
+    ).limit(limit)
+
+    clusters = []
+    async for cell in cursor:
+        count = cell["count"]
+        clusters.append({
+            "quadkey": cell["_id"],
+            "count": count,
+            "lat": round(cell["sum_lat"] / count, 6),
+            "lng": round(cell["sum_lng"] / count, 6),
+        })
+    return {"zoom": zoom, "clusters": clusters}
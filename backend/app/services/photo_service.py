@@ -2,6 +2,9 @@
 import os
 from fastapi import HTTPException, UploadFile
 from app.config import settings
+from app.services.farmer_service import invalidate_farmer_caches
+from app.utils.metrics import record_upload
+from datetime import datetime
 from pathlib import Path
 
 
@@ -53,6 +56,7 @@ class PhotoService:
                 )
             with open(file_path, "wb") as f:
                 f.write(contents)
+            record_upload("photo", len(contents))
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Failed to save photo: {str(e)}"
@@ -64,7 +68,9 @@ class PhotoService:
         # Update MongoDB
         await db.farmers.update_one(
             {"farmer_id": farmer_id},
-            {"$set": {"documents.photo": relative_path}}
+            {"$set": {"documents.photo": relative_path, "updated_at": datetime.utcnow()},
+             "$inc": {"version": 1}}
         )
+        await invalidate_farmer_caches(farmer_id)
 
         return {"message": "Photo uploaded successfully", "photo_path": relative_path}
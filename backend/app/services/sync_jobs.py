@@ -0,0 +1,218 @@
+# backend/app/services/sync_jobs.py
+"""
+Claim-check storage for offline sync batches.
+
+A sync batch can hold thousands of farmers. Instead of travelling through
+the Celery broker and sitting in the Redis result backend, the payload and
+the per-record results live in MongoDB and Celery only carries the job id:
+
+    sync_jobs          {_id: job_id, submitted_by, status, record_count,
+                        summary: {created: n, ...}, created_at, started_at,
+                        finished_at, error}
+    sync_job_payloads  {job_id, seq, data: zlib(orjson(records[chunk]))}
+    sync_job_results   {job_id, index, temp_id, farmer_id, status, ...}
+
+Payload chunks are compressed blobs, read once by the worker and deleted
+when the job finishes. Results are one document per record so the status
+endpoint can page through them (and filter by status) with an index.
+Everything expires after SYNC_JOB_RETENTION_DAYS.
+
+The API side uses SyncJobService (Motor); the worker side uses the
+module-level functions, which take a pymongo database.
+"""
+
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+from app.utils.serialization import dumps, loads
+
+
+JOBS_COLLECTION = "sync_jobs"
+PAYLOADS_COLLECTION = "sync_job_payloads"
+RESULTS_COLLECTION = "sync_job_results"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Celery-style states for clients of the original status endpoint
+CELERY_STATES = {
+    JOB_QUEUED: "PENDING",
+    JOB_RUNNING: "STARTED",
+    JOB_DONE: "SUCCESS",
+    JOB_FAILED: "FAILURE",
+}
+
+
+def _pack(records: List[dict]) -> Binary:
+    return Binary(zlib.compress(dumps(records), 6))
+
+
+def _unpack(data: bytes) -> List[dict]:
+    return loads(zlib.decompress(data))
+
+
+class SyncJobService:
+    """
+    Create sync jobs and read their status and results.
+
+    Args:
+        db: MongoDB database instance
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.jobs = db[JOBS_COLLECTION]
+        self.payloads = db[PAYLOADS_COLLECTION]
+        self.results = db[RESULTS_COLLECTION]
+
+    async def create_job(self, user_email: str, records: List[dict]) -> str:
+        """
+        Store a batch for processing.
+
+        Args:
+            user_email: Email of the user performing the sync
+            records: Farmer records as submitted
+
+        Returns:
+            str: Job id to hand to process_sync_batch
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        size = settings.SYNC_PAYLOAD_CHUNK_SIZE
+        chunks = [
+            {"job_id": job_id, "seq": seq, "data": _pack(records[start:start + size]), "created_at": now}
+            for seq, start in enumerate(range(0, len(records), size))
+        ]
+        if chunks:
+            await self.payloads.insert_many(chunks, ordered=False)
+        # The job document goes last: a job never exists without its payload
+        await self.jobs.insert_one({
+            "_id": job_id,
+            "submitted_by": user_email,
+            "status": JOB_QUEUED,
+            "record_count": len(records),
+            "created_at": now,
+        })
+        return job_id
+
+    async def mark_failed(self, job_id: str, error: str) -> bool:
+        """
+        Fail a job that never reached the worker (e.g. the broker was down).
+        A worker skips failed jobs, so a message delivered late does no harm.
+
+        Returns:
+            bool: False if a worker already claimed the job, i.e. it was queued after all
+        """
+        result = await self.jobs.update_one(
+            {"_id": job_id, "status": JOB_QUEUED},
+            {"$set": {"status": JOB_FAILED, "error": error, "finished_at": datetime.utcnow()}},
+        )
+        return result.modified_count == 1
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job document, or None if unknown or expired."""
+        return await self.jobs.find_one({"_id": job_id})
+
+    async def list_results(
+        self,
+        job_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Page through a job's per-record results in input order.
+
+        Returns:
+            Tuple[int, List[dict]]: Total matching results and the requested page
+        """
+        query: Dict[str, Any] = {"job_id": job_id}
+        if status:
+            query["status"] = status
+        total = await self.results.count_documents(query)
+        page = await (
+            self.results.find(query, {"_id": 0, "job_id": 0, "created_at": 0})
+            .sort("index", 1)
+            .skip(skip)
+            .limit(limit)
+            .to_list(length=limit)
+        )
+        return total, page
+
+
+# ============================================
+# Worker side (pymongo)
+# ============================================
+
+def start_job(db, job_id: str) -> Optional[Tuple[Dict[str, Any], List[dict]]]:
+    """
+    Mark a job running and load its records.
+
+    Queued jobs are claimed, and so are running ones (a message redelivered
+    after a worker died). Done and failed jobs are left alone.
+
+    Returns:
+        Optional[tuple]: (job, records), or None if the job is already done or
+            failed (a redelivered message, or one that arrived after the API
+            gave up on it); the message should just be acked
+
+    Raises:
+        LookupError: If the job or its payload is gone (expired)
+    """
+    job = db[JOBS_COLLECTION].find_one_and_update(
+        {"_id": job_id, "status": {"$in": [JOB_QUEUED, JOB_RUNNING]}},
+        {"$set": {"status": JOB_RUNNING, "started_at": datetime.utcnow()}},
+    )
+    if job is None:
+        if db[JOBS_COLLECTION].find_one({"_id": job_id}, {"_id": 1}) is not None:
+            return None
+        raise LookupError(f"Sync job {job_id} not found")
+
+    records: List[dict] = []
+    chunks = db[PAYLOADS_COLLECTION].find({"job_id": job_id}).sort("seq", 1)
+    for chunk in chunks:
+        records.extend(_unpack(chunk["data"]))
+    if len(records) != job["record_count"]:
+        raise LookupError(f"Payload of sync job {job_id} is incomplete")
+    return job, records
+
+
+def finish_job(db, job_id: str, results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Store per-record results, mark the job done and drop its payload.
+
+    Returns:
+        dict: Record count per result status
+    """
+    now = datetime.utcnow()
+    # A redelivered task must not duplicate results
+    db[RESULTS_COLLECTION].delete_many({"job_id": job_id})
+    if results:
+        db[RESULTS_COLLECTION].insert_many(
+            [{"job_id": job_id, "index": index, "created_at": now, **result} for index, result in enumerate(results)],
+            ordered=False,
+        )
+    summary = dict(Counter(result["status"] for result in results))
+    db[JOBS_COLLECTION].update_one(
+        {"_id": job_id},
+        {"$set": {"status": JOB_DONE, "summary": summary, "finished_at": now}},
+    )
+    db[PAYLOADS_COLLECTION].delete_many({"job_id": job_id})
+    return summary
+
+
+def fail_job(db, job_id: str, error: str) -> None:
+    """Record a job that could not be processed; its payload is kept for inspection."""
+    db[JOBS_COLLECTION].update_one(
+        # Never overwrite the outcome of a job that finished
+        {"_id": job_id, "status": {"$ne": JOB_DONE}},
+        {"$set": {"status": JOB_FAILED, "error": error, "finished_at": datetime.utcnow()}},
+    )
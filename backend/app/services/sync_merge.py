@@ -0,0 +1,247 @@
+# backend/app/services/sync_merge.py
+"""
+Field-level merge of offline sync records into stored farmers.
+
+Every write stamps the leaf fields it changes with the document version
+it produces, in `field_versions` (a mirror of the document's shape):
+
+    {
+        "version": 7,
+        "personal_info": {"phone_primary": "+260977000000", ...},
+        "field_versions": {"personal_info": {"phone_primary": 7, ...}, ...}
+    }
+
+A device syncs a record it edited from `base_version`. For each field it
+submits:
+- equal to the stored value          -> nothing to do
+- stamped at or before base_version  -> only the device changed it: applied
+- stamped after base_version         -> changed on both sides: a conflict
+
+Devices that send whole records should list the fields they edited in
+`changed_fields`; otherwise every differing field counts as edited, and
+a server-side edit shows up as a conflict with the device's stale copy.
+
+Conflicting fields keep the server value and are queued in
+`sync_conflicts` for review; the rest of the record is still applied.
+Fields without a stamp (written before stamping existed) count as changed
+at the document's current version. Records without base_version keep
+last-writer-wins for every field they submit.
+
+The stamps are per-document logical clocks, not wall-clock times, so the
+clock skew of offline devices cannot reorder edits. Merging does no I/O:
+a sync batch is merged in memory and written with one bulk_write.
+"""
+
+import copy
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.crypto_utils import hmac_hash
+from app.utils.doc_diff import flatten, get_path
+from app.utils.geo_utils import location_update
+
+
+FIELD_VERSIONS = "field_versions"
+CONFLICTS_COLLECTION = "sync_conflicts"
+CONFLICT_OPEN = "open"
+CONFLICT_RESOLVED = "resolved"
+
+# Bookkeeping fields are never merged; derived ones are recomputed
+BOOKKEEPING_FIELDS = {
+    "_id", "temp_id", "farmer_id", "version", FIELD_VERSIONS,
+    "created_at", "created_by", "updated_at", "last_modified_by", "registration_status",
+}
+DERIVED_FIELDS = {"location", "nrc_hash"}
+
+
+@dataclass
+class MergeResult:
+    """Outcome of merging one record: fields to write and fields in conflict."""
+
+    applied: Dict[str, Any] = field(default_factory=dict)
+    conflicts: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def mergeable_changes(
+    record: Dict[str, Any],
+    changed_fields: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Leaf fields of a sync record that take part in merging, by dot path.
+
+    Args:
+        record: Sync record
+        changed_fields: Paths (or parent paths) the device edited; None means all
+    """
+    prefixes = tuple(f"{path}." for path in changed_fields) if changed_fields is not None else None
+    exact = set(changed_fields or ())
+    return {
+        path: value
+        for path, value in flatten(record).items()
+        if value is not None
+        and path.split(".", 1)[0] not in BOOKKEEPING_FIELDS | DERIVED_FIELDS
+        and (prefixes is None or path in exact or path.startswith(prefixes))
+    }
+
+
+def field_stamp(doc: Dict[str, Any], path: str) -> int:
+    """
+    Version at which `path` last changed.
+
+    A stamp on an ancestor covers its whole subtree; a path whose stamps
+    are a subtree gets the newest of them. Unstamped paths fall back to
+    the document version.
+    """
+    stamps: Any = doc.get(FIELD_VERSIONS)
+    for part in path.split("."):
+        if not isinstance(stamps, dict) or part not in stamps:
+            return doc.get("version", 0)
+        stamps = stamps[part]
+        if isinstance(stamps, int):
+            return stamps
+    if isinstance(stamps, dict):
+        return max((v for v in flatten(stamps).values() if isinstance(v, int)), default=doc.get("version", 0))
+    return doc.get("version", 0)
+
+
+def merge_record(
+    current: Dict[str, Any],
+    changes: Dict[str, Any],
+    base_version: Optional[int],
+) -> MergeResult:
+    """
+    Merge submitted fields into the current document.
+
+    Args:
+        current: Stored document ({} if it does not exist yet)
+        changes: Submitted leaf values by dot path (see mergeable_changes)
+        base_version: Version the device edited; None means last-writer-wins
+
+    Returns:
+        MergeResult: Fields to apply and per-field conflicts
+    """
+    result = MergeResult()
+    for path, submitted in changes.items():
+        stored = get_path(current, path)
+        if stored == submitted:
+            continue
+        if base_version is None or field_stamp(current, path) <= base_version:
+            result.applied[path] = submitted
+        else:
+            result.conflicts.append({"field": path, "current": stored, "submitted": submitted})
+    result.conflicts.sort(key=lambda entry: entry["field"])
+    return result
+
+
+def _nest(target: Dict[str, Any], parts: List[str], value: Any) -> None:
+    for part in parts[:-1]:
+        child = target.get(part)
+        if not isinstance(child, dict):
+            child = target[part] = {}
+        target = child
+    target[parts[-1]] = value
+
+
+def set_ops(doc: Dict[str, Any], values: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    `$set` entries writing dot-path `values` into `doc`.
+
+    MongoDB cannot create a field inside a null or scalar, so a path whose
+    parent is not a sub-document is written as a nested value at the
+    first ancestor that is missing or not a dict.
+    """
+    ops: Dict[str, Any] = {}
+    for path, value in values.items():
+        parts = path.split(".")
+        node, depth = doc, 0
+        while depth < len(parts) - 1 and isinstance(node, dict) and isinstance(node.get(parts[depth]), dict):
+            node = node[parts[depth]]
+            depth += 1
+        key = prefix + ".".join(parts[:depth + 1])
+        rest = parts[depth + 1:]
+        if rest:
+            if not isinstance(ops.get(key), dict):
+                ops[key] = {}
+            _nest(ops[key], rest, value)
+        else:
+            ops[key] = value
+    return ops
+
+
+def stamp_tree(paths: Iterable[str], version: int) -> Dict[str, Any]:
+    """`field_versions` for a new document: every path stamped with `version`."""
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        _nest(tree, path.split("."), version)
+    return tree
+
+
+def apply_paths(doc: Dict[str, Any], values: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of `doc` with dot-path `values` written in."""
+    merged = copy.deepcopy(doc)
+    for path, value in values.items():
+        _nest(merged, path.split("."), value)
+    return merged
+
+
+def merge_update(
+    current: Dict[str, Any],
+    applied: Dict[str, Any],
+    user_email: str,
+    now: datetime,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Update document writing `applied` into `current` as version + 1.
+
+    Derived fields (GeoJSON location, NRC hash) are recomputed from the
+    merged values. The caller guards the write on current's version.
+
+    Returns:
+        Tuple[dict, dict]: The update document and the merged document
+    """
+    new_version = current.get("version", 0) + 1
+    merged = apply_paths(current, applied)
+    fields = set_ops(current, applied)
+    fields.update(set_ops(current.get(FIELD_VERSIONS) or {}, {path: new_version for path in applied}, f"{FIELD_VERSIONS}."))
+    fields["updated_at"] = now
+    fields["last_modified_by"] = user_email
+    update: Dict[str, Any] = {"$set": fields, "$inc": {"version": 1}}
+
+    if any(path.startswith("address.") for path in applied):
+        location_set, location_unset = location_update(merged.get("address"))
+        fields.update(location_set)
+        merged.update(location_set)
+        if location_unset:
+            update["$unset"] = location_unset
+            merged.pop("location", None)
+    if any(path in ("personal_info.nrc", "nrc_number") for path in applied):
+        nrc = get_path(merged, "personal_info.nrc") or merged.get("nrc_number")
+        if nrc:
+            fields["nrc_hash"] = merged["nrc_hash"] = hmac_hash(nrc, salt="nrc")
+
+    merged["version"] = new_version
+    return update, merged
+
+
+def conflict_entry(
+    current: Dict[str, Any],
+    record: Dict[str, Any],
+    conflicts: List[Dict[str, Any]],
+    base_version: Optional[int],
+    user_email: str,
+    now: datetime,
+) -> Dict[str, Any]:
+    """Review-queue document for the conflicting fields of one sync record."""
+    return {
+        "_id": uuid.uuid4().hex,
+        "farmer_id": current.get("farmer_id"),
+        "temp_id": record.get("temp_id"),
+        "submitted_by": user_email,
+        "base_version": base_version,
+        "server_version": current.get("version", 0),
+        "conflicts": conflicts,
+        "status": CONFLICT_OPEN,
+        "created_at": now,
+    }
@@ -0,0 +1,184 @@
+# backend/app/services/sync_progress.py
+"""
+Live progress of sync jobs through Redis.
+
+The worker keeps a snapshot per job in a Redis hash and publishes every
+change on a per-job channel:
+
+    sync:progress:<job_id>   hash  {state, total, done, created, updated, ...}
+    sync:events:<job_id>     pub/sub channel carrying the same snapshot as JSON
+
+Snapshots are throttled to a few per second and expire an hour after the
+last update; the final outcome lives on in sync_jobs (services/sync_jobs.py).
+Redis is best effort on both sides: a worker that cannot publish keeps
+syncing, and readers fall back to the job document.
+
+The API reads everything through redis.asyncio, so status polls and event
+streams never block the event loop on the broker.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.utils.serialization import dumps, loads
+
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TTL_SECONDS = 3600
+PUBLISH_INTERVAL_SECONDS = 0.5
+# Comment lines keep proxies from closing idle event streams
+HEARTBEAT_SECONDS = 15
+TERMINAL_STATES = {"done", "failed"}
+
+
+def _progress_key(job_id: str) -> str:
+    return f"sync:progress:{job_id}"
+
+
+def _channel(job_id: str) -> str:
+    return f"sync:events:{job_id}"
+
+
+# ============================================
+# Worker side
+# ============================================
+class ProgressReporter:
+    """
+    Publishes a sync job's progress from the worker.
+
+    Args:
+        client: Blocking Redis client
+        job_id: Sync job id
+        total: Records in the job
+    """
+
+    def __init__(self, client: redis.Redis, job_id: str, total: int) -> None:
+        self.client = client
+        self.job_id = job_id
+        self.total = total
+        self._published_at = 0.0
+
+    def report(self, results: Iterable[Optional[Dict[str, Any]]], state: str = "running", force: bool = False) -> None:
+        """
+        Publish counts of the results settled so far.
+
+        Args:
+            results: Per-record results, None for records not done yet
+            state: Job state to report
+            force: Publish even if the last update was very recent
+        """
+        now = time.monotonic()
+        if not force and now - self._published_at < PUBLISH_INTERVAL_SECONDS:
+            return
+        self._published_at = now
+
+        counts = Counter(result["status"] for result in results if result is not None)
+        snapshot = {"job_id": self.job_id, "state": state, "total": self.total, "done": sum(counts.values()), **counts}
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(_progress_key(self.job_id))
+            pipe.hset(_progress_key(self.job_id), mapping={k: v for k, v in snapshot.items() if k != "job_id"})
+            pipe.expire(_progress_key(self.job_id), PROGRESS_TTL_SECONDS)
+            pipe.publish(_channel(self.job_id), dumps(snapshot))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not publish progress of sync job {self.job_id}: {e}")
+
+
+_sync_redis: Optional[redis.Redis] = None
+
+
+def get_progress_reporter(job_id: str, total: int) -> ProgressReporter:
+    """Reporter for a job, sharing one blocking client per worker process."""
+    global _sync_redis
+    if _sync_redis is None:
+        _sync_redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return ProgressReporter(_sync_redis, job_id, total)
+
+
+# ============================================
+# API side
+# ============================================
+_redis: Optional[aioredis.Redis] = None
+
+
+def _get_redis() -> aioredis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(settings.REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return _redis
+
+
+def _decode_snapshot(job_id: str, raw: Dict[bytes, bytes]) -> Dict[str, Any]:
+    snapshot: Dict[str, Any] = {"job_id": job_id}
+    for key, value in raw.items():
+        key, value = key.decode(), value.decode()
+        snapshot[key] = int(value) if value.isdigit() else value
+    return snapshot
+
+
+async def read_progress(job_id: str) -> Optional[Dict[str, Any]]:
+    """Latest progress snapshot, or None if none was published (or Redis is down)."""
+    try:
+        raw = await _get_redis().hgetall(_progress_key(job_id))
+    except Exception as e:
+        logger.warning(f"Could not read progress of sync job {job_id}: {e}")
+        return None
+    return _decode_snapshot(job_id, raw) if raw else None
+
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def stream_progress(
+    job_id: str,
+    fallback: Callable[[], Awaitable[Dict[str, Any]]],
+) -> AsyncIterator[bytes]:
+    """
+    Server-Sent Events for a job until it finishes.
+
+    Subscribes before reading the snapshot so no update falls in between,
+    and re-reads the snapshot on every heartbeat in case one was missed.
+
+    Args:
+        job_id: Sync job id
+        fallback: Loads a snapshot from the job document, used whenever
+            Redis has none (not started yet, expired, Redis restarted)
+
+    Yields:
+        bytes: `progress` events, then one `done` event with the final snapshot
+    """
+    # Pub/sub connections idle between updates; no read timeout here
+    client = aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=1, health_check_interval=30)
+    try:
+        async with client.pubsub() as pubsub:
+            await pubsub.subscribe(_channel(job_id))
+            snapshot = await read_progress(job_id) or await fallback()
+            while True:
+                if snapshot.get("state") in TERMINAL_STATES:
+                    yield _sse("done", snapshot)
+                    return
+                yield _sse("progress", snapshot)
+
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=HEARTBEAT_SECONDS)
+                if message is not None:
+                    snapshot = loads(message["data"])
+                    continue
+                yield b": heartbeat\n\n"
+                snapshot = await read_progress(job_id) or await fallback()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Progress stream of sync job {job_id} interrupted: {e}")
+        yield _sse("error", {"job_id": job_id, "detail": "Progress stream interrupted; poll /api/sync/status"})
+    finally:
+        await client.aclose()
@@ -0,0 +1,208 @@
+# backend/app/services/task_dispatch.py
+"""
+Non-blocking Celery dispatch and task state for async routes.
+
+`task.apply_async()` and `AsyncResult()` are blocking Redis round-trips;
+called from a route they stall the event loop, and with it every other
+request, for as long as the broker hangs. Routes go through this facade
+instead:
+
+    from app.services.task_dispatch import get_task_dispatcher
+
+    task_id = await get_task_dispatcher().dispatch(process_sync_batch, args=[job_id])
+    state, result = await get_task_dispatcher().status(task_id)
+
+- Enqueuing runs on a small dedicated thread pool (TASK_DISPATCH_POOL_SIZE),
+  matched by Celery's broker connection pool, so a slow broker ties up
+  at most those threads.
+- Every call is bounded by TASK_DISPATCH_TIMEOUT_SECONDS.
+- A circuit breaker opens after TASK_CIRCUIT_FAILURE_THRESHOLD consecutive
+  failures. While it is open, calls fail at once with 503 and Retry-After
+  rather than each waiting out the timeout. After TASK_CIRCUIT_RESET_SECONDS
+  a single trial call decides whether it closes again.
+- Task state is read straight from the Redis result backend with
+  redis.asyncio.
+
+celery_task_dispatches_total{task,outcome} and celery_dispatch_circuit_open
+show broker trouble from the API side.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Optional, Sequence, Tuple
+
+import redis.asyncio as aioredis
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.utils.metrics import TASK_DISPATCHES, TASK_DISPATCH_CIRCUIT_OPEN
+from app.utils.serialization import loads
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one event loop.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_seconds: Time open before a single trial call is allowed
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def retry_after(self) -> int:
+        """Seconds until the next trial call."""
+        return max(1, int(self.opened_at + self.reset_seconds - time.monotonic()) + 1)
+
+    def allow(self) -> bool:
+        """True if a call may go ahead (the one trial call when half-open)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("Task broker reachable again, closing circuit")
+        self.state = CLOSED
+        self.failures = 0
+        TASK_DISPATCH_CIRCUIT_OPEN.set(0)
+
+    def release_trial(self) -> None:
+        """A half-open trial ended without a verdict (cancelled); the next call becomes the trial."""
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.error(f"Task broker failing ({self.failures} consecutive errors), opening circuit")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            TASK_DISPATCH_CIRCUIT_OPEN.set(1)
+
+
+class TaskDispatcher:
+    """Enqueues Celery tasks and reads their state without blocking the loop."""
+
+    def __init__(
+        self,
+        timeout: float,
+        pool_size: int,
+        breaker: CircuitBreaker,
+    ) -> None:
+        self.timeout = timeout
+        self.breaker = breaker
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="task-dispatch")
+        self._redis = aioredis.from_url(
+            settings.REDIS_URL,
+            max_connections=pool_size * 4,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+        )
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Background task queue is unavailable, try again shortly",
+            headers={"Retry-After": str(self.breaker.retry_after())},
+        )
+
+    async def _guarded(self, label: str, call) -> Any:
+        if not self.breaker.allow():
+            TASK_DISPATCHES.labels(task=label, outcome="rejected").inc()
+            raise self._unavailable()
+        try:
+            result = await asyncio.wait_for(call(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+        except asyncio.CancelledError:
+            # The caller went away; that says nothing about the broker
+            self.breaker.release_trial()
+            raise
+        except Exception as e:
+            logger.error(f"Task broker call for {label} failed: {e}")
+            outcome = "error"
+        else:
+            self.breaker.record_success()
+            TASK_DISPATCHES.labels(task=label, outcome="ok").inc()
+            return result
+        self.breaker.record_failure()
+        TASK_DISPATCHES.labels(task=label, outcome=outcome).inc()
+        raise self._unavailable()
+
+    async def dispatch(
+        self,
+        task,
+        args: Optional[Sequence[Any]] = None,
+        kwargs: Optional[dict] = None,
+        **options: Any,
+    ) -> str:
+        """
+        Enqueue a Celery task.
+
+        Args:
+            task: Celery task object
+            args: Positional task arguments
+            kwargs: Keyword task arguments
+            **options: apply_async options (task_id, queue, countdown, ...)
+
+        Returns:
+            str: Task id
+
+        Raises:
+            HTTPException: 503 if the broker is unreachable, slow or the circuit is open.
+                After a timeout the enqueue thread may still deliver the message,
+                so the task must cope with being run anyway (see
+                routes/sync.py queue_sync_batch and sync_jobs.start_job).
+        """
+        # Fail fast inside the thread too, so it is not held by kombu's retries
+        options.setdefault("retry_policy", {"max_retries": 1, "interval_start": 0, "interval_step": 0.2})
+        apply = partial(task.apply_async, args=args, kwargs=kwargs, **options)
+        loop = asyncio.get_running_loop()
+        result = await self._guarded(task.name, lambda: loop.run_in_executor(self._executor, apply))
+        return result.id
+
+    async def status(self, task_id: str) -> Tuple[str, Any]:
+        """
+        State and result of a task from the Redis result backend.
+
+        Returns:
+            Tuple[str, Any]: ("PENDING", None) for unknown or expired tasks
+
+        Raises:
+            HTTPException: 503 if Redis is unreachable, slow or the circuit is open
+        """
+        raw = await self._guarded("status", lambda: self._redis.get(f"celery-task-meta-{task_id}"))
+        if not raw:
+            return "PENDING", None
+        meta = loads(raw)
+        return meta.get("status", "PENDING"), meta.get("result")
+
+
+@lru_cache()
+def get_task_dispatcher() -> TaskDispatcher:
+    """Process-wide dispatcher (one thread pool, connection pool and breaker)."""
+    return TaskDispatcher(
+        timeout=settings.TASK_DISPATCH_TIMEOUT_SECONDS,
+        pool_size=settings.TASK_DISPATCH_POOL_SIZE,
+        breaker=CircuitBreaker(settings.TASK_CIRCUIT_FAILURE_THRESHOLD, settings.TASK_CIRCUIT_RESET_SECONDS),
+    )
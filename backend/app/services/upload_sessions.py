@@ -0,0 +1,296 @@
+# backend/app/services/upload_sessions.py
+"""
+Resumable uploads for sync batches, photos and documents.
+
+A large body sent over a flaky link is split into chunks the client can
+resend individually. The protocol (routes/uploads.py) is:
+
+    POST   /uploads/sessions                   declare kind, total length, target
+    PATCH  /uploads/sessions/{id}              one chunk; Upload-Offset says where it starts
+    HEAD   /uploads/sessions/{id}              Upload-Offset to resume from after a failure
+    POST   /uploads/sessions/{id}/finalize     hand the assembled body to the sync/photo paths
+    DELETE /uploads/sessions/{id}              abort
+
+State lives in MongoDB, so a client can resume against any API instance:
+
+    upload_sessions  {_id: upload_id, owner, kind, length, offset, status,
+                      farmer_id, document_type, filename, content_type,
+                      content_encoding, sha256, result, created_at, expires_at}
+    upload_chunks    {upload_id, offset, data, created_at}
+
+A chunk is stored before the session offset moves past it. The offset
+only moves with a guard on its old value, so a chunk that is retried or
+sent twice is never applied twice. If the assembled body turns out bad
+(sha256 mismatch, chunks missing) the session is reset to offset 0 so the
+client can send it again. Finalize claims the session under a token and
+a lease of FINALIZE_LEASE_SECONDS that is renewed while it works
+(hold_finalize); only the claim holder can complete or reopen it. A
+finalize that dies mid-way stops renewing, and once the lease runs out
+finalize can be retried. Sessions and chunks expire
+UPLOAD_SESSION_TTL_HOURS after the session was created.
+"""
+
+import asyncio
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from bson import Binary
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.config import settings
+
+
+SESSIONS_COLLECTION = "upload_sessions"
+CHUNKS_COLLECTION = "upload_chunks"
+
+KIND_SYNC_BATCH = "sync_batch"
+KIND_PHOTO = "photo"
+KIND_DOCUMENT = "document"
+UPLOAD_KINDS = (KIND_SYNC_BATCH, KIND_PHOTO, KIND_DOCUMENT)
+
+SESSION_OPEN = "open"
+SESSION_FINALIZING = "finalizing"
+SESSION_COMPLETE = "complete"
+
+FINALIZE_LEASE_SECONDS = 300
+FINALIZE_RENEW_SECONDS = FINALIZE_LEASE_SECONDS / 3
+
+
+def offset_conflict(session: Dict[str, Any], detail: str) -> HTTPException:
+    """409 telling the client where to resume."""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=detail,
+        headers={"Upload-Offset": str(session["offset"])},
+    )
+
+
+class UploadSessionService:
+    """
+    Create resumable upload sessions, append chunks and assemble the result.
+
+    Args:
+        db: MongoDB database instance
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.sessions = db[SESSIONS_COLLECTION]
+        self.chunks = db[CHUNKS_COLLECTION]
+
+    async def create(
+        self,
+        owner: str,
+        kind: str,
+        length: int,
+        farmer_id: Optional[str] = None,
+        document_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        content_encoding: Optional[str] = None,
+        sha256: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Open a session.
+
+        Args:
+            owner: Email of the uploading user; only they can continue it
+            kind: One of UPLOAD_KINDS
+            length: Total size of the body in bytes
+            farmer_id: Target farmer (photo and document uploads)
+            document_type: Document slot, e.g. "nrc" (document uploads)
+            filename: Original file name; its extension is kept
+            content_type: Media type of the assembled body
+            content_encoding: "gzip"/"zstd" if the assembled body is compressed
+            sha256: Optional hex digest checked on finalize
+
+        Returns:
+            dict: Session document
+        """
+        now = datetime.utcnow()
+        session = {
+            "_id": uuid.uuid4().hex,
+            "owner": owner,
+            "kind": kind,
+            "length": length,
+            "offset": 0,
+            "status": SESSION_OPEN,
+            "farmer_id": farmer_id,
+            "document_type": document_type,
+            "filename": filename,
+            "content_type": content_type,
+            "content_encoding": content_encoding,
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": now,
+            "expires_at": now + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+        }
+        await self.sessions.insert_one(session)
+        return session
+
+    async def get(self, upload_id: str, owner: str) -> Dict[str, Any]:
+        """
+        Session owned by `owner`.
+
+        Raises:
+            HTTPException: 404 if unknown, expired or someone else's
+        """
+        session = await self.sessions.find_one({"_id": upload_id})
+        if session is None or session["owner"] != owner:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+        return session
+
+    async def append(self, session: Dict[str, Any], offset: int, data: bytes) -> Dict[str, Any]:
+        """
+        Store a chunk starting at `offset` and advance the session.
+
+        Returns:
+            dict: Updated session
+
+        Raises:
+            HTTPException: 409 if the session is not open or the offset is not
+                the current one (Upload-Offset header has the right value),
+                413 if the chunk runs past the declared length
+        """
+        if session["status"] != SESSION_OPEN:
+            raise offset_conflict(session, "Upload session is already finalized")
+        if offset != session["offset"]:
+            raise offset_conflict(session, "Upload-Offset does not match the session offset")
+        if offset + len(data) > session["length"]:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Chunk runs past the declared upload length",
+            )
+        if not data:
+            return session
+
+        # A leftover chunk from an attempt that never advanced the offset is overwritten
+        await self.chunks.replace_one(
+            {"upload_id": session["_id"], "offset": offset},
+            {"upload_id": session["_id"], "offset": offset, "data": Binary(data), "created_at": session["created_at"]},
+            upsert=True,
+        )
+        updated = await self.sessions.find_one_and_update(
+            {"_id": session["_id"], "status": SESSION_OPEN, "offset": offset},
+            {"$set": {"offset": offset + len(data)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if updated is None:
+            # A concurrent request for the same offset won
+            current = await self.sessions.find_one({"_id": session["_id"]}) or session
+            raise offset_conflict(current, "Upload-Offset does not match the session offset")
+        return updated
+
+    async def begin_finalize(self, session: Dict[str, Any]) -> Tuple[bytes, str]:
+        """
+        Claim a complete session for finalizing and assemble its body.
+
+        Returns:
+            Tuple[bytes, str]: Assembled body and the claim token to pass to
+            hold_finalize/complete/reopen
+
+        Raises:
+            HTTPException: 409 if bytes are missing or another finalize is running,
+                422 if the sha256 does not match
+        """
+        if session["offset"] != session["length"]:
+            raise offset_conflict(session, f"Upload incomplete: {session['offset']} of {session['length']} bytes")
+        now = datetime.utcnow()
+        claim = uuid.uuid4().hex
+        claimed = await self.sessions.find_one_and_update(
+            {
+                "_id": session["_id"],
+                "$or": [
+                    {"status": SESSION_OPEN},
+                    # Take over from a finalize whose process died
+                    {"status": SESSION_FINALIZING, "finalizing_until": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": SESSION_FINALIZING,
+                    "finalize_claim": claim,
+                    "finalizing_until": now + timedelta(seconds=FINALIZE_LEASE_SECONDS),
+                }
+            },
+        )
+        if claimed is None:
+            raise offset_conflict(session, "Upload session is already being finalized")
+
+        parts = []
+        cursor = self.chunks.find({"upload_id": session["_id"]}, {"offset": 1, "data": 1}).sort("offset", 1)
+        expected = 0
+        async for chunk in cursor:
+            if chunk["offset"] != expected:
+                break
+            parts.append(bytes(chunk["data"]))
+            expected += len(chunk["data"])
+        body = b"".join(parts)
+
+        if len(body) != session["length"]:
+            await self.restart(session, claim)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stored chunks are incomplete; upload again from offset 0",
+                headers={"Upload-Offset": "0"},
+            )
+        if session.get("sha256") and hashlib.sha256(body).hexdigest() != session["sha256"]:
+            await self.restart(session, claim)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="sha256 of the uploaded body does not match; upload again from offset 0",
+                headers={"Upload-Offset": "0"},
+            )
+        return body, claim
+
+    async def hold_finalize(self, session: Dict[str, Any], claim: str) -> None:
+        """Renew the finalize lease until cancelled or the claim is lost."""
+        while True:
+            await asyncio.sleep(FINALIZE_RENEW_SECONDS)
+            renewed = await self.sessions.update_one(
+                {"_id": session["_id"], "status": SESSION_FINALIZING, "finalize_claim": claim},
+                {"$set": {"finalizing_until": datetime.utcnow() + timedelta(seconds=FINALIZE_LEASE_SECONDS)}},
+            )
+            if renewed.matched_count == 0:
+                return
+
+    async def restart(self, session: Dict[str, Any], claim: str) -> None:
+        """Drop the stored bytes and reopen the session at offset 0."""
+        await self.chunks.delete_many({"upload_id": session["_id"]})
+        await self.sessions.update_one(
+            {"_id": session["_id"], "status": SESSION_FINALIZING, "finalize_claim": claim},
+            {"$set": {"status": SESSION_OPEN, "offset": 0}, "$unset": {"finalize_claim": "", "finalizing_until": ""}},
+        )
+
+    async def reopen(self, session: Dict[str, Any], claim: str) -> None:
+        """Undo begin_finalize after the body could not be handed on."""
+        await self.sessions.update_one(
+            {"_id": session["_id"], "status": SESSION_FINALIZING, "finalize_claim": claim},
+            {"$set": {"status": SESSION_OPEN}, "$unset": {"finalize_claim": "", "finalizing_until": ""}},
+        )
+
+    async def complete(self, session: Dict[str, Any], claim: str, result: Dict[str, Any]) -> bool:
+        """
+        Record the finalize result (replayed on repeat calls) and drop the chunks.
+
+        Returns:
+            bool: False if the claim was lost to another finalize (nothing recorded)
+        """
+        completed = await self.sessions.update_one(
+            {"_id": session["_id"], "status": SESSION_FINALIZING, "finalize_claim": claim},
+            {
+                "$set": {"status": SESSION_COMPLETE, "result": result, "finished_at": datetime.utcnow()},
+                "$unset": {"finalize_claim": "", "finalizing_until": ""},
+            },
+        )
+        if completed.modified_count == 0:
+            return False
+        await self.chunks.delete_many({"upload_id": session["_id"]})
+        return True
+
+    async def abort(self, session: Dict[str, Any]) -> None:
+        """Delete a session and its chunks."""
+        await self.chunks.delete_many({"upload_id": session["_id"]})
+        await self.sessions.delete_one({"_id": session["_id"]})
@@ -1,12 +1,31 @@
 # backend/app/tasks/celery_app.py
+import logging
 import os
+import time
 from celery import Celery
+from celery.signals import task_prerun, task_postrun, worker_process_init, worker_process_shutdown
+
+from app.config import settings
+from app.tasks.worker_db import close_worker_client, get_worker_client
+from app.utils.metrics import CELERY_TASK_SECONDS
+
+logger = logging.getLogger(__name__)
 
 # Retrieve Redis URL from environment variable or default
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 
 # Initialize Celery app
-celery_app = Celery("farmer_sync", broker=REDIS_URL, backend=REDIS_URL)
+celery_app = Celery(
+    "farmer_sync",
+    broker=REDIS_URL,
+    backend=REDIS_URL,
+    # Task modules the worker must import to register their tasks
+    include=[
+        "app.tasks.sync_tasks",
+        "app.tasks.id_card_task",
+        "app.tasks.duplicate_tasks",
+    ],
+)
 
 # Celery configuration for reliability and compatibility
 celery_app.conf.update(
@@ -18,6 +37,12 @@ celery_app.conf.update(
     task_acks_late=True,
     worker_prefetch_multiplier=1,
     result_expires=3600,
+    # API processes enqueue through services/task_dispatch.py: a small
+    # connection pool per process and short connect timeouts
+    broker_pool_limit=settings.TASK_DISPATCH_POOL_SIZE,
+    broker_connection_timeout=settings.TASK_DISPATCH_TIMEOUT_SECONDS,
+    broker_transport_options={"socket_connect_timeout": settings.TASK_DISPATCH_TIMEOUT_SECONDS},
+    redis_socket_connect_timeout=settings.TASK_DISPATCH_TIMEOUT_SECONDS,
 )
 
 # Optional: route tasks to specific queues for better load management
@@ -25,3 +50,46 @@ celery_app.conf.task_routes = {
     "app.tasks.id_card_task.generate_id_card": {"queue": "id_cards"},
     # Add more routes as needed
 }
+
+# Periodic jobs (requires `celery -A app.tasks.celery_app.celery_app beat`)
+celery_app.conf.beat_schedule = {
+    "incremental-duplicate-scan": {
+        "task": "app.tasks.duplicate_tasks.detect_duplicate_farmers",
+        "schedule": settings.DUPLICATE_SCAN_INTERVAL_MINUTES * 60.0,
+    },
+}
+
+
+# ============================================
+# Task duration metrics
+# ============================================
+_task_started_at = {}
+
+
+@task_prerun.connect
+def _record_task_start(task_id=None, **kwargs):
+    _task_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started_at.pop(task_id, None)
+    if started is not None and task is not None:
+        CELERY_TASK_SECONDS.labels(task=task.name, state=state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+
+# ============================================
+# Per-process MongoDB client (tasks/worker_db.py)
+# ============================================
+@worker_process_init.connect
+def _open_mongo_client(**kwargs):
+    # After the fork: pymongo clients must not be shared with the parent
+    get_worker_client()
+    logger.info(f"MongoDB pool ready in worker process {os.getpid()}")
+
+
+@worker_process_shutdown.connect
+def _close_mongo_client(**kwargs):
+    close_worker_client()
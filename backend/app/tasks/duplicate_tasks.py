@@ -0,0 +1,26 @@
+# backend/app/tasks/duplicate_tasks.py
+from celery import shared_task
+from app.config import settings
+from app.services.duplicate_detection import DuplicateDetector
+from app.tasks.sync_tasks import get_db_sync
+
+
+@shared_task(bind=True, name="app.tasks.duplicate_tasks.detect_duplicate_farmers")
+def detect_duplicate_farmers(self, full=False):
+    """
+    Find likely duplicate farmers and record them in duplicate_candidates.
+
+    Args:
+        full (bool): Rescan every farmer instead of only those changed
+            since the last run's watermark
+
+    Returns:
+        dict: Run summary (farmers scanned, pairs compared, candidates written)
+    """
+    detector = DuplicateDetector(
+        get_db_sync(),
+        batch_size=settings.DUPLICATE_BATCH_SIZE,
+        min_score=settings.DUPLICATE_MIN_SCORE,
+        max_block_size=settings.DUPLICATE_MAX_BLOCK_SIZE,
+    )
+    return detector.run(full=full)
@@ -4,21 +4,18 @@ from fpdf import FPDF
 import qrcode
 from datetime import datetime
 import os
-from pymongo import MongoClient
-from app.config import settings
+from app.tasks.worker_db import get_worker_db
 
 UPLOAD_DIR = "/app/uploads/idcards"
 QR_DIR = "/app/uploads/qr"
 
 @shared_task(name="app.tasks.id_card_task.generate_id_card")
 def generate_id_card(farmer_id: str):
-    # Create MongoDB client (sync)
-    client = MongoClient(settings.MONGODB_URL)
-    db = client[settings.MONGODB_DB_NAME]
+    # Pooled per-process client (sync)
+    db = get_worker_db()
     farmer = db.farmers.find_one({"farmer_id": farmer_id})
 
     if not farmer:
-        client.close()
         raise Exception(f"Farmer {farmer_id} not found in DB.")
 
     os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -87,5 +84,4 @@ def generate_id_card(farmer_id: str):
         }
     )
 
-    client.close()
     return {"message": "ID card generated", "id_card_path": pdf_path}
@@ -1,88 +1,363 @@
 from celery import shared_task
-from pymongo import MongoClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime
-from uuid import uuid4
-from app.config import settings
-from app.services.farmer_service import FarmerService
+from app.services.farmer_service import FARMER_DETAIL_CACHE, FarmerService, version_filter
+from app.services.id_allocator import get_sync_farmer_id_allocator
+from app.services.id_lease_service import LEASE_ACTIVE
+from app.services.boundary_resolver import check_address_boundaries
+from app.services.cache import TAG_FARMERS, invalidate_keys_sync, invalidate_sync
+from app.services.duplicate_prefilter import (
+    FILTER_NRC,
+    FILTER_PHONE,
+    get_sync_duplicate_prefilter,
+    record_lookup,
+)
+from app.services.map_rollup import ROLLUP_COLLECTION, rollup_ops
+from app.services.sync_jobs import fail_job, finish_job, start_job
+from app.services.sync_progress import get_progress_reporter
+from app.services.sync_merge import (
+    CONFLICTS_COLLECTION,
+    FIELD_VERSIONS,
+    conflict_entry,
+    merge_record,
+    merge_update,
+    mergeable_changes,
+    stamp_tree,
+)
+from app.utils.geo_utils import location_update
+from app.utils.crypto_utils import has_bad_check_digit
+from app.tasks.worker_db import get_worker_db
 
 
-MONGODB_URL = settings.MONGODB_URL or "mongodb://mongo:27017"
-MONGODB_DB_NAME = settings.MONGODB_DB_NAME or "zambian_farmer_db"
+def get_db_sync():
+    """Database on the worker process's pooled MongoDB client (see tasks/worker_db.py)."""
+    return get_worker_db()
 
 
-def get_db_sync():
-    """Create synchronous MongoDB client for Celery tasks."""
-    client = MongoClient(MONGODB_URL)
-    return client[MONGODB_DB_NAME]
+def _leased_ids(db, user_email, farmer_ids, now):
+    """Subset of farmer_ids leased to user_email under an active, unexpired lease."""
+    if not farmer_ids:
+        return set()
+    leases = db.farmer_id_leases.find(
+        {
+            "farmer_ids": {"$in": list(farmer_ids)},
+            "operator": user_email,
+            "status": LEASE_ACTIVE,
+            "expires_at": {"$gt": now},
+        },
+        {"farmer_ids": 1},
+    )
+    allowed = set()
+    for lease in leases:
+        allowed.update(lease["farmer_ids"])
+    return allowed & set(farmer_ids)
 
 
-@shared_task(bind=True, name="app.tasks.sync_tasks.process_sync_batch")
-def process_sync_batch(self, user_email, records):
+# Attempts per record when a concurrent write moves the version under a merge
+MERGE_ROUNDS = 3
+
+
+def _record_result(rec, farmer_id, status, errors=None):
+    return {
+        "temp_id": rec.get("temp_id"),
+        "farmer_id": farmer_id,
+        "status": status,
+        "errors": errors or [],
+    }
+
+
+def _merge_status(current, merge, base_version):
+    if not current:
+        return "created"
+    if merge.conflicts:
+        return "conflict"
+    if not merge.applied:
+        return "unchanged"
+    if base_version is not None and base_version < current.get("version", 0):
+        return "merged"
+    return "updated"
+
+
+def _merge_existing(farmers_coll, existing, changes, base_version, user_email, now):
+    """
+    Merge one record into an existing farmer, re-reading and re-merging
+    if another writer moves the version in between.
+
+    Returns:
+        tuple: (document merged into, MergeResult, merged document) or None if the
+            farmer kept changing or was deleted
     """
-    Process batch sync of farmer records.
+    for _ in range(MERGE_ROUNDS):
+        merge = merge_record(existing, changes, base_version)
+        if not merge.applied:
+            return existing, merge, existing
+        update, merged = merge_update(existing, merge.applied, user_email, now)
+        target = {"_id": existing["_id"], **version_filter(existing.get("version", 0))}
+        if farmers_coll.update_one(target, update).matched_count:
+            return existing, merge, merged
+        existing = farmers_coll.find_one({"_id": existing["_id"]})
+        if existing is None:
+            return None
+    return None
+
+
+def sync_records(db, user_email, records, progress=None):
+    """
+    Write a batch of synced farmer records.
+
+    Records carrying a farmer_id are merged in memory and written with a
+    single bulk upsert keyed on farmer_id. Edits to an existing farmer are
+    accepted from any device; a farmer_id with no farmer yet is inserted
+    only if it is in one of the user's active ID leases (see
+    services/id_lease_service.py). Records from older clients that only
+    carry a temp_id are matched one by one and get an allocated ID when new.
+
+    Existing farmers are merged field by field (see services/sync_merge.py):
+    fields only the device changed since base_version are applied, fields
+    changed on both sides keep the server value and are queued in
+    sync_conflicts for review.
 
     Args:
+        db: pymongo database
         user_email (str): Email of the user performing the sync
-        records (List[dict]): List of farmer records (each with optional temp_id and farmer data)
+        records (List[dict]): List of farmer records (each with optional temp_id/farmer_id/
+            base_version/changed_fields and farmer data)
+        progress (ProgressReporter, optional): Receives the results as they settle
 
     Returns:
-        dict: Job ID and list of results per record with status
+        List[dict]: Result per record, in input order, with status
+            (created, updated, merged, unchanged, conflict or error)
     """
-    db = get_db_sync()
     farmers_coll = db.farmers
-    out_results = []
+    allocator = get_sync_farmer_id_allocator(db)
+    prefilter = get_sync_duplicate_prefilter()
     now = datetime.utcnow()
+    # Results are kept in input order
+    out_results = [None] * len(records)
+    base_versions = [rec.pop("base_version", None) for rec in records]
+    changed_fields = [rec.pop("changed_fields", None) for rec in records]
+    rollup, review, written = [], [], []
 
-    for rec in records:
+    def finish(index, rec, current, merge, merged):
+        """Record the outcome of a merged record."""
+        base_version = base_versions[index]
+        result = _record_result(rec, merged.get("farmer_id"), _merge_status(current, merge, base_version))
+        if merge.conflicts:
+            entry = conflict_entry(merged, rec, merge.conflicts, base_version, user_email, now)
+            review.append(entry)
+            result.update(
+                conflicts=merge.conflicts,
+                current_version=merged.get("version", 0),
+                review_id=entry["_id"],
+            )
+        if merge.applied:
+            written.append(merged)
+            rollup.extend(rollup_ops((current or {}).get("location"), merged.get("location")))
+        out_results[index] = result
+
+    def report():
+        if progress is not None:
+            progress.report(out_results)
+
+    valid = []
+    for index, rec in enumerate(records):
         temp_id = rec.get("temp_id")
         try:
             # 1. Validate data fields - raises HTTPException on errors
             FarmerService.validate_farmer_data(rec)
 
-            # 2. Encrypt sensitive fields (e.g., NRC)
+            # 2. Add searchable hashes of sensitive fields (e.g., NRC)
             rec = FarmerService.encrypt_sensitive_fields(rec)
         except Exception as e:
-            out_results.append({
-                "temp_id": temp_id,
-                "farmer_id": None,
-                "status": "error",
-                "errors": [str(e)]
-            })
+            out_results[index] = _record_result(rec, rec.get("farmer_id"), "error", [str(getattr(e, "detail", e))])
+            continue
+        valid.append((index, rec))
+
+    # Admin codes vs GPS for the whole batch in one vectorized lookup;
+    # missing codes are filled in place
+    boundary_errors = check_address_boundaries([rec.get("address") for _, rec in valid])
+    for (index, rec), errors in zip(valid, boundary_errors):
+        if errors:
+            out_results[index] = _record_result(rec, rec.get("farmer_id"), "error", errors)
+    valid = [(index, rec) for (index, rec), errors in zip(valid, boundary_errors) if not errors]
+    report()
+
+    # 3. Records with a farmer_id: check digit first, then merge and bulk upsert
+    pending = []
+    for index, rec in valid:
+        if not rec.get("farmer_id"):
             continue
+        if has_bad_check_digit(rec["farmer_id"]):
+            # A mistyped ID that can never exist; legacy hex IDs pass
+            out_results[index] = _record_result(rec, rec["farmer_id"], "error", ["farmer_id has an invalid check digit"])
+        else:
+            pending.append((index, rec))
+    # IDs confirmed as leased to this user
+    allowed = set()
 
-        # 3. Deduplication query logic
-        query = {}
+    # Each round merges against fresh reads; records whose farmer was
+    # written concurrently (version guard missed) go to the next round
+    for _ in range(MERGE_ROUNDS):
+        if not pending:
+            break
+        current_docs = {
+            doc["farmer_id"]: doc
+            for doc in farmers_coll.find({"farmer_id": {"$in": [rec["farmer_id"] for _, rec in pending]}})
+        }
+        # Only an insert needs the lease; edits to an existing farmer go
+        # through the version-guarded merge whichever device created it
+        new_ids = {rec["farmer_id"] for _, rec in pending if rec["farmer_id"] not in current_docs}
+        allowed |= _leased_ids(db, user_email, new_ids - allowed, now)
+        ops, staged = [], []
+        for index, rec in pending:
+            current = current_docs.get(rec["farmer_id"])
+            if current is None and rec["farmer_id"] not in allowed:
+                out_results[index] = _record_result(
+                    rec, rec["farmer_id"], "error",
+                    ["farmer_id is not covered by an active ID lease for this user"],
+                )
+                continue
+            changes = mergeable_changes(rec, changed_fields[index] if current else None)
+            merge = merge_record(current or {}, changes, base_versions[index] if current else None)
+            if current and not merge.applied:
+                finish(index, rec, current, merge, current)
+                continue
+            update, merged = merge_update(current or {"farmer_id": rec["farmer_id"]}, merge.applied, user_email, now)
+            insert_only = {"created_at": now, "created_by": user_email, "registration_status": "pending"}
+            if rec.get("temp_id"):
+                insert_only["temp_id"] = rec["temp_id"]
+            update["$setOnInsert"] = insert_only
+            # A guard that no longer matches falls through to an insert,
+            # which the farmer_id unique index rejects
+            query = {"farmer_id": rec["farmer_id"], **version_filter((current or {}).get("version", 0))}
+            ops.append(UpdateOne(query, update, upsert=True))
+            staged.append((index, rec, current, merge, merged))
+
+        if not ops:
+            pending = []
+            break
+        try:
+            farmers_coll.bulk_write(ops, ordered=False)
+            write_errors = {}
+        except BulkWriteError as e:
+            write_errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+
+        pending = []
+        round_start = len(written)
+        for op_index, (index, rec, current, merge, merged) in enumerate(staged):
+            error = write_errors.get(op_index)
+            if error and error.get("code") == 11000:
+                pending.append((index, rec))
+            elif error:
+                out_results[index] = _record_result(rec, rec["farmer_id"], "error", [error.get("errmsg", "write error")])
+            else:
+                finish(index, rec, current, merge, merged)
+        # Visible to duplicate checks (here and in the API) as soon as written
+        prefilter.add_farmers(written[round_start:])
+        report()
+
+    for index, rec in pending:
+        out_results[index] = _record_result(
+            rec, rec["farmer_id"], "error", ["Farmer kept changing during sync; sync it again"],
+        )
+
+    # 4. Legacy records without a leased ID
+    for index, rec in valid:
+        if rec.get("farmer_id"):
+            continue
+        temp_id = rec.get("temp_id")
+
+        # Deduplication query logic; NRC/phone lookups are skipped when the
+        # prefilter says the value has never been stored
+        query, kind = {}, None
         if temp_id:
             query = {"temp_id": temp_id}
         elif rec.get("nrc_hash"):
-            query = {"nrc_hash": rec["nrc_hash"]}
+            query, kind = {"nrc_hash": rec["nrc_hash"]}, FILTER_NRC
         elif rec.get("personal_info", {}).get("phone_primary"):
-            query = {"personal_info.phone_primary": rec["personal_info"]["phone_primary"]}
+            phone = rec["personal_info"]["phone_primary"]
+            query, kind = {"personal_info.phone_primary": phone}, FILTER_PHONE
+
+        if kind and not prefilter.might_contain(kind, next(iter(query.values()))):
+            query = {}
 
         existing = farmers_coll.find_one(query) if query else None
+        if kind and query:
+            record_lookup(kind, existing is not None)
 
         if existing:
-            # 4. Update existing record
-            rec["updated_at"] = now
-            rec["last_modified_by"] = user_email
-            farmers_coll.update_one({"_id": existing["_id"]}, {"$set": rec})
-            out_results.append({
-                "temp_id": temp_id,
-                "farmer_id": existing.get("farmer_id"),
-                "status": "updated",
-                "errors": []
-            })
+            outcome = _merge_existing(
+                farmers_coll, existing, mergeable_changes(rec, changed_fields[index]), base_versions[index], user_email, now,
+            )
+            if outcome is None:
+                out_results[index] = _record_result(
+                    rec, existing.get("farmer_id"), "error", ["Farmer kept changing during sync; sync it again"],
+                )
+            else:
+                finish(index, rec, *outcome)
+                prefilter.add_farmers([outcome[2]])
         else:
-            # 5. Create new farmer record with generated farmer_id if none provided
-            rec["farmer_id"] = rec.get("farmer_id") or ("ZM" + uuid4().hex[:8].upper())
+            # Create new farmer record with an allocated farmer_id
+            location_set, _ = location_update(rec["address"]) if "address" in rec else ({}, {})
+            rec.update(location_set)
+            rec["farmer_id"] = allocator.next_id()
             rec["created_at"] = now
             rec["created_by"] = user_email
+            rec["version"] = 1
+            rec[FIELD_VERSIONS] = stamp_tree(mergeable_changes(rec), 1)
             farmers_coll.insert_one(rec)
-            out_results.append({
-                "temp_id": temp_id,
-                "farmer_id": rec["farmer_id"],
-                "status": "created",
-                "errors": []
-            })
-
-    return {"job_id": self.request.id, "results": out_results}
+            prefilter.add_farmers([rec])
+            written.append(rec)
+            rollup.extend(rollup_ops(None, rec.get("location")))
+            out_results[index] = _record_result(rec, rec["farmer_id"], "created")
+        report()
+
+    if review:
+        db[CONFLICTS_COLLECTION].insert_many(review, ordered=False)
+    if rollup:
+        db[ROLLUP_COLLECTION].bulk_write(rollup, ordered=False)
+    if written:
+        invalidate_keys_sync(FARMER_DETAIL_CACHE, *{doc["farmer_id"] for doc in written})
+        invalidate_sync(TAG_FARMERS)
+
+    return out_results
+
+
+@shared_task(bind=True, name="app.tasks.sync_tasks.process_sync_batch")
+def process_sync_batch(self, job_id, records=None):
+    """
+    Process a sync job stored by SyncJobService (see services/sync_jobs.py).
+
+    Only the job id travels through the broker; records are read from and
+    results written to MongoDB, and the Celery result is just the summary.
+
+    Args:
+        job_id (str): Sync job id (the user's email for messages queued
+            before claim-check storage, which carry the records inline)
+        records (List[dict], optional): Inline records of such messages
+
+    Returns:
+        dict: Job ID and record count per result status
+    """
+    db = get_db_sync()
+    if records is not None:
+        return {"job_id": self.request.id, "results": sync_records(db, job_id, records)}
+
+    progress = get_progress_reporter(job_id, 0)
+    try:
+        claimed = start_job(db, job_id)
+        if claimed is None:
+            # Already done or failed: a redelivery, or a late enqueue the API gave up on
+            return {"job_id": job_id, "skipped": True}
+        job, records = claimed
+        progress.total = len(records)
+        progress.report([], force=True)
+        results = sync_records(db, job["submitted_by"], records, progress)
+    except Exception as e:
+        fail_job(db, job_id, str(e))
+        progress.report([], state="failed", force=True)
+        raise
+    summary = finish_job(db, job_id, results)
+    progress.report(results, state="done", force=True)
+    return {"job_id": job_id, "summary": summary}
@@ -0,0 +1,72 @@
+# backend/app/tasks/worker_db.py
+"""
+One pooled MongoDB client per Celery worker process.
+
+Creating a MongoClient per task pays for DNS, TLS and the handshake every
+time and throws the pool away afterwards. Instead each worker process
+opens a client when it starts and closes it on shutdown (signal hooks in
+celery_app.py); tasks borrow connections from its pool via get_worker_db().
+
+The client is created after the fork on purpose - pymongo clients are
+not fork-safe. Processes without those signals (solo pool, eager tasks,
+scripts) get the client lazily on first use, and a forked child never
+reuses its parent's client.
+
+Pool sizing: WORKER_MONGO_MAX_POOL_SIZE / _MIN_POOL_SIZE / _MAX_IDLE_SECONDS.
+Pool health: mongodb_pool_* metrics with client="worker".
+"""
+
+import os
+import threading
+from typing import Optional
+
+from pymongo import MongoClient
+from pymongo.database import Database
+
+from app.config import settings
+from app.utils.metrics import MongoCommandMetrics, MongoPoolMetrics
+
+
+MONGODB_URL = settings.MONGODB_URL or "mongodb://mongo:27017"
+MONGODB_DB_NAME = settings.MONGODB_DB_NAME or "zambian_farmer_db"
+
+_client: Optional[MongoClient] = None
+_client_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _create_client() -> MongoClient:
+    return MongoClient(
+        MONGODB_URL,
+        maxPoolSize=settings.WORKER_MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.WORKER_MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.WORKER_MONGO_MAX_IDLE_SECONDS * 1000,
+        event_listeners=[MongoCommandMetrics(), MongoPoolMetrics("worker")],
+    )
+
+
+def get_worker_client() -> MongoClient:
+    """The current process's MongoDB client, created on first use."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                # A client inherited through fork is unusable; drop it unclosed
+                _client, _client_pid = _create_client(), pid
+    return _client
+
+
+def get_worker_db() -> Database:
+    """The application database on the process's pooled client."""
+    return get_worker_client()[MONGODB_DB_NAME]
+
+
+def close_worker_client() -> None:
+    """Close this process's client (idempotent)."""
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client, _client_pid = None, None
+
@@ -0,0 +1,80 @@
+# backend/app/utils/bloom.py
+"""
+Bloom filter primitives.
+
+Bit positions are derived with double hashing over a single blake2b
+digest, so a value maps to the same positions in every process - the API
+(redis.asyncio) and Celery workers (redis) can share one bitmap in Redis.
+
+Usage:
+    num_bits, num_hashes = bloom_parameters(capacity=1_000_000, error_rate=0.001)
+    bits = BloomBits(num_bits, num_hashes)
+    bits.add("0977000000")
+    "0977000000" in bits   # True
+"""
+
+import hashlib
+import math
+from typing import List, Tuple
+
+
+def bloom_parameters(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """
+    Size a Bloom filter.
+
+    Args:
+        capacity: Expected number of distinct items
+        error_rate: Target false-positive probability at capacity
+
+    Returns:
+        Tuple[int, int]: Number of bits (multiple of 8) and hash functions
+    """
+    num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    num_bits = (num_bits + 7) // 8 * 8
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+def bloom_positions(value: str, num_bits: int, num_hashes: int) -> List[int]:
+    """Bit positions for a value (Kirsch-Mitzenmacher double hashing)."""
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % num_bits for i in range(num_hashes)]
+
+
+def estimated_false_positive_rate(bits_set: int, num_bits: int, num_hashes: int) -> float:
+    """False-positive probability implied by the current fill ratio."""
+    return (bits_set / num_bits) ** num_hashes if num_bits else 1.0
+
+
+class BloomBits:
+    """
+    In-memory bit array, laid out like a Redis bitmap (bit 0 = MSB of byte 0)
+    so `to_bytes()` can be stored with a plain SET.
+
+    Args:
+        num_bits: Filter size in bits
+        num_hashes: Hash functions per item
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int) -> None:
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self._bits = bytearray(num_bits // 8)
+
+    def add(self, value: str) -> None:
+        for pos in bloom_positions(value, self.num_bits, self.num_hashes):
+            self._bits[pos >> 3] |= 0x80 >> (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[pos >> 3] & (0x80 >> (pos & 7))
+            for pos in bloom_positions(value, self.num_bits, self.num_hashes)
+        )
+
+    def bits_set(self) -> int:
+        return int.from_bytes(self._bits, "big").bit_count()
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
@@ -6,12 +6,13 @@ SECURITY NOTES:
 - For passwords: Always use bcrypt (see security.py)
 - For searchable fields: Use HMAC hashing (not encryption)
 - For PII: Use proper AES-GCM with random nonces
-- For farmer IDs: Use cryptographically secure random generation
+- For farmer IDs: Sequence-allocated with a Luhn check digit (see id_allocator.py)
 """
 
 import base64
 import hashlib
 import hmac
+import re
 import secrets
 import string
 from typing import Tuple, Optional
@@ -19,6 +20,7 @@ from datetime import datetime
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 from app.config import settings
+from app.utils.metrics import PASSWORD_HASH_SECONDS, observe_duration
 
 
 # ============================================
@@ -35,13 +37,14 @@ def _derive_key(purpose: str = "encryption") -> bytes:
         bytes: 32-byte AES-256 key
     """
     # Use HMAC-SHA256 for key derivation
-    return hashlib.pbkdf2_hmac(
-        'sha256',
-        settings.JWT_SECRET.encode(),
-        purpose.encode(),
-        iterations=100000,
-        dklen=32
-    )
+    with observe_duration(PASSWORD_HASH_SECONDS, operation="pbkdf2_derive"):
+        return hashlib.pbkdf2_hmac(
+            'sha256',
+            settings.JWT_SECRET.encode(),
+            purpose.encode(),
+            iterations=100000,
+            dklen=32
+        )
 
 
 # ============================================
@@ -167,22 +170,82 @@ def verify_hmac_hash(value: str, expected_hash: str, salt: Optional[str] = None)
 # ============================================
 # Farmer ID Generation
 # ============================================
-def generate_farmer_id() -> str:
+FARMER_ID_PREFIX = "ZM"
+FARMER_ID_DIGITS = 8
+_FARMER_ID_PATTERN = re.compile(rf"^{FARMER_ID_PREFIX}(\d{{{FARMER_ID_DIGITS}}})(\d)$")
+
+
+def luhn_check_digit(digits: str) -> int:
     """
-    Generate cryptographically secure farmer ID.
-    Format: ZM + 8 hex characters (uppercase)
-    Example: ZM1A2B3C4D
+    Compute the Luhn (mod 10) check digit for a string of digits.
+    Catches every single-digit typo and most adjacent transpositions.
+    
+    Args:
+        digits: Payload digits (without check digit)
     
     Returns:
-        str: Unique farmer ID
+        int: Check digit 0-9
+    """
+    total = 0
+    for position, char in enumerate(reversed(digits)):
+        value = int(char)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return (10 - total % 10) % 10
+
+
+def format_farmer_id(sequence: int) -> str:
+    """
+    Format an allocated sequence number as a farmer ID.
+    Format: ZM + 8-digit sequence + Luhn check digit
+    Example: 42 -> ZM000000422
+    
+    Args:
+        sequence: Number leased from the farmer ID counter (see id_allocator.py)
     
-    Note: Collision probability is ~1 in 4 billion (2^32)
+    Returns:
+        str: Farmer ID
+    
+    Raises:
+        ValueError: If the sequence does not fit in 8 digits
     """
-    # Generate 4 random bytes (8 hex chars)
-    random_bytes = secrets.token_bytes(4)
-    hex_id = random_bytes.hex().upper()
+    if not 0 < sequence < 10 ** FARMER_ID_DIGITS:
+        raise ValueError(f"Farmer ID sequence out of range: {sequence}")
+    payload = f"{sequence:0{FARMER_ID_DIGITS}d}"
+    return f"{FARMER_ID_PREFIX}{payload}{luhn_check_digit(payload)}"
+
+
+def is_valid_farmer_id(farmer_id: str) -> bool:
+    """
+    Check format and check digit of a sequence-allocated farmer ID.
+    Legacy random IDs (ZM + 8 hex characters) are not check-digit protected
+    and return False.
+    
+    Args:
+        farmer_id: Farmer ID to check
     
-    return f"ZM{hex_id}"
+    Returns:
+        bool: True if well-formed with a correct check digit
+    """
+    match = _FARMER_ID_PATTERN.match(farmer_id or "")
+    return bool(match) and luhn_check_digit(match.group(1)) == int(match.group(2))
+
+
+def has_bad_check_digit(farmer_id: str) -> bool:
+    """
+    Check whether a farmer ID has the sequence-allocated format but a wrong
+    check digit, i.e. a mistyped ID that cannot exist. Legacy IDs pass.
+    
+    Args:
+        farmer_id: Farmer ID to check
+    
+    Returns:
+        bool: True if the ID should be rejected without a lookup
+    """
+    return bool(_FARMER_ID_PATTERN.match(farmer_id or "")) and not is_valid_farmer_id(farmer_id)
 
 
 def generate_operator_id() -> str:
@@ -0,0 +1,101 @@
+# backend/app/utils/db_profiler.py
+"""
+Per-request MongoDB command profiling.
+
+A pymongo command listener adds every command's duration to the
+QueryStats object of the request that issued it. The current stats object
+lives in a contextvar set by DBProfilerMiddleware; Motor copies the
+caller's context into its executor threads, so the listener sees the same
+object the request handler does.
+
+Commands slower than SLOW_QUERY_MS are logged individually with the
+request ID, regardless of whether they ran inside a request.
+
+Usage:
+    stats = get_query_stats()
+    if stats:
+        print(stats.count, stats.total_ms)
+"""
+
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.middleware.request_context import get_request_id
+from app.utils.metrics import CollectionCommandListener
+
+
+logger = logging.getLogger("app.db.profiler")
+
+
+class QueryStats:
+    """Commands issued while handling one request."""
+
+    __slots__ = ("count", "duration_micros", "by_command", "_lock")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration_micros = 0
+        # "find operators" -> [count, duration_micros]
+        self.by_command: Dict[str, list] = {}
+        # Commands from one request may complete on several executor threads
+        self._lock = threading.Lock()
+
+    def add(self, command: str, collection: str, duration_micros: int) -> None:
+        key = f"{command} {collection}"
+        with self._lock:
+            self.count += 1
+            self.duration_micros += duration_micros
+            entry = self.by_command.get(key)
+            if entry is None:
+                self.by_command[key] = [1, duration_micros]
+            else:
+                entry[0] += 1
+                entry[1] += duration_micros
+
+    @property
+    def total_ms(self) -> float:
+        return self.duration_micros / 1000
+
+    def summary(self, top: int = 5) -> str:
+        """Most expensive command/collection pairs, e.g. 'aggregate farmers x50 (310.2ms)'."""
+        with self._lock:
+            items = sorted(self.by_command.items(), key=lambda kv: kv[1][1], reverse=True)
+        return ", ".join(
+            f"{key} x{count} ({micros / 1000:.1f}ms)" for key, (count, micros) in items[:top]
+        )
+
+
+# Stats of the request being handled (None outside the profiler middleware)
+query_stats_ctx: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Return the QueryStats of the current request, if profiling is active."""
+    return query_stats_ctx.get()
+
+
+class QueryProfiler(CollectionCommandListener):
+    """
+    pymongo command listener attributing commands to the current request.
+
+    Args:
+        slow_query_ms: Log individual commands slower than this (0 disables)
+    """
+
+    def __init__(self, slow_query_ms: float = 100) -> None:
+        super().__init__()
+        self.slow_query_micros = int(slow_query_ms * 1000)
+
+    def finished(self, event, collection: str, failed: bool) -> None:
+        stats = query_stats_ctx.get()
+        if stats is not None:
+            stats.add(event.command_name, collection, event.duration_micros)
+
+        if self.slow_query_micros and event.duration_micros >= self.slow_query_micros:
+            logger.warning(
+                f"Slow MongoDB command: {event.command_name} {collection} "
+                f"took {event.duration_micros / 1000:.1f}ms"
+                f"{' (failed)' if failed else ''} [request_id={get_request_id() or '-'}]"
+            )
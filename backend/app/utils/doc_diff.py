@@ -0,0 +1,63 @@
+# backend/app/utils/doc_diff.py
+"""
+Field-level views of nested MongoDB documents.
+
+Nested dicts are addressed with dot paths ("personal_info.phone_primary"),
+the same notation MongoDB uses in $set, so a diff entry maps directly onto
+an update operator. Lists and scalars are leaves.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def flatten(doc: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten nested dicts into {dot.path: leaf value}.
+
+    Empty dicts are kept as leaves so that "set to {}" is not lost.
+    """
+    flat: Dict[str, Any] = {}
+    for key, value in doc.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+
+def get_path(doc: Optional[Dict[str, Any]], path: str, default: Any = None) -> Any:
+    """Value at a dot path, or `default` if any segment is missing."""
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
+
+
+def field_diff(
+    current: Dict[str, Any],
+    changes: Dict[str, Any],
+    ignore: Iterable[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Fields where submitted changes disagree with the current document.
+
+    Args:
+        current: Current stored document
+        changes: Submitted values (nested or dot-path keys)
+        ignore: Top-level fields to leave out (timestamps, version, ...)
+
+    Returns:
+        List[dict]: {"field", "current", "submitted"} per differing leaf, sorted by field
+    """
+    skip = set(ignore)
+    diff = []
+    for path, submitted in flatten(changes).items():
+        if path.split(".", 1)[0] in skip:
+            continue
+        stored = get_path(current, path)
+        if stored != submitted:
+            diff.append({"field": path, "current": stored, "submitted": submitted})
+    return sorted(diff, key=lambda entry: entry["field"])
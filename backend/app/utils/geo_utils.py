@@ -0,0 +1,104 @@
+# backend/app/utils/geo_utils.py
+"""
+GeoJSON helpers for farmer locations.
+
+Farmers keep `address.gps_latitude` / `address.gps_longitude` for the API,
+plus a derived GeoJSON point in `location` that carries the 2dsphere index:
+
+    "location": {"type": "Point", "coordinates": [lon, lat]}
+
+Every write path (create, update, sync) sets `location` from the address
+so spatial queries never see stale coordinates.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def point_from_address(address: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Build a GeoJSON point from an address's GPS fields.
+    
+    Args:
+        address: Address sub-document (may be None)
+    
+    Returns:
+        Optional[dict]: GeoJSON Point, or None if coordinates are missing/invalid
+    """
+    if not address:
+        return None
+    lat = address.get("gps_latitude")
+    lon = address.get("gps_longitude")
+    if lat is None or lon is None:
+        return None
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+
+def location_update(address: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    `$set` / `$unset` fragments that keep `location` in step with an address.
+    
+    Returns:
+        Tuple[dict, dict]: Fields to $set and fields to $unset
+    """
+    point = point_from_address(address)
+    if point:
+        return {"location": point}, {}
+    return {}, {"location": ""}
+
+
+def polygon_geometry(coordinates: List[List[float]]) -> Dict[str, Any]:
+    """
+    Build a GeoJSON Polygon from one ring of [lon, lat] pairs, closing it if needed.
+    
+    Raises:
+        ValueError: If the ring has fewer than 3 distinct points
+    """
+    ring = [list(map(float, point[:2])) for point in coordinates]
+    if ring and ring[0] != ring[-1]:
+        ring.append(ring[0])
+    if len(ring) < 4:
+        raise ValueError("Polygon needs at least 3 distinct points")
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+# ============================================
+# Web Mercator tiles & quadkeys
+# ============================================
+# Mercator is undefined at the poles; clamp like every web map does
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def lat_lng_to_tile(latitude: float, longitude: float, zoom: int) -> Tuple[int, int]:
+    """
+    Slippy-map tile containing a point.
+    
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        zoom: Zoom level (0 = whole world in one tile)
+    
+    Returns:
+        Tuple[int, int]: Tile x, y
+    """
+    latitude = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, latitude))
+    n = 1 << zoom
+    x = int((longitude + 180.0) / 360.0 * n)
+    lat_rad = math.radians(latitude)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_to_quadkey(x: int, y: int, zoom: int) -> str:
+    """Bing-style quadkey of a tile; its length equals the zoom level."""
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return "".join(digits)
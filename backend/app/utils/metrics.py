@@ -0,0 +1,331 @@
+# backend/app/utils/metrics.py
+"""
+Prometheus metrics for the API and Celery workers.
+
+All metric objects live here so every process (uvicorn workers, Celery
+workers) registers the same names. When PROMETHEUS_MULTIPROC_DIR is set,
+prometheus_client writes samples to that directory and /api/metrics
+aggregates every process sharing it - including Celery workers if the
+directory is mounted into both containers.
+
+Usage:
+    from app.utils.metrics import UPLOAD_BYTES, observe_duration
+
+    UPLOAD_BYTES.labels(kind="photo").inc(len(content))
+
+    with observe_duration(PASSWORD_HASH_SECONDS, operation="bcrypt_verify"):
+        ...
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from pymongo import monitoring
+
+
+# Latency buckets tuned for API calls on slow links (5 ms .. 30 s)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Database commands are usually much faster than whole requests
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# Celery tasks range from milliseconds (sync of a few records) to minutes
+TASK_BUCKETS = (0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+# ============================================
+# HTTP
+# ============================================
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+REQUEST_BODY_BYTES = Counter(
+    "http_request_body_bytes_total",
+    "Compressed request bodies: bytes on the wire and bytes after decoding",
+    ["encoding", "stage"],
+)
+
+# ============================================
+# MongoDB
+# ============================================
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency as seen by the driver",
+    ["command", "collection"],
+    buckets=DB_BUCKETS,
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that returned an error",
+    ["command", "collection"],
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections",
+    "Open connections in MongoDB driver pools",
+    ["client"],
+    multiprocess_mode="livesum",
+)
+MONGO_POOL_CHECKOUT_SECONDS = Histogram(
+    "mongodb_pool_checkout_seconds",
+    "Time spent waiting for a pooled MongoDB connection",
+    ["client"],
+    buckets=DB_BUCKETS,
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "Connection checkouts that failed (pool timeout, connection error, closed pool)",
+    ["client", "reason"],
+)
+
+# ============================================
+# Celery
+# ============================================
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time",
+    ["task", "state"],
+    buckets=TASK_BUCKETS,
+)
+CELERY_QUEUE_LENGTH = Gauge(
+    "celery_queue_length",
+    "Messages waiting in a Celery queue (sampled at scrape time)",
+    ["queue"],
+    multiprocess_mode="mostrecent",
+)
+TASK_DISPATCHES = Counter(
+    "celery_task_dispatches_total",
+    "Tasks enqueued from the API by outcome (ok, error, timeout, rejected by the open circuit)",
+    ["task", "outcome"],
+)
+TASK_DISPATCH_CIRCUIT_OPEN = Gauge(
+    "celery_dispatch_circuit_open",
+    "1 while the broker circuit breaker is open in any API process",
+    multiprocess_mode="max",
+)
+
+# ============================================
+# Uploads & Crypto
+# ============================================
+UPLOAD_BYTES = Counter(
+    "upload_bytes_total",
+    "Bytes received through file upload endpoints",
+    ["kind"],
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent in deliberately slow hashing (bcrypt, PBKDF2)",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# ============================================
+# Duplicate Prefilter
+# ============================================
+BLOOM_CHECKS = Counter(
+    "dedupe_bloom_checks_total",
+    "Duplicate prefilter answers: negative (DB skipped), hit, false_positive",
+    ["filter", "result"],
+)
+BLOOM_ESTIMATED_FPR = Gauge(
+    "dedupe_bloom_estimated_false_positive_rate",
+    "False-positive rate implied by the filter fill ratio at last rebuild",
+    ["filter"],
+    multiprocess_mode="mostrecent",
+)
+BLOOM_REBUILD_SECONDS = Gauge(
+    "dedupe_bloom_rebuild_seconds",
+    "Duration of the last duplicate prefilter rebuild",
+    multiprocess_mode="mostrecent",
+)
+
+# ============================================
+# Cache
+# ============================================
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Tiered cache lookups: l1_hit, l2_hit, stale (served while refreshing), miss",
+    ["namespace", "result"],
+)
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total",
+    "Requests that computed a result (leader) or awaited an identical in-flight one (follower)",
+    ["route", "role"],
+)
+IDEMPOTENT_REQUESTS = Counter(
+    "idempotent_requests_total",
+    "Requests with an Idempotency-Key: new, replayed, waited (on an in-flight duplicate), conflict, mismatch",
+    ["route", "outcome"],
+)
+
+
+@contextmanager
+def observe_duration(histogram: Histogram, **labels: str):
+    """
+    Time a block and record it on a labelled histogram.
+
+    Args:
+        histogram: Histogram to observe into
+        **labels: Label values for the histogram
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+def record_upload(kind: str, size: int) -> None:
+    """Count bytes accepted by an upload endpoint."""
+    UPLOAD_BYTES.labels(kind=kind).inc(size)
+
+
+# ============================================
+# MongoDB Command Listeners
+# ============================================
+class CollectionCommandListener(monitoring.CommandListener, ABC):
+    """
+    Base pymongo command listener that knows each command's collection.
+
+    Completion events carry no command document, so the collection is
+    remembered on start and handed to `finished()` once the command
+    succeeds or fails.
+    """
+
+    def __init__(self) -> None:
+        # (connection_id, request_id) -> collection name, set on start
+        self._collections: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else "-"
+        with self._lock:
+            self._collections[self._key(event)] = collection
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self.finished(event, self._pop_collection(event), failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self.finished(event, self._pop_collection(event), failed=True)
+
+    def _pop_collection(self, event) -> str:
+        with self._lock:
+            return self._collections.pop(self._key(event), "-")
+
+    @abstractmethod
+    def finished(self, event, collection: str, failed: bool) -> None:
+        """
+        Handle a completed command.
+
+        Args:
+            event: CommandSucceededEvent or CommandFailedEvent
+            collection: Collection the command targeted ("-" if none)
+            failed: True if the command failed
+        """
+
+
+class MongoCommandMetrics(CollectionCommandListener):
+    """
+    pymongo command listener feeding MONGO_COMMAND_SECONDS.
+
+    Works for both Motor (API) and pymongo (Celery) clients - pass an
+    instance via `event_listeners=[...]` when creating the client.
+    """
+
+    def finished(self, event, collection: str, failed: bool) -> None:
+        MONGO_COMMAND_SECONDS.labels(event.command_name, collection).observe(
+            event.duration_micros / 1_000_000
+        )
+        if failed:
+            MONGO_COMMAND_FAILURES.labels(event.command_name, collection).inc()
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    pymongo connection pool listener feeding the mongodb_pool_* metrics.
+
+    Args:
+        client: Label identifying the client (e.g. "api", "worker")
+    """
+
+    def __init__(self, client: str) -> None:
+        self.client = client
+        # Checkouts run on the calling thread; remember when each started
+        self._local = threading.local()
+
+    def connection_created(self, event) -> None:
+        MONGO_POOL_CONNECTIONS.labels(self.client).inc()
+
+    def connection_closed(self, event) -> None:
+        MONGO_POOL_CONNECTIONS.labels(self.client).dec()
+
+    def connection_check_out_started(self, event) -> None:
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event) -> None:
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            MONGO_POOL_CHECKOUT_SECONDS.labels(self.client).observe(time.perf_counter() - started)
+            self._local.started = None
+
+    def connection_check_out_failed(self, event) -> None:
+        self._local.started = None
+        MONGO_POOL_CHECKOUT_FAILURES.labels(self.client, str(event.reason)).inc()
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_checked_in(self, event) -> None:
+        pass
+
+
+# ============================================
+# Exposition
+# ============================================
+def render_latest() -> Tuple[bytes, str]:
+    """
+    Render all metrics in Prometheus text format.
+
+    Returns:
+        Tuple[bytes, str]: Payload and its content type
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
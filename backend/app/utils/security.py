@@ -3,6 +3,7 @@ from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from app.config import settings
+from app.utils.metrics import PASSWORD_HASH_SECONDS, observe_duration
 import hmac
 import hashlib
 import base64
@@ -25,7 +26,8 @@ def hash_password(password: str) -> str:
     Returns:
         str: Hashed password
     """
-    return pwd_ctx.hash(password[:72])
+    with observe_duration(PASSWORD_HASH_SECONDS, operation="bcrypt_hash"):
+        return pwd_ctx.hash(password[:72])
 
 
 def verify_password(plain: str, hashed: str) -> bool:
@@ -39,7 +41,8 @@ def verify_password(plain: str, hashed: str) -> bool:
     Returns:
         bool: True if password matches
     """
-    return pwd_ctx.verify(plain, hashed)
+    with observe_duration(PASSWORD_HASH_SECONDS, operation="bcrypt_verify"):
+        return pwd_ctx.verify(plain, hashed)
 
 
 # ==============================
@@ -0,0 +1,252 @@
+# backend/app/utils/serialization.py
+"""
+Fast JSON rendering for API responses.
+
+Wraps orjson with native handling for the BSON types MongoDB hands back
+(ObjectId, Decimal128) so routes can return raw documents, or bytes that
+were serialized ahead of time, without a jsonable_encoder pass.
+
+Usage:
+    from app.utils.serialization import json_response
+
+    @router.get("/things")
+    async def list_things(db = Depends(get_db)):
+        docs = await db.things.find({}).to_list(100)
+        return json_response(docs)
+
+MessagePack (application/msgpack) is offered alongside JSON where payloads
+are large, e.g. sync uploads from field devices:
+- MsgPackRoute lets a router accept msgpack request bodies; they are
+  validated against the same Pydantic models as JSON bodies.
+- negotiated_response() answers in msgpack when the Accept header asks
+  for it.
+msgpack is optional - without the package such bodies get 415 and
+responses stay JSON.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Coroutine, Optional, Mapping
+from decimal import Decimal
+
+import orjson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+# UTC datetimes render as "...Z" to match Pydantic's JSON output
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    """
+    Fallback encoder for types orjson does not handle natively.
+
+    Raises:
+        TypeError: If the value cannot be serialized (orjson re-raises as JSONEncodeError)
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize content to JSON bytes.
+
+    Args:
+        content: Any JSON-compatible value, including Mongo documents
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON bytes/str with orjson."""
+    return orjson.loads(data)
+
+
+class MongoJSONResponse(JSONResponse):
+    """
+    Default response class for the API.
+
+    Renders with orjson and understands ObjectId/datetime directly.
+    Content that is already bytes is passed through untouched, which is
+    how hot endpoints return pre-serialized payloads.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dumps(content)
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> MongoJSONResponse:
+    """
+    Build a response directly, bypassing FastAPI's response_model pass.
+
+    Use on hot read paths where the handler already produces the exact
+    output shape (plain dicts or bytes) and re-validating is wasted work.
+
+    Args:
+        content: Plain dicts/lists (Mongo types allowed) or pre-serialized bytes
+        status_code: HTTP status code
+        headers: Optional extra response headers
+
+    Returns:
+        MongoJSONResponse: Ready-to-send response
+    """
+    return MongoJSONResponse(content=content, status_code=status_code, headers=headers)
+
+
+# ============================================
+# MessagePack
+# ============================================
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _msgpack_default(value: Any) -> Any:
+    # Datetimes travel as the same ISO strings the JSON responses use
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    return _default(value)
+
+
+def packb(content: Any) -> bytes:
+    """Serialize content (Mongo documents allowed) to MessagePack."""
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+def unpackb(data: bytes) -> Any:
+    """Parse MessagePack bytes."""
+    return msgpack.unpackb(data, raw=False)
+
+
+def _media_type(content_type: str) -> str:
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def wants_msgpack(accept: str) -> bool:
+    """
+    True if an Accept header prefers MessagePack over JSON.
+
+    Args:
+        accept: Raw header value (e.g. "application/msgpack, application/json;q=0.5")
+    """
+    if msgpack is None:
+        return False
+    msgpack_q, json_q = 0.0, 0.0
+    for part in accept.lower().split(","):
+        media_type, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in ("application/json", "*/*", "application/*"):
+            json_q = max(json_q, q)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+class MsgPackResponse(Response):
+    """Response rendered as MessagePack."""
+
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def negotiated_response(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Build a MessagePack or JSON response according to the Accept header.
+
+    Args:
+        request: Incoming request
+        content: Plain dicts/lists (Mongo types allowed)
+        status_code: HTTP status code
+        headers: Optional extra response headers
+
+    Returns:
+        Response: MsgPackResponse or MongoJSONResponse
+    """
+    response_class = MsgPackResponse if wants_msgpack(request.headers.get("accept", "")) else MongoJSONResponse
+    response = response_class(content=content, status_code=status_code, headers=headers)
+    response.headers.append("Vary", "Accept")
+    return response
+
+
+class MsgPackRoute(APIRoute):
+    """
+    Route class that also accepts `Content-Type: application/msgpack` bodies.
+
+    The body is decoded here and handed to FastAPI as if it were already
+    parsed JSON, so Pydantic validation, error responses and the OpenAPI
+    schema are the same for both formats.
+
+    Usage:
+        router = APIRouter(prefix="/sync", route_class=MsgPackRoute)
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_handler = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            if _media_type(request.headers.get("content-type", "")) in MSGPACK_MEDIA_TYPES:
+                request = await _msgpack_as_json(request)
+            return await original_handler(request)
+
+        return handler
+
+
+async def _msgpack_as_json(request: Request) -> Request:
+    if msgpack is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="MessagePack bodies are not supported by this server",
+        )
+    body = await request.body()
+    headers = [(k, v) for k, v in request.scope["headers"] if k != b"content-type"]
+    headers.append((b"content-type", b"application/json"))
+    decoded = Request(dict(request.scope, headers=headers), request.receive)
+    decoded._body = body
+    if body:
+        try:
+            # FastAPI reads JSON bodies through request.json(), which returns this
+            decoded._json = unpackb(body)
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid MessagePack body")
+    return decoded
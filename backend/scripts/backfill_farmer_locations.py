@@ -0,0 +1,54 @@
+"""
+Backfill the GeoJSON `location` field (2dsphere-indexed) for farmers
+created before it existed, from address.gps_latitude / gps_longitude.
+
+Idempotent; only touches farmers with GPS coordinates and no location:
+
+    python scripts/backfill_farmer_locations.py --batch-size 1000
+"""
+import argparse
+import os
+import sys
+
+# Ensure backend root (parent of scripts) is on the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import GEOSPHERE, MongoClient, UpdateOne
+
+from app.config import settings
+from app.utils.geo_utils import point_from_address
+
+
+def backfill(batch_size: int) -> None:
+    client = MongoClient(settings.MONGODB_URL)
+    db = client[settings.MONGODB_DB_NAME]
+    db.farmers.create_index([("location", GEOSPHERE)], name="farmer_location_2dsphere")
+
+    query = {
+        "location": {"$exists": False},
+        "address.gps_latitude": {"$ne": None},
+        "address.gps_longitude": {"$ne": None},
+    }
+    updated = skipped = 0
+    ops = []
+    for farmer in db.farmers.find(query, {"address.gps_latitude": 1, "address.gps_longitude": 1}):
+        point = point_from_address(farmer.get("address"))
+        if point is None:
+            skipped += 1
+            continue
+        ops.append(UpdateOne({"_id": farmer["_id"]}, {"$set": {"location": point}}))
+        if len(ops) >= batch_size:
+            updated += db.farmers.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += db.farmers.bulk_write(ops, ordered=False).modified_count
+
+    print(f"Backfilled location for {updated} farmers ({skipped} with invalid coordinates skipped)")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    backfill(args.batch_size)
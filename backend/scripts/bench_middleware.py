@@ -0,0 +1,134 @@
+"""
+Benchmark per-request overhead of the HTTP middleware chain.
+
+Calls a trivial endpoint through the ASGI interface (no network, no
+server) with the old stack - Starlette CORSMiddleware plus the
+BaseHTTPMiddleware-based EnsureCORSHeadersMiddleware - and with the pure
+ASGI stack now used in app.main (CORS + request ID/timing):
+
+    python scripts/bench_middleware.py --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Ensure backend root (parent of scripts) is on the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware as StarletteCORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.cors import CORSMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+
+
+ORIGIN = "http://localhost:5173"
+CORS_OPTIONS = dict(
+    allow_origins=[ORIGIN],
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+)
+
+
+class EnsureCORSHeadersMiddleware(BaseHTTPMiddleware):
+    """Copy of the middleware removed from app.main, kept for comparison."""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        origin = request.headers.get("origin", "")
+        if origin and (
+            origin.endswith(".app.github.dev")
+            or "localhost" in origin
+            or "127.0.0.1" in origin
+        ):
+            response.headers["Access-Control-Allow-Origin"] = origin
+            response.headers["Access-Control-Allow-Credentials"] = "true"
+            response.headers["Access-Control-Allow-Methods"] = "GET,POST,PUT,DELETE,PATCH,OPTIONS"
+            response.headers["Access-Control-Allow-Headers"] = "*"
+        return response
+
+
+def _base_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def build_old_app() -> FastAPI:
+    app = _base_app()
+    app.add_middleware(StarletteCORSMiddleware, allow_origin_regex=r"^https://[\-a-z0-9]+-(5173|8000|3000)\.app\.github\.dev$", **CORS_OPTIONS)
+    app.add_middleware(EnsureCORSHeadersMiddleware)
+    return app
+
+
+def build_new_app() -> FastAPI:
+    app = _base_app()
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origin_patterns=[r"https://[\-a-z0-9]+\.app\.github\.dev", r"https?://(localhost|127\.0\.0\.1)(:\d+)?"],
+        expose_headers=["X-Request-ID", "X-Response-Time"],
+        **CORS_OPTIONS,
+    )
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+def build_bare_app() -> FastAPI:
+    return _base_app()
+
+
+async def run(app, requests: int) -> float:
+    """Return mean microseconds per request."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"origin", ORIGIN.encode())],
+        "client": ("127.0.0.1", 1234),
+        "server": ("localhost", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # Warm up (builds middleware stack, route caches)
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int) -> None:
+    bare = await run(build_bare_app(), requests)
+    old = await run(build_old_app(), requests)
+    new = await run(build_new_app(), requests)
+    print(f"no middleware          {bare:8.1f} us/request")
+    print(f"old CORS stack         {old:8.1f} us/request   (+{old - bare:.1f} us)")
+    print(f"pure ASGI stack        {new:8.1f} us/request   (+{new - bare:.1f} us)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,160 @@
+"""
+Benchmark JSON rendering for the two heaviest read endpoints.
+
+In-process mode (default) compares the old rendering path against the
+orjson fast path on synthetic data shaped like the real collections:
+
+    python scripts/bench_serialization.py
+
+Live mode times real requests against a running API, so it can be run
+once before and once after a deploy:
+
+    python scripts/bench_serialization.py --url http://localhost:8000 --token <JWT>
+"""
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# Ensure backend root (parent of scripts) is on the path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models.farmer import FarmerListItem
+from app.routes.geo import serialize_geo_doc
+from app.services.farmer_service import FarmerService
+from app.utils.serialization import dumps
+
+
+DATA_DIR = os.path.join(BACKEND_DIR, "data")
+
+
+def _timeit(fn, rounds: int) -> float:
+    """Return median milliseconds per call."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _fake_farmers(n: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "farmer_id": f"ZM{i:08X}",
+            "registration_status": "pending",
+            "created_at": now - timedelta(minutes=i),
+            "personal_info": {
+                "first_name": "John",
+                "last_name": f"Zimba{i}",
+                "phone_primary": "+260977000000",
+            },
+            "address": {"village": "Chisenga", "district_name": "Kawambwa District"},
+        }
+        for i in range(n)
+    ]
+
+
+def _read_csv(name: str) -> List[dict]:
+    with open(os.path.join(DATA_DIR, f"{name}.csv"), newline="", encoding="utf-8") as f:
+        return [dict(row, _id=ObjectId()) for row in csv.DictReader(f)]
+
+
+def bench_farmer_list(rounds: int) -> None:
+    docs = _fake_farmers(100)
+    adapter = TypeAdapter(List[FarmerListItem])
+
+    def before():
+        items = [FarmerListItem(**FarmerService._to_list_row(d)) for d in docs]
+        content = adapter.dump_python(items, mode="json", by_alias=True)
+        JSONResponse(content).body
+
+    def after():
+        dumps([FarmerService._to_list_row(d) for d in docs])
+
+    _report("GET /api/farmers?limit=100", _timeit(before, rounds), _timeit(after, rounds))
+
+
+def bench_hierarchy(rounds: int) -> None:
+    provinces = _read_csv("provinces")
+    districts = _read_csv("districts")
+    chiefdoms = _read_csv("chiefdoms")
+
+    def before():
+        hierarchy = []
+        for province in provinces:
+            p = serialize_geo_doc(province)
+            p_districts = []
+            for district in districts:
+                d = serialize_geo_doc(district)
+                if d.get("province_code") != p["province_code"]:
+                    continue
+                d["chiefdoms"] = [
+                    serialize_geo_doc(c) for c in chiefdoms
+                    if c.get("district_id", "").upper() == d["district_code"].upper()
+                ]
+                p_districts.append(d)
+            hierarchy.append({**p, "districts": p_districts})
+        JSONResponse(jsonable_encoder({"provinces": hierarchy})).body
+
+    def after():
+        by_district = {}
+        for c in chiefdoms:
+            chief = serialize_geo_doc(c)
+            by_district.setdefault(chief.get("district_code", "").upper(), []).append(chief)
+        by_province = {}
+        for d in districts:
+            district = serialize_geo_doc(d)
+            district["chiefdoms"] = by_district.get(district["district_code"].upper(), [])
+            by_province.setdefault(district.get("province_code"), []).append(district)
+        hierarchy = []
+        for p in provinces:
+            province = serialize_geo_doc(p)
+            province["districts"] = by_province.get(province.get("province_code"), [])
+            hierarchy.append(province)
+        dumps({"provinces": hierarchy})
+
+    _report("GET /api/geo/hierarchy", _timeit(before, rounds), _timeit(after, rounds))
+
+
+def bench_live(url: str, token: str, rounds: int) -> None:
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    with httpx.Client(base_url=url, headers=headers, timeout=30) as client:
+        for path in ("/api/farmers?limit=100", "/api/geo/hierarchy"):
+            client.get(path)  # warm up
+            ms = _timeit(lambda: client.get(path).raise_for_status(), rounds)
+            size = len(client.get(path).content)
+            print(f"{path:<32} {ms:8.2f} ms/request  ({size} bytes)")
+
+
+def _report(label: str, before_ms: float, after_ms: float) -> None:
+    speedup = before_ms / after_ms if after_ms else float("inf")
+    print(f"{label:<32} before {before_ms:8.3f} ms   after {after_ms:8.3f} ms   x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running API (enables live mode)")
+    parser.add_argument("--token", default="", help="Bearer token for authenticated endpoints")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.url:
+        bench_live(args.url, args.token, args.rounds)
+    else:
+        bench_farmer_list(args.rounds)
+        bench_hierarchy(args.rounds)
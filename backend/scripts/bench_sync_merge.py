@@ -0,0 +1,131 @@
+"""
+Benchmark the field-level sync merge (services/sync_merge.py).
+
+In-process mode (default) merges a synthetic batch against stored farmers
+the way process_sync_batch does - a mix of clean updates, merges from an
+older base version and true conflicts - and reports records per second:
+
+    python scripts/bench_sync_merge.py --records 10000
+
+With --mongo-url the merged updates are also written with one unordered,
+version-guarded bulk_write to a scratch database, which is dropped again:
+
+    python scripts/bench_sync_merge.py --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+# Ensure backend root (parent of scripts) is on the path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.services.farmer_service import version_filter
+from app.services.sync_merge import (
+    FIELD_VERSIONS,
+    merge_record,
+    merge_update,
+    mergeable_changes,
+    stamp_tree,
+)
+from app.utils.doc_diff import flatten
+
+
+SCRATCH_DB = "bench_sync_merge"
+
+
+def _fake_batch(n: int, conflict_rate: float) -> Tuple[List[dict], List[dict], List[int]]:
+    """Stored farmers at version 3, device records and their base versions."""
+    rng = random.Random(42)
+    stored, records, bases = [], [], []
+    for i in range(n):
+        doc = {
+            "farmer_id": f"ZMB{i:08d}",
+            "version": 3,
+            "personal_info": {
+                "first_name": "John",
+                "last_name": f"Zimba{i}",
+                "phone_primary": "+260977000000",
+                "gender": "Male",
+            },
+            "address": {
+                "province_code": "LP",
+                "district_code": "LP05",
+                "village": "Chisenga",
+                "gps_latitude": -11.0 + i * 1e-5,
+                "gps_longitude": 29.0,
+            },
+        }
+        doc[FIELD_VERSIONS] = stamp_tree(flatten({k: doc[k] for k in ("personal_info", "address")}), 1)
+        # The server edited the phone number at version 3
+        doc[FIELD_VERSIONS]["personal_info"]["phone_primary"] = 3
+        stored.append(doc)
+
+        record = {
+            "farmer_id": doc["farmer_id"],
+            "personal_info": dict(doc["personal_info"], last_name=f"Zimba-{i}"),
+            "address": dict(doc["address"], village="Mansa Road"),
+        }
+        if rng.random() < conflict_rate:
+            record["personal_info"]["phone_primary"] = "+260966000000"
+        records.append(record)
+        bases.append(rng.choice((1, 3)))
+    return stored, records, bases
+
+
+def bench_merge(stored: List[dict], records: List[dict], bases: List[int]) -> List[tuple]:
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    staged, merged_count, conflicts = [], 0, 0
+    for current, record, base in zip(stored, records, bases):
+        merge = merge_record(current, mergeable_changes(record), base)
+        update, _ = merge_update(current, merge.applied, "bench@example.com", now)
+        staged.append((current, update))
+        merged_count += base < current["version"]
+        conflicts += bool(merge.conflicts)
+    elapsed = time.perf_counter() - start
+
+    n = len(records)
+    print(f"merged {n} records in {elapsed * 1000:8.1f} ms   {n / elapsed:10.0f} records/s")
+    print(f"  from an older base version: {merged_count}   with conflicts queued: {conflicts}")
+    return staged
+
+
+def bench_write(url: str, stored: List[dict], staged: List[tuple]) -> None:
+    from pymongo import MongoClient, UpdateOne
+
+    client = MongoClient(url)
+    coll = client[SCRATCH_DB].farmers
+    try:
+        coll.drop()
+        coll.insert_many([dict(doc) for doc in stored], ordered=False)
+        ops = [
+            UpdateOne({"farmer_id": current["farmer_id"], **version_filter(current["version"])}, update)
+            for current, update in staged
+        ]
+        start = time.perf_counter()
+        result = coll.bulk_write(ops, ordered=False)
+        elapsed = time.perf_counter() - start
+        print(f"bulk_write {len(ops)} updates in {elapsed * 1000:8.1f} ms   "
+              f"{len(ops) / elapsed:10.0f} records/s   (modified {result.modified_count})")
+    finally:
+        client.drop_database(SCRATCH_DB)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--conflict-rate", type=float, default=0.05,
+                        help="Share of records that also edit the server-edited field")
+    parser.add_argument("--mongo-url", help="Also time the bulk write against this MongoDB")
+    args = parser.parse_args()
+
+    stored, records, bases = _fake_batch(args.records, args.conflict_rate)
+    staged = bench_merge(stored, records, bases)
+    if args.mongo_url:
+        bench_write(args.mongo_url, stored, staged)
@@ -0,0 +1,92 @@
+"""
+Benchmark MongoDB client reuse in Celery tasks (tasks/worker_db.py).
+
+Runs the same small task body - one find_one and one update_one on a
+scratch farmers collection - in two ways and reports tasks per second:
+
+    per-task client   MongoClient() ... close() around every task (the old
+                      get_db_sync / generate_id_card behaviour)
+    pooled client     get_worker_db(), one client for the whole process
+
+    python scripts/bench_worker_mongo.py --mongo-url mongodb://localhost:27017 --tasks 500
+
+The scratch database is dropped afterwards.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Ensure backend root (parent of scripts) is on the path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+
+SCRATCH_DB = "bench_worker_mongo"
+FARMERS = 1000
+
+
+def _task_body(db, i: int) -> None:
+    farmer_id = f"ZMB{i % FARMERS:08d}"
+    db.farmers.find_one({"farmer_id": farmer_id})
+    db.farmers.update_one({"farmer_id": farmer_id}, {"$inc": {"version": 1}})
+
+
+def _report(label: str, n: int, elapsed: float) -> None:
+    print(f"{label:<18} {n} tasks in {elapsed * 1000:8.1f} ms   {n / elapsed:8.0f} tasks/s")
+
+
+def bench_per_task(url: str, n: int) -> float:
+    from pymongo import MongoClient
+
+    start = time.perf_counter()
+    for i in range(n):
+        client = MongoClient(url)
+        _task_body(client[SCRATCH_DB], i)
+        client.close()
+    elapsed = time.perf_counter() - start
+    _report("per-task client", n, elapsed)
+    return elapsed
+
+
+def bench_pooled(n: int) -> float:
+    from app.tasks.worker_db import get_worker_client
+
+    db = get_worker_client()[SCRATCH_DB]
+    db.command("ping")  # worker_process_init opens the pool before the first task
+    start = time.perf_counter()
+    for i in range(n):
+        _task_body(get_worker_client()[SCRATCH_DB], i)
+    elapsed = time.perf_counter() - start
+    _report("pooled client", n, elapsed)
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--tasks", type=int, default=500)
+    args = parser.parse_args()
+
+    # worker_db reads the URL from settings at import time
+    os.environ["MONGODB_URL"] = args.mongo_url
+
+    from pymongo import MongoClient
+
+    from app.tasks.worker_db import close_worker_client
+
+    setup = MongoClient(args.mongo_url)
+    try:
+        setup.drop_database(SCRATCH_DB)
+        setup[SCRATCH_DB].farmers.insert_many(
+            [{"farmer_id": f"ZMB{i:08d}", "version": 1} for i in range(FARMERS)], ordered=False
+        )
+        setup[SCRATCH_DB].farmers.create_index("farmer_id", unique=True)
+
+        before = bench_per_task(args.mongo_url, args.tasks)
+        after = bench_pooled(args.tasks)
+        print(f"speedup: {before / after:.1f}x")
+    finally:
+        close_worker_client()
+        setup.drop_database(SCRATCH_DB)
+        setup.close()
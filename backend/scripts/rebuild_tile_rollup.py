@@ -0,0 +1,62 @@
+"""
+Recompute the farmer_tile_counts map rollup from farmer locations.
+
+Incremental updates on every write keep the rollup current; run this after
+the location backfill, or to correct drift from concurrent writers:
+
+    python scripts/rebuild_tile_rollup.py
+"""
+import argparse
+import os
+import sys
+
+# Ensure backend root (parent of scripts) is on the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import ASCENDING, MongoClient
+
+from app.config import settings
+from app.services.map_rollup import ROLLUP_COLLECTION
+from app.utils.geo_utils import lat_lng_to_tile, tile_to_quadkey
+
+
+def rebuild(batch_size: int) -> None:
+    client = MongoClient(settings.MONGODB_URL)
+    db = client[settings.MONGODB_DB_NAME]
+
+    cells = {}
+    farmers = 0
+    for farmer in db.farmers.find({"location": {"$exists": True}}, {"location": 1}):
+        longitude, latitude = farmer["location"]["coordinates"]
+        for zoom in range(settings.MAP_TILE_MIN_ZOOM, settings.MAP_TILE_MAX_ZOOM + 1):
+            x, y = lat_lng_to_tile(latitude, longitude, zoom)
+            quadkey = tile_to_quadkey(x, y, zoom)
+            cell = cells.get(quadkey)
+            if cell is None:
+                cell = cells[quadkey] = {"_id": quadkey, "z": zoom, "x": x, "y": y, "count": 0, "sum_lat": 0.0, "sum_lng": 0.0}
+            cell["count"] += 1
+            cell["sum_lat"] += latitude
+            cell["sum_lng"] += longitude
+        farmers += 1
+
+    # Build aside, then swap in so readers never see a half-built rollup
+    staging = db[f"{ROLLUP_COLLECTION}_rebuild"]
+    staging.drop()
+    docs = list(cells.values())
+    for start in range(0, len(docs), batch_size):
+        staging.insert_many(docs[start:start + batch_size], ordered=False)
+    staging.create_index([("z", ASCENDING), ("x", ASCENDING), ("y", ASCENDING)], name="tile_zxy")
+    if docs:
+        staging.rename(ROLLUP_COLLECTION, dropTarget=True)
+    else:
+        db[ROLLUP_COLLECTION].delete_many({})
+
+    print(f"Rebuilt {len(docs)} tiles from {farmers} farmers")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    rebuild(args.batch_size)
@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -6,6 +7,11 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Ensure backend root (parent of scripts) is on the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache import TAG_GEO, invalidate_sync
+
 MONGO_URI = os.getenv("MONGODB_URL") or os.getenv("MONGODB_URI")
 DB_NAME = "zambian_farmer_db"
 
@@ -74,6 +80,9 @@ async def seed_geo_data():
 
     client.close()
 
+    # Running API processes drop their cached geo lists and hierarchy
+    invalidate_sync(TAG_GEO)
+
 
 if __name__ == "__main__":
     asyncio.run(seed_geo_data())